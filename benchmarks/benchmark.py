@@ -0,0 +1,459 @@
+"""Module benchmarking the provisioning of synthetic inventories against the mock Intersight server."""
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shlex
+import sys
+import tempfile
+import time
+
+from Crypto.PublicKey import ECC
+from prettytable import PrettyTable
+
+import main
+from benchmarks import mock_intersight_server
+from intersight_api_functions import (
+    completion_tracker,
+    intersight_authentication,
+    inventory,
+    request_governor,
+    rollback,
+    tracing,
+    wwpn_index,
+)
+
+
+# Number of Server Profiles of the default scenarios.
+DEFAULT_SIZES = [10, 100, 1000]
+
+# Provisioning flags of the default scenarios: the client rate limit would hide the server latency.
+DEFAULT_FLAGS = "--rate-limit 0"
+
+# Relative increase of the wall time tolerated against a baseline.
+DEFAULT_TOLERANCE = 0.2
+
+
+###############################################################################
+#                             Synthetic Inventory                             #
+###############################################################################
+
+
+def generate_inventory(server_profile_count, vhba_count=2, group_count=1):
+    """Generate an inventory of Server Profiles with one WWPN Pool per vHBA.
+
+    Args:
+        - server_profile_count (integer): number of Server Profiles.
+        - vhba_count (integer): number of vHBAs of each Server Profile.
+        - group_count (integer): number of groups of Server Profiles, each with its own Server Profile Template and San Connectivity Policy.
+
+    Returns:
+        - inventory_config (dictionary): inventory in the format of the inventory_config JSON file.
+        - wwpn_pools (dictionary): ID blocks of each WWPN Pool, indexed by WWPN Pool name.
+    """
+    first_wwpns = [
+        0x20000025B5000000 | (0x0A + vhba) << 16 for vhba in range(vhba_count)
+    ]
+
+    inventory_config = {
+        "organization": "benchmark",
+        "san_connectivity_policy": "benchmark-san-connectivity-policy",
+        "server_profile_template": "benchmark-server-profile-template",
+        "server_profiles": [
+            {
+                "server_profile_name": f"benchmark-server-profile-{index:05d}",
+                "reservations": [
+                    {
+                        "vhba_name": f"vhba{vhba}",
+                        "wwpn_to_reserve": wwpn_index.format_wwpn(
+                            first_wwpns[vhba] + index
+                        ),
+                        "wwpn_pool": f"benchmark-wwpn-pool-{vhba}",
+                    }
+                    for vhba in range(vhba_count)
+                ],
+            }
+            for index in range(1, server_profile_count + 1)
+        ],
+    }
+    wwpn_pools = {
+        f"benchmark-wwpn-pool-{vhba}": [
+            (wwpn_index.format_wwpn(first_wwpns[vhba] + 1), server_profile_count)
+        ]
+        for vhba in range(vhba_count)
+    }
+
+    # Split the Server Profiles into groups of consecutive Server Profiles.
+    if group_count > 1:
+        server_profiles = inventory_config.pop("server_profiles")
+        group_size = -(-len(server_profiles) // group_count)
+        inventory_config["groups"] = [
+            {
+                "server_profile_template": f"benchmark-server-profile-template-{group}",
+                "san_connectivity_policy": f"benchmark-san-connectivity-policy-{group}",
+                "server_profiles": server_profiles[
+                    group * group_size : (group + 1) * group_size
+                ],
+            }
+            for group in range(group_count)
+        ]
+
+    return inventory_config, wwpn_pools
+
+
+###############################################################################
+#                                 Scenarios                                   #
+###############################################################################
+
+
+def run_scenario(
+    mock,
+    server_url,
+    key_path,
+    server_profile_count,
+    vhba_count,
+    flags,
+    trace_path=None,
+    measure_rollback=False,
+    group_count=1,
+):
+    """Provision a synthetic inventory against the mock Intersight server.
+
+    Args:
+        - mock (MockIntersight object): mock served by the server, reset before the scenario.
+        - server_url (string): URL of the mock Intersight server.
+        - key_path (string): path of the private key signing the requests.
+        - server_profile_count (integer): number of Server Profiles.
+        - vhba_count (integer): number of vHBAs of each Server Profile.
+        - flags (list of strings): command line arguments of main.py.
+        - trace_path (string): prefix of the path of the Chrome trace of the scenario, if any.
+        - measure_rollback (boolean): whether to roll back the scenario after it and measure the rollback.
+        - group_count (integer): number of groups of Server Profiles of the inventory.
+
+    Returns:
+        - result (dictionary): measures of the scenario.
+    """
+    mock.reset()
+    inventory_config, wwpn_pools = generate_inventory(
+        server_profile_count, vhba_count, group_count
+    )
+    for group in inventory_config.get("groups") or [inventory_config]:
+        mock.seed(
+            organization=inventory_config["organization"],
+            server_profile_template=group["server_profile_template"],
+            san_connectivity_policy=group["san_connectivity_policy"],
+            wwpn_pools=wwpn_pools,
+        )
+
+    args = main.parse_arguments(flags)
+    # The rollback logs of the scenarios are kept in memory.
+    args.rollback_dir = None
+    api_client = intersight_authentication.authenticate_to_intersight(
+        intersight_key_id="benchmark",
+        intersight_secret_key_path=key_path,
+        intersight_host=server_url,
+        max_connections=max(
+            args.max_in_flight if args.engine == "asyncio" else args.workers,
+            args.rollback_workers if measure_rollback else 1,
+        ),
+        raw_responses=args.raw_responses,
+    )
+    tracer = tracing.Tracer()
+    tracer.install(api_client)
+    governor = request_governor.RequestGovernor(
+        rate_limit=args.rate_limit, max_retries=args.max_retries
+    )
+    governor.install(api_client)
+    tracker = completion_tracker.CompletionTracker(
+        poll_interval=args.poll_interval,
+        max_poll_interval=args.max_poll_interval,
+        timeout=args.completion_timeout,
+    )
+    tracker.install(api_client)
+
+    # The functions of intersight_api_methods print a line per call.
+    output = io.StringIO()
+    exit_code = None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            failed_server_profiles = main.provision_inventory(
+                args=args,
+                api_client=api_client,
+                read_server_profiles=lambda: inventory.iterate_inventory(
+                    inventory_config
+                ),
+            )
+
+        except SystemExit as exception:
+            exit_code = exception.code
+            failed_server_profiles = {}
+    wall_time = time.perf_counter() - start
+
+    end_state_problems = (
+        len(mock.verify_inventory(inventory_config)) if exit_code is None else None
+    )
+
+    # Roll the scenario back and count the resources left behind.
+    rollback_time = None
+    leftovers = None
+    if measure_rollback:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            rollback.rollback_run(
+                api_client=api_client,
+                rollback_log=api_client.rollback_log,
+                workers=args.rollback_workers,
+            )
+        rollback_time = round(time.perf_counter() - start, 3)
+        leftovers = mock.count_provisioned()
+
+    api_client.close()
+
+    latencies = [span["duration"] for span in tracer.spans if span["kind"] == "request"]
+    if trace_path:
+        with contextlib.redirect_stdout(output):
+            tracer.export(f"{trace_path}.{server_profile_count}", trace_format="chrome")
+
+    stats = mock.stats()
+    return {
+        "server_profiles": server_profile_count,
+        "flags": " ".join(flags),
+        "wall_time": round(wall_time, 3),
+        "server_profiles_per_second": round(server_profile_count / wall_time, 2),
+        "api_calls": stats.get("requests", 0),
+        "api_calls_per_server_profile": round(
+            stats.get("requests", 0) / server_profile_count, 2
+        ),
+        "p50_latency_ms": round(tracing.percentile(latencies, 0.50) * 1000, 2),
+        "p99_latency_ms": round(tracing.percentile(latencies, 0.99) * 1000, 2),
+        "connections": stats.get("connections", 0),
+        "throttled": stats.get("HTTP 429", 0),
+        "retries": governor.summary()["retries"],
+        "completion_polls": tracker.summary()["polls"],
+        "failed_server_profiles": len(failed_server_profiles),
+        "exit_code": exit_code,
+        "end_state_problems": end_state_problems,
+        "rollback_time": rollback_time,
+        "leftovers_after_rollback": leftovers,
+        "requests_by_operation": {
+            operation: counters["requests"]
+            for operation, counters in tracer.summary().items()
+        },
+        "api_calls_by_resource": {
+            counter: count
+            for counter, count in sorted(stats.items())
+            if not counter.startswith("HTTP")
+            and counter not in ("requests", "connections")
+        },
+    }
+
+
+###############################################################################
+#                                 Reporting                                   #
+###############################################################################
+
+
+def print_results(results):
+    """Print the measures of the scenarios as a table.
+
+    Args:
+        - results (list of dictionaries): measures of each scenario.
+    """
+    columns = [
+        "server_profiles",
+        "wall_time",
+        "server_profiles_per_second",
+        "api_calls",
+        "api_calls_per_server_profile",
+        "p50_latency_ms",
+        "p99_latency_ms",
+        "connections",
+        "throttled",
+        "retries",
+        "failed_server_profiles",
+        "end_state_problems",
+    ]
+    if any(result["rollback_time"] is not None for result in results):
+        columns += ["rollback_time", "leftovers_after_rollback"]
+    table = PrettyTable(columns)
+    for result in results:
+        table.add_row([result[column] for column in columns])
+
+    print(table)
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Compare the measures of the scenarios to the ones of a previous run.
+
+    A scenario regresses when it needs more API calls per Server Profile, or when
+    its wall time grows by more than the tolerance.
+
+    Args:
+        - results (list of dictionaries): measures of each scenario.
+        - baseline (list of dictionaries): measures of each scenario of the previous run.
+        - tolerance (float): relative increase of the wall time tolerated.
+
+    Returns:
+        - regressions (list of strings): description of each regression.
+    """
+    baseline_by_size = {result["server_profiles"]: result for result in baseline}
+    regressions = []
+
+    for result in results:
+        reference = baseline_by_size.get(result["server_profiles"])
+        if reference is None:
+            continue
+
+        if (
+            result["api_calls_per_server_profile"]
+            > reference["api_calls_per_server_profile"]
+        ):
+            regressions.append(
+                f"{result['server_profiles']} Server Profiles: {result['api_calls_per_server_profile']} API calls per Server Profile instead of {reference['api_calls_per_server_profile']}"
+            )
+        if result["wall_time"] > reference["wall_time"] * (1 + tolerance):
+            regressions.append(
+                f"{result['server_profiles']} Server Profiles: {result['wall_time']}s instead of {reference['wall_time']}s"
+            )
+
+    return regressions
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the provisioning of synthetic inventories against a local mock of the Intersight API."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Number of Server Profiles of each scenario (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--vhbas",
+        type=int,
+        default=2,
+        help="Number of vHBAs of each Server Profile (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--groups",
+        type=int,
+        default=1,
+        help="Number of groups of Server Profiles, each with its own Server Profile Template and San Connectivity Policy (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--flags",
+        default=DEFAULT_FLAGS,
+        help="Command line arguments of main.py used for the provisioning (default: '%(default)s').",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=2.0,
+        help="Latency added by the mock server to each request (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--jitter-ms",
+        type=float,
+        default=0.0,
+        help="Maximum random variation of the latency (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of the requests failing with an injected HTTP 503 (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--server-rate-limit",
+        type=float,
+        default=0.0,
+        help="Requests per second accepted by the mock server before HTTP 429, 0 for no limit (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--async-bulk-ms",
+        type=float,
+        default=0.0,
+        help="Delay before the 'bulk.MoCloner' and 'bulk.MoMerger' complete asynchronously, 0 to execute them synchronously (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Roll back each scenario after it, and measure the rollback time and the resources left behind.",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write the Chrome trace of each scenario to PATH.<number of Server Profiles>.",
+    )
+    parser.add_argument(
+        "--output", metavar="PATH", help="Write the measures as JSON to PATH."
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        help="Compare the measures to the JSON output of a previous run, and exit with 1 on regression.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Relative increase of the wall time tolerated against the baseline (default: %(default)s).",
+    )
+    benchmark_args = parser.parse_args()
+
+    mock_intersight = mock_intersight_server.MockIntersight(
+        latency=benchmark_args.latency_ms / 1000,
+        jitter=benchmark_args.jitter_ms / 1000,
+        error_rate=benchmark_args.error_rate,
+        rate_limit=benchmark_args.server_rate_limit,
+        async_delay=benchmark_args.async_bulk_ms / 1000,
+    )
+    mock_server = mock_intersight_server.start_mock_server(mock_intersight)
+
+    with tempfile.TemporaryDirectory() as key_directory:
+        # The requests are signed as with a real API key, so the signing cost is measured.
+        signing_key_path = os.path.join(key_directory, "SecretKey.txt")
+        with open(signing_key_path, "w", encoding="utf-8") as key_file:
+            key_file.write(ECC.generate(curve="P-256").export_key(format="PEM"))
+
+        benchmark_results = [
+            run_scenario(
+                mock=mock_intersight,
+                server_url=mock_server.url,
+                key_path=signing_key_path,
+                server_profile_count=size,
+                vhba_count=benchmark_args.vhbas,
+                flags=shlex.split(benchmark_args.flags),
+                trace_path=benchmark_args.trace,
+                measure_rollback=benchmark_args.rollback,
+                group_count=benchmark_args.groups,
+            )
+            for size in benchmark_args.sizes
+        ]
+
+    mock_server.shutdown()
+    print_results(benchmark_results)
+
+    if benchmark_args.output:
+        with open(benchmark_args.output, "w", encoding="utf-8") as output_file:
+            json.dump(benchmark_results, output_file, indent=2)
+
+    if benchmark_args.baseline:
+        with open(benchmark_args.baseline, "r", encoding="utf-8") as baseline_file:
+            benchmark_regressions = compare_to_baseline(
+                benchmark_results, json.load(baseline_file), benchmark_args.tolerance
+            )
+        for regression in benchmark_regressions:
+            print(f"- Regression: {regression}.")
+        if benchmark_regressions:
+            sys.exit(1)
@@ -0,0 +1,1110 @@
+"""Module providing a local mock of the Intersight API, to benchmark the provisioning offline."""
+#!/usr/bin/env python3
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+# Prefix of the paths of the Intersight API.
+API_PREFIX = "/api/v1/"
+
+# Number of objects returned by a list query without $top, as Intersight.
+DEFAULT_TOP = 100
+
+# One condition of a $filter: a dotted attribute, an operator and a value or a list of values.
+FILTER_CONDITION = re.compile(
+    r"\s*([\w.]+)\s+(eq|ne|in)\s+(\([^)]*\)|'[^']*'|[^\s()]+)\s*(?:\band\b|$)",
+    re.IGNORECASE,
+)
+
+# One value of the list of an 'in' condition.
+FILTER_VALUE = re.compile(r"'[^']*'|[^\s,]+")
+
+
+###############################################################################
+#                                  Helpers                                    #
+###############################################################################
+
+
+def object_type_from_collection(namespace, collection):
+    """Get the object type of the resources of a collection.
+
+    Args:
+        - namespace (string): namespace of the collection, e.g. 'vnic'.
+        - collection (string): name of the collection, e.g. 'SanConnectivityPolicies'.
+
+    Returns:
+        - object_type (string): object type of the resources, e.g. 'vnic.SanConnectivityPolicy'.
+    """
+    if collection.endswith("ies"):
+        singular = collection[:-3] + "y"
+    elif collection.endswith("s"):
+        singular = collection[:-1]
+    else:
+        singular = collection
+
+    return f"{namespace}.{singular}"
+
+
+def mo_ref(mo):
+    """Get a 'mo.MoRef' pointing to a resource.
+
+    Args:
+        - mo (dictionary): resource.
+
+    Returns:
+        - reference (dictionary): 'mo.MoRef' with the ObjectType and the Moid of the resource.
+    """
+    return {"ClassId": "mo.MoRef", "ObjectType": mo["ObjectType"], "Moid": mo["Moid"]}
+
+
+def get_attribute(mo, dotted_name):
+    """Get a possibly nested attribute of a resource, e.g. 'Organization.Moid'.
+
+    Args:
+        - mo (dictionary): resource.
+        - dotted_name (string): name of the attribute.
+
+    Returns:
+        - value: value of the attribute, or None if it is not set.
+    """
+    value = mo
+    for name in dotted_name.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(name)
+
+    return value
+
+
+def parse_filter_value(value):
+    """Parse a literal of a $filter.
+
+    Args:
+        - value (string): quoted string, or unquoted literal.
+
+    Returns:
+        - value: the string, None for 'null', or the unquoted literal as a string.
+    """
+    if value.startswith("'") and value.endswith("'"):
+        return value[1:-1]
+    if value == "null":
+        return None
+
+    return value
+
+
+def parse_filter(expression):
+    """Parse a $filter made of 'eq', 'ne' and 'in' conditions joined with 'and'.
+
+    Args:
+        - expression (string): $filter of the query.
+
+    Returns:
+        - conditions (list of tuples): attribute, operator and value(s) of each condition.
+    """
+    conditions = []
+    position = 0
+    expression = expression.strip()
+
+    while position < len(expression):
+        match = FILTER_CONDITION.match(expression, position)
+        if match is None:
+            raise ValueError(f"Unsupported $filter: {expression}")
+
+        attribute, operator, value = match.groups()
+        operator = operator.lower()
+        if operator == "in":
+            value = [
+                parse_filter_value(item) for item in FILTER_VALUE.findall(value[1:-1])
+            ]
+        else:
+            value = parse_filter_value(value)
+
+        conditions.append((attribute, operator, value))
+        position = match.end()
+
+    return conditions
+
+
+def matches(mo, conditions):
+    """Check whether a resource matches all the conditions of a $filter.
+
+    Args:
+        - mo (dictionary): resource.
+        - conditions (list of tuples): parsed $filter.
+
+    Returns:
+        - matching (boolean): True if the resource matches.
+    """
+    for attribute, operator, value in conditions:
+        actual = get_attribute(mo, attribute)
+        if actual is not None and not isinstance(actual, str):
+            actual = str(actual)
+
+        if operator == "eq" and actual != value:
+            return False
+        if operator == "ne" and actual == value:
+            return False
+        if operator == "in" and actual not in value:
+            return False
+
+    return True
+
+
+def select_attributes(mo, select):
+    """Project a resource on the attributes of a $select.
+
+    Args:
+        - mo (dictionary): resource.
+        - select (string): comma separated attributes of the $select.
+
+    Returns:
+        - projection (dictionary): resource with only its ClassId, ObjectType, Moid and selected attributes.
+    """
+    selected = {"ClassId", "ObjectType", "Moid"} | {
+        attribute.strip() for attribute in select.split(",")
+    }
+    return {name: value for name, value in mo.items() if name in selected}
+
+
+def api_error(status, message):
+    """Get an error response in the format of Intersight.
+
+    Args:
+        - status (integer): HTTP status.
+        - message (string): description of the error.
+
+    Returns:
+        - response (tuple): status, body and headers of the response.
+    """
+    return status, {"code": "InvalidRequest", "message": message}, {}
+
+
+###############################################################################
+#                              Mock Intersight                                #
+###############################################################################
+
+
+class MockIntersight:
+    """In-memory stand-in of the Intersight API used by intersight_api_methods.
+
+    Every '/api/v1/<namespace>/<Collection>' path supports list queries ($filter
+    with 'eq', 'ne', 'in' and 'and', $select, $orderby, $top, $skip, $count and
+    $inlinecount), reads with $select, creations, updates and deletions by moid.
+    'bulk.Request' is executed synchronously. 'bulk.MoCloner' and 'bulk.MoMerger'
+    are executed synchronously too, or, with an asynchronous delay, return an
+    'AsyncResult' whose 'bulk.Result' completes after the delay: their targets are
+    only created or merged at that time. The 'fcpool.Reservation' identities are
+    unique per pool.
+
+    Each request can be delayed by a configurable latency, fail with an injected
+    HTTP 503, or be rejected with a HTTP 429 and a 'Retry-After' header once the
+    token bucket of the server rate limit is empty.
+    """
+
+    def __init__(
+        self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0.0, async_delay=0.0
+    ):
+        """Create a Mock Intersight.
+
+        Args:
+            - latency (float): delay in seconds added to each request.
+            - jitter (float): maximum random delay in seconds added to or removed from the latency.
+            - error_rate (float): fraction of the requests failing with an injected HTTP 503.
+            - rate_limit (float): maximum number of requests per second before HTTP 429, or 0 for no limit.
+            - async_delay (float): delay in seconds before a 'bulk.MoCloner' or 'bulk.MoMerger' completes, or 0 to execute them synchronously.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.async_delay = async_delay
+
+        self._lock = threading.RLock()
+        self._random = random.Random(0)
+        self.reset()
+
+    def reset(self):
+        """Drop all the resources and the counters."""
+        with self._lock:
+            self.objects = {}
+            self.counters = {}
+            self._next_moid = 0
+            self._async_jobs = []
+            self._tokens = max(self.rate_limit, 1.0)
+            self._last_refill = time.monotonic()
+
+    def stats(self):
+        """Get the counters of the requests served.
+
+        Returns:
+            - counters (dictionary): number of requests, indexed by 'METHOD object_type' and by 'HTTP status', and number of 'connections'.
+        """
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, counter):
+        """Increment a counter."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + 1
+
+    ###########################################################################
+    #                                Store                                    #
+    ###########################################################################
+
+    def add(self, object_type, **attributes):
+        """Create a resource directly in the store.
+
+        Args:
+            - object_type (string): object type of the resource, e.g. 'server.Profile'.
+            - attributes: attributes of the resource.
+
+        Returns:
+            - mo (dictionary): the created resource.
+        """
+        with self._lock:
+            self._next_moid += 1
+            mo = dict(
+                attributes,
+                ClassId=object_type,
+                ObjectType=object_type,
+                Moid=f"{self._next_moid:024x}",
+            )
+            self.objects.setdefault(object_type, {})[mo["Moid"]] = mo
+
+            return mo
+
+    def find(self, object_type, **attributes):
+        """Find the resources of an object type with the given attributes.
+
+        Args:
+            - object_type (string): object type of the resources.
+            - attributes: expected values of the attributes.
+
+        Returns:
+            - mos (list of dictionaries): matching resources.
+        """
+        with self._lock:
+            return [
+                mo
+                for mo in self.objects.get(object_type, {}).values()
+                if all(mo.get(name) == value for name, value in attributes.items())
+            ]
+
+    def get(self, object_type, moid):
+        """Get a resource by moid.
+
+        Args:
+            - object_type (string): object type of the resource.
+            - moid (string): moid of the resource.
+
+        Returns:
+            - mo (dictionary): the resource, or None if it does not exist.
+        """
+        with self._lock:
+            return self.objects.get(object_type, {}).get(moid)
+
+    def seed(
+        self,
+        organization,
+        server_profile_template,
+        san_connectivity_policy,
+        wwpn_pools,
+    ):
+        """Create the Organization, Server Profile Template, San Connectivity Policy and WWPN Pools of an inventory.
+
+        The resources that already exist with the same name (in the same
+        Organization) are reused, so that the groups of an inventory can be seeded
+        one after the other.
+
+        Args:
+            - organization (string): name of the Organization.
+            - server_profile_template (string): name of the Server Profile Template.
+            - san_connectivity_policy (string): name of the San Connectivity Policy of the Server Profile Template.
+            - wwpn_pools (dictionary): ID blocks of each WWPN Pool as a list of (first WWPN, size) tuples, indexed by WWPN Pool name.
+
+        Returns:
+            - moids (dictionary): moid of each created resource, indexed by name.
+        """
+        organization_mo = (
+            self.find("organization.Organization", Name=organization)
+            or [self.add("organization.Organization", Name=organization)]
+        )[0]
+
+        def find_or_add(object_type, name, **attributes):
+            for mo in self.find(object_type, Name=name):
+                if get_attribute(mo, "Organization.Moid") == organization_mo["Moid"]:
+                    return mo
+
+            return self.add(
+                object_type,
+                Name=name,
+                Organization=mo_ref(organization_mo),
+                **attributes,
+            )
+
+        san_connectivity_policy_mo = find_or_add(
+            "vnic.SanConnectivityPolicy", san_connectivity_policy, Profiles=[]
+        )
+        server_profile_template_mo = find_or_add(
+            "server.ProfileTemplate",
+            server_profile_template,
+            PolicyBucket=[mo_ref(san_connectivity_policy_mo)],
+        )
+
+        moids = {
+            organization: organization_mo["Moid"],
+            san_connectivity_policy: san_connectivity_policy_mo["Moid"],
+            server_profile_template: server_profile_template_mo["Moid"],
+        }
+        for wwpn_pool_name, id_blocks in wwpn_pools.items():
+            wwpn_pool_mo = find_or_add(
+                "fcpool.Pool",
+                wwpn_pool_name,
+                PoolPurpose="WWPN",
+                IdBlocks=[
+                    {
+                        "ClassId": "fcpool.Block",
+                        "ObjectType": "fcpool.Block",
+                        "From": first_wwpn,
+                        "Size": size,
+                    }
+                    for first_wwpn, size in id_blocks
+                ],
+            )
+            moids[wwpn_pool_name] = wwpn_pool_mo["Moid"]
+
+        return moids
+
+    ###########################################################################
+    #                               Requests                                  #
+    ###########################################################################
+
+    def handle(self, method, path, body=b""):
+        """Serve a HTTP request, with the configured latency, errors and rate limit.
+
+        Args:
+            - method (string): HTTP method.
+            - path (string): path and query string of the request.
+            - body (bytes): body of the request.
+
+        Returns:
+            - response (tuple): status, body and headers of the response.
+        """
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        url = urlsplit(path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+
+        retry_after = self._take_token()
+        if retry_after is not None:
+            response = (
+                429,
+                {"code": "TooManyRequests", "message": "Rate limit exceeded"},
+                {"Retry-After": f"{retry_after:.3f}"},
+            )
+        elif self.error_rate and self._random.random() < self.error_rate:
+            response = api_error(503, "Injected error")
+        else:
+            try:
+                payload = json.loads(body) if body else None
+            except json.JSONDecodeError as exception:
+                response = api_error(400, f"Invalid JSON body: {exception}")
+            else:
+                response = self.dispatch(method, url.path, query, payload)
+
+        self._count(f"{method} {self._route(url.path)}")
+        self._count(f"HTTP {response[0]}")
+        self._count("requests")
+
+        return response
+
+    def _take_token(self):
+        """Take a token of the server rate limit.
+
+        Returns:
+            - retry_after (float): delay in seconds before a token is available, or None if a token was taken.
+        """
+        if not self.rate_limit:
+            return None
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                max(self.rate_limit, 1.0),
+                self._tokens + (now - self._last_refill) * self.rate_limit,
+            )
+            self._last_refill = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return None
+
+            return (1.0 - self._tokens) / self.rate_limit
+
+    @staticmethod
+    def _route(path):
+        """Get the object type targeted by a path, for the counters."""
+        parts = (
+            path[len(API_PREFIX) :].split("/") if path.startswith(API_PREFIX) else []
+        )
+        if len(parts) < 2:
+            return path
+
+        return object_type_from_collection(parts[0], parts[1])
+
+    def dispatch(self, method, path, query, payload):
+        """Execute a request on the store, without latency, errors nor rate limit.
+
+        Args:
+            - method (string): HTTP method.
+            - path (string): path of the request.
+            - query (dictionary): query parameters of the request.
+            - payload (dictionary): parsed body of the request.
+
+        Returns:
+            - response (tuple): status, body and headers of the response.
+        """
+        if not path.startswith(API_PREFIX):
+            return api_error(404, f"Unknown path {path}")
+
+        parts = path[len(API_PREFIX) :].strip("/").split("/")
+        if len(parts) not in (2, 3):
+            return api_error(404, f"Unknown path {path}")
+
+        object_type = object_type_from_collection(parts[0], parts[1])
+        moid = parts[2] if len(parts) == 3 else None
+
+        with self._lock:
+            self._complete_async_jobs()
+            try:
+                if moid is None and method == "GET":
+                    return self._list(object_type, query)
+                if moid is None and method == "POST":
+                    return self._create(object_type, payload or {})
+                if moid is not None and method == "GET":
+                    return self._read(object_type, moid, query)
+                if moid is not None and method in ("POST", "PATCH"):
+                    return self._update(object_type, moid, payload or {})
+                if moid is not None and method == "DELETE":
+                    return self._delete(object_type, moid)
+
+            except ValueError as exception:
+                return api_error(400, str(exception))
+
+        return api_error(405, f"{method} is not supported on {path}")
+
+    def _list(self, object_type, query):
+        """Serve a list query."""
+        mos = list(self.objects.get(object_type, {}).values())
+
+        if "$filter" in query:
+            conditions = parse_filter(query["$filter"])
+            mos = [mo for mo in mos if matches(mo, conditions)]
+
+        if query.get("$count") == "true":
+            return 200, {"ObjectType": "mo.DocumentCount", "Count": len(mos)}, {}
+
+        for clause in reversed(query.get("$orderby", "").split(",")):
+            if clause.strip():
+                attribute, _, direction = clause.strip().partition(" ")
+                mos.sort(
+                    key=lambda mo: str(get_attribute(mo, attribute) or ""),
+                    reverse=direction.lower() == "desc",
+                )
+
+        count = len(mos)
+        skip = int(query.get("$skip", 0))
+        top = int(query.get("$top", DEFAULT_TOP))
+        mos = mos[skip : skip + top]
+
+        if "$select" in query:
+            mos = [select_attributes(mo, query["$select"]) for mo in mos]
+
+        body = {"ObjectType": f"{object_type}.List", "Results": mos}
+        if query.get("$inlinecount") == "allpages":
+            body["Count"] = count
+
+        return 200, body, {}
+
+    def _read(self, object_type, moid, query):
+        """Serve the read of a resource, with $select."""
+        mo = self.get(object_type, moid)
+        if mo is None:
+            return api_error(404, f"{object_type} {moid} does not exist")
+
+        if "$select" in query:
+            mo = select_attributes(mo, query["$select"])
+
+        return 200, mo, {}
+
+    def _create(self, object_type, payload):
+        """Serve the creation of a resource."""
+        if object_type == "bulk.MoCloner":
+            return self._clone(payload)
+        if object_type == "bulk.MoMerger":
+            return self._merge(payload)
+        if object_type == "bulk.Request":
+            return self._bulk_request(payload)
+
+        attributes = {
+            name: value
+            for name, value in payload.items()
+            if name not in ("ClassId", "ObjectType", "Moid")
+        }
+
+        if object_type == "fcpool.Reservation":
+            self._check_identity(attributes)
+
+        if object_type == "server.Profile":
+            self._check_name(object_type, attributes)
+            attributes.setdefault("ReservationReferences", [])
+
+        return 200, self.add(object_type, **attributes), {}
+
+    def _update(self, object_type, moid, payload):
+        """Serve the update of a resource: the attributes of the body replace the existing ones."""
+        mo = self.get(object_type, moid)
+        if mo is None:
+            return api_error(404, f"{object_type} {moid} does not exist")
+
+        attributes = {
+            name: value
+            for name, value in payload.items()
+            if name not in ("ClassId", "ObjectType", "Moid")
+        }
+
+        if object_type == "server.Profile":
+            for reference in attributes.get("ReservationReferences") or []:
+                if self.get("fcpool.Reservation", reference["ReservationMoid"]) is None:
+                    raise ValueError(
+                        f"fcpool.Reservation {reference['ReservationMoid']} does not exist"
+                    )
+
+        mo.update(attributes)
+
+        return 200, mo, {}
+
+    def _delete(self, object_type, moid):
+        """Serve the deletion of a resource."""
+        mo = self.objects.get(object_type, {}).pop(moid, None)
+        if mo is None:
+            return api_error(404, f"{object_type} {moid} does not exist")
+
+        # Remove the deleted Server Profile from the policies referencing it.
+        if object_type == "server.Profile":
+            for policy in self.objects.get("vnic.SanConnectivityPolicy", {}).values():
+                policy["Profiles"] = [
+                    profile
+                    for profile in policy.get("Profiles") or []
+                    if profile.get("Moid") != moid
+                ]
+
+        return 200, {}, {}
+
+    def _check_identity(self, attributes):
+        """Reject the reservation of an identity already reserved in the same pool."""
+        pool_moid = get_attribute(attributes, "Pool.Moid")
+        identity = (attributes.get("Identity") or "").upper()
+
+        for reservation in self.objects.get("fcpool.Reservation", {}).values():
+            if (
+                get_attribute(reservation, "Pool.Moid") == pool_moid
+                and reservation["Identity"].upper() == identity
+            ):
+                raise ValueError(f"Identity {identity} is already reserved")
+
+    def _check_name(self, object_type, attributes):
+        """Reject a resource whose name is already used in the same Organization."""
+        organization_moid = get_attribute(attributes, "Organization.Moid")
+
+        for mo in self.objects.get(object_type, {}).values():
+            if (
+                mo.get("Name") == attributes.get("Name")
+                and get_attribute(mo, "Organization.Moid") == organization_moid
+            ):
+                raise ValueError(f"{object_type} {mo['Name']} already exists")
+
+    def _attach_policies(self, server_profile, server_profile_template):
+        """Attach a Server Profile to the San Connectivity Policies of a Server Profile Template."""
+        for policy_ref in server_profile_template.get("PolicyBucket") or []:
+            policy = self.get(policy_ref["ObjectType"], policy_ref["Moid"])
+            if policy is None:
+                continue
+
+            profiles = policy.setdefault("Profiles", [])
+            if all(
+                profile.get("Moid") != server_profile["Moid"] for profile in profiles
+            ):
+                profiles.append(mo_ref(server_profile))
+
+    def _run_bulk(self, object_type, verb, work, **attributes):
+        """Run the work of a 'bulk.MoCloner' or 'bulk.MoMerger', now or after the asynchronous delay.
+
+        Args:
+            - object_type (string): 'bulk.MoCloner' or 'bulk.MoMerger'.
+            - verb (string): 'POST' for the creation of the targets, or 'PATCH' for their update.
+            - work (callable): function executing the bulk resource and returning its 'bulk.RestResult' responses.
+            - attributes: attributes of the bulk resource.
+
+        Returns:
+            - response (tuple): status, body and headers of the response.
+        """
+        if not self.async_delay:
+            return 200, self.add(object_type, Responses=work(), **attributes), {}
+
+        bulk_result = self.add(
+            "bulk.Result", Status="ExecutionInProgress", StatusMessage="", Results=[]
+        )
+        self._async_jobs.append(
+            (time.monotonic() + self.async_delay, bulk_result, verb, work)
+        )
+
+        return (
+            200,
+            self.add(
+                object_type,
+                Responses=[],
+                AsyncResult=mo_ref(bulk_result),
+                **attributes,
+            ),
+            {},
+        )
+
+    def _complete_async_jobs(self):
+        """Execute the asynchronous bulk resources whose delay is over, and complete their 'bulk.Result'."""
+        now = time.monotonic()
+        pending_jobs = []
+
+        for job in self._async_jobs:
+            ready_at, bulk_result, verb, work = job
+            if ready_at > now:
+                pending_jobs.append(job)
+                continue
+
+            try:
+                responses = work()
+
+            except ValueError as exception:
+                bulk_result.update(Status="Failed", StatusMessage=str(exception))
+                continue
+
+            # The 'bulk.Result' holds one 'bulk.SubRequestObj' per target, as with $expand.
+            results = [
+                dict(
+                    {
+                        "ClassId": "bulk.SubRequestObj",
+                        "ObjectType": "bulk.SubRequestObj",
+                        "Verb": verb,
+                        "Status": "Completed" if response["Status"] < 400 else "Failed",
+                    },
+                    **(
+                        {"TargetMoid": response["Body"]["Moid"]}
+                        if verb == "PATCH"
+                        else {}
+                    ),
+                    **(
+                        {"BodyString": json.dumps(response["Body"])}
+                        if response["Status"] >= 400
+                        else {}
+                    ),
+                )
+                for response in responses
+            ]
+            bulk_result.update(
+                Status="CompletedWithErrors"
+                if any(result["Status"] == "Failed" for result in results)
+                else "Completed",
+                Results=results,
+            )
+
+        self._async_jobs = pending_jobs
+
+    def _clone(self, payload):
+        """Serve a 'bulk.MoCloner': create each target from the Server Profile Template source."""
+        source = (payload.get("Sources") or [{}])[0]
+        server_profile_template = self.get("server.ProfileTemplate", source.get("Moid"))
+        if server_profile_template is None:
+            raise ValueError(
+                f"server.ProfileTemplate {source.get('Moid')} does not exist"
+            )
+
+        targets = payload.get("Targets") or []
+
+        def clone():
+            # Check all the targets before creating any of them.
+            for target in targets:
+                self._check_name("server.Profile", target)
+
+            responses = []
+            for target in targets:
+                server_profile = self.add(
+                    "server.Profile",
+                    Name=target.get("Name"),
+                    Organization=target.get("Organization"),
+                    SrcTemplate=mo_ref(server_profile_template),
+                    PolicyBucket=list(
+                        server_profile_template.get("PolicyBucket") or []
+                    ),
+                    ReservationReferences=[],
+                )
+                self._attach_policies(server_profile, server_profile_template)
+                responses.append(
+                    {
+                        "ClassId": "bulk.RestResult",
+                        "ObjectType": "bulk.RestResult",
+                        "Status": 200,
+                        "Body": server_profile,
+                    }
+                )
+
+            return responses
+
+        return self._run_bulk("bulk.MoCloner", "POST", clone)
+
+    def _merge(self, payload):
+        """Serve a 'bulk.MoMerger': merge the policies of the Server Profile Template into the targets."""
+        source = (payload.get("Sources") or [{}])[0]
+        server_profile_template = self.get("server.ProfileTemplate", source.get("Moid"))
+        if server_profile_template is None:
+            raise ValueError(
+                f"server.ProfileTemplate {source.get('Moid')} does not exist"
+            )
+
+        targets = payload.get("Targets") or []
+
+        def merge():
+            for target in targets:
+                server_profile = self.get("server.Profile", target.get("Moid"))
+                if server_profile is None:
+                    raise ValueError(
+                        f"server.Profile {target.get('Moid')} does not exist"
+                    )
+
+            responses = []
+            for target in targets:
+                server_profile = self.get("server.Profile", target.get("Moid"))
+                server_profile["PolicyBucket"] = list(
+                    server_profile_template.get("PolicyBucket") or []
+                )
+                self._attach_policies(server_profile, server_profile_template)
+                responses.append(
+                    {
+                        "ClassId": "bulk.RestResult",
+                        "ObjectType": "bulk.RestResult",
+                        "Status": 200,
+                        "Body": server_profile,
+                    }
+                )
+
+            return responses
+
+        return self._run_bulk(
+            "bulk.MoMerger", "PATCH", merge, MergeAction=payload.get("MergeAction")
+        )
+
+    def _bulk_request(self, payload):
+        """Serve a 'bulk.Request': execute each sub-request in order."""
+        results = []
+        for sub_request in payload.get("Requests") or []:
+            verb = sub_request.get("Verb") or payload.get("Verb")
+            uri = sub_request.get("Uri") or payload.get("Uri")
+            if sub_request.get("TargetMoid"):
+                uri = f"{uri}/{sub_request['TargetMoid']}"
+
+            status, body, _ = self.dispatch(
+                verb, "/api" + uri, {}, sub_request.get("Body")
+            )
+            # The errors are not managed objects: they are returned as a string.
+            results.append(
+                {
+                    "ClassId": "bulk.RestResult",
+                    "ObjectType": "bulk.RestResult",
+                    "Status": status,
+                    "Body": body if status < 400 and body else None,
+                    "BodyString": json.dumps(body) if status >= 400 else None,
+                }
+            )
+
+            if status >= 400 and payload.get("ActionOnError") != "Proceed":
+                break
+
+        return (
+            200,
+            self.add(
+                "bulk.Request",
+                Verb=payload.get("Verb"),
+                Uri=payload.get("Uri"),
+                Status="CompletedWithErrors"
+                if any(result["Status"] >= 400 for result in results)
+                else "Completed",
+                Results=results,
+            ),
+            {},
+        )
+
+    ###########################################################################
+    #                            Verification                                 #
+    ###########################################################################
+
+    def count_provisioned(self):
+        """Count the resources created by a provisioning since the seed.
+
+        Returns:
+            - count (integer): number of Server Profiles, WWPN reservations and Server Profiles attached to the San Connectivity Policies.
+        """
+        with self._lock:
+            return (
+                len(self.objects.get("server.Profile", {}))
+                + len(self.objects.get("fcpool.Reservation", {}))
+                + sum(
+                    len(policy.get("Profiles") or [])
+                    for policy in self.objects.get(
+                        "vnic.SanConnectivityPolicy", {}
+                    ).values()
+                )
+            )
+
+    def verify_inventory(self, inventory_config):
+        """Check that the Server Profiles of an inventory, or of each of its groups, are fully provisioned.
+
+        Args:
+            - inventory_config (dictionary): content of the inventory_config JSON file.
+
+        Returns:
+            - problems (list of strings): description of each difference with the expected end state.
+        """
+        problems = []
+        for group in inventory_config.get("groups") or [inventory_config]:
+            problems.extend(
+                self.verify_group(
+                    {
+                        parameter: group.get(parameter, inventory_config.get(parameter))
+                        for parameter in (
+                            "organization",
+                            "server_profile_template",
+                            "san_connectivity_policy",
+                            "server_profiles",
+                        )
+                    }
+                )
+            )
+
+        return problems
+
+    def verify_group(self, inventory_config):
+        """Check that the Server Profiles of a group of an inventory are fully provisioned.
+
+        Args:
+            - inventory_config (dictionary): Organization, Server Profile Template, San Connectivity Policy and Server Profiles of the group.
+
+        Returns:
+            - problems (list of strings): description of each difference with the expected end state.
+        """
+        problems = []
+
+        with self._lock:
+            organization = self.find(
+                "organization.Organization", Name=inventory_config["organization"]
+            )[0]
+
+            def in_organization(object_type, name):
+                return [
+                    mo
+                    for mo in self.find(object_type, Name=name)
+                    if get_attribute(mo, "Organization.Moid") == organization["Moid"]
+                ][0]
+
+            server_profile_template = in_organization(
+                "server.ProfileTemplate", inventory_config["server_profile_template"]
+            )
+            san_connectivity_policy = in_organization(
+                "vnic.SanConnectivityPolicy",
+                inventory_config["san_connectivity_policy"],
+            )
+            attached_server_profile_moids = {
+                profile.get("Moid")
+                for profile in san_connectivity_policy.get("Profiles") or []
+            }
+
+            for server_profile in inventory_config["server_profiles"]:
+                server_profile_name = server_profile["server_profile_name"]
+                server_profile_mos = [
+                    mo
+                    for mo in self.find("server.Profile", Name=server_profile_name)
+                    if get_attribute(mo, "Organization.Moid") == organization["Moid"]
+                ]
+                if len(server_profile_mos) != 1:
+                    problems.append(
+                        f"{server_profile_name}: {len(server_profile_mos)} Server Profiles"
+                    )
+                    continue
+                server_profile_mo = server_profile_mos[0]
+
+                if (
+                    get_attribute(server_profile_mo, "SrcTemplate.Moid")
+                    != server_profile_template["Moid"]
+                ):
+                    problems.append(
+                        f"{server_profile_name}: not attached to the Server Profile Template"
+                    )
+
+                if server_profile_mo["Moid"] not in attached_server_profile_moids:
+                    problems.append(
+                        f"{server_profile_name}: not attached to the San Connectivity Policy"
+                    )
+
+                wwpns = {}
+                for reference in server_profile_mo.get("ReservationReferences") or []:
+                    reservation = self.get(
+                        "fcpool.Reservation", reference.get("ReservationMoid")
+                    )
+                    if reservation is not None:
+                        wwpns[reference.get("ConsumerName")] = (
+                            reservation["Identity"].upper(),
+                            self.get(
+                                "fcpool.Pool", get_attribute(reservation, "Pool.Moid")
+                            )["Name"],
+                        )
+
+                for reservation in server_profile["reservations"]:
+                    expected = (
+                        reservation["wwpn_to_reserve"].upper(),
+                        reservation["wwpn_pool"],
+                    )
+                    if wwpns.get(reservation["vhba_name"]) != expected:
+                        problems.append(
+                            f"{server_profile_name}/{reservation['vhba_name']}: reserved {wwpns.get(reservation['vhba_name'])}, expected {expected}"
+                        )
+
+        return problems
+
+
+###############################################################################
+#                                HTTP Server                                  #
+###############################################################################
+
+
+class MockIntersightRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler serving the requests with the MockIntersight of the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    # The headers and the body are written separately: avoid the delayed ACK of Nagle.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        """Count the connections opened by the clients."""
+        super().setup()
+        self.server.mock._count("connections")  # pylint: disable=protected-access
+
+    def _handle(self):
+        """Serve a request of any method."""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        status, payload, headers = self.server.mock.handle(
+            self.command, self.path, body
+        )
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Do not log each request."""
+
+
+def start_mock_server(mock, host="127.0.0.1", port=0):
+    """Serve a MockIntersight on a background thread.
+
+    Args:
+        - mock (MockIntersight object): mock serving the requests.
+        - host (string): address to listen on.
+        - port (integer): port to listen on, or 0 for any free port.
+
+    Returns:
+        - server (ThreadingHTTPServer object): running server, with its URL in 'url'. Stop it with shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), MockIntersightRequestHandler)
+    server.daemon_threads = True
+    server.mock = mock
+    server.url = f"http://{host}:{server.server_port}"
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a mock of the Intersight API seeded with the resources of an inventory."
+    )
+    parser.add_argument("--inventory", default="inventory_config.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--async-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with open(args.inventory, "r", encoding="utf-8") as json_file:
+        inventory_config = json.load(json_file)
+
+    mock_intersight = MockIntersight(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        async_delay=args.async_delay_ms / 1000,
+    )
+    for group in inventory_config.get("groups") or [inventory_config]:
+        mock_intersight.seed(
+            organization=group.get(
+                "organization", inventory_config.get("organization")
+            ),
+            server_profile_template=group.get(
+                "server_profile_template",
+                inventory_config.get("server_profile_template"),
+            ),
+            san_connectivity_policy=group.get(
+                "san_connectivity_policy",
+                inventory_config.get("san_connectivity_policy"),
+            ),
+            wwpn_pools={
+                reservation["wwpn_pool"]: []
+                for server_profile in group["server_profiles"]
+                for reservation in server_profile["reservations"]
+            },
+        )
+
+    mock_server = start_mock_server(mock_intersight, host=args.host, port=args.port)
+    print(f"- Mock Intersight listening on {mock_server.url}.")
+    try:
+        while True:
+            time.sleep(3600)
+
+    except KeyboardInterrupt:
+        mock_server.shutdown()
+        print(json.dumps(mock_intersight.stats(), indent=2, sort_keys=True))
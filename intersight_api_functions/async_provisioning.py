@@ -0,0 +1,152 @@
+"""Module providing an asyncio engine provisioning the Server Profiles cloned from a Server Profile Template."""
+#!/usr/bin/env python3
+
+import asyncio
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from intersight_api_functions import provisioning
+
+
+# Default maximum number of Intersight API operations in flight at the same time.
+DEFAULT_MAX_IN_FLIGHT = 32
+
+
+class StepExit(Exception):
+    """SystemExit raised by a step, carried through the event loop as a regular exception."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+###############################################################################
+#                       Async Provisioning Engine                             #
+###############################################################################
+
+
+class AsyncProvisioningEngine(provisioning.ProvisioningPipeline):
+    """asyncio engine running each operation of an Execution Plan as a task.
+
+    The Intersight SDK is synchronous (urllib3), so each step of the
+    ProvisioningPipeline is awaited on an executor whose size matches the
+    semaphore limiting the steps in flight: the number of threads is bounded by
+    `max_in_flight`, not by the number of Server Profiles or requests.
+
+    The steps, their dependencies and the journal are the ones of the
+    ProvisioningPipeline, so the end state is the same as with the threads engine.
+    """
+
+    def __init__(
+        self,
+        api_client,
+        organization_moid,
+        san_connectivity_policy_moid,
+        server_profile_template_moid,
+        wwpn_pool_moids,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        coalesce_policy_updates=False,
+        bulk_reservations=False,
+        bulk_profile_updates=False,
+        journal=None,
+    ):
+        """Create an Async Provisioning Engine.
+
+        Args:
+            - api_client (Intersight ApiClient object): ApiClient object shared by all the tasks.
+            - organization_moid (string): moid of the Organization.
+            - san_connectivity_policy_moid (string): moid of the San Connectivity Policy.
+            - server_profile_template_moid (string): moid of the Server Profile Template.
+            - wwpn_pool_moids (dictionary): moid of each WWPN Pool, indexed by WWPN Pool name.
+            - max_in_flight (integer): maximum number of Intersight API operations in flight.
+            - coalesce_policy_updates (boolean): update the San Connectivity Policy once for all the Server Profiles.
+            - bulk_reservations (boolean): create the WWPN reservations of all the Server Profiles with 'bulk.Request' resources.
+            - bulk_profile_updates (boolean): update all the Server Profiles with 'bulk.Request' resources, and attach them to the Server Profile Template with one 'bulk.MoMerger' per chunk.
+            - journal (CheckpointJournal object): journal recording the completed steps, which are skipped.
+        """
+        super().__init__(
+            api_client=api_client,
+            organization_moid=organization_moid,
+            san_connectivity_policy_moid=san_connectivity_policy_moid,
+            server_profile_template_moid=server_profile_template_moid,
+            wwpn_pool_moids=wwpn_pool_moids,
+            workers=max_in_flight,
+            coalesce_policy_updates=coalesce_policy_updates,
+            bulk_reservations=bulk_reservations,
+            bulk_profile_updates=bulk_profile_updates,
+            journal=journal,
+        )
+        self.max_in_flight = max_in_flight
+
+    async def _call(self, function, *args):
+        """Await a step of the pipeline once a slot is available.
+
+        Args:
+            - function (callable): step of the pipeline.
+            - args: arguments of the step.
+
+        Returns:
+            - the result of the step.
+        """
+        async with self._semaphore:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, functools.partial(function, *args)
+                )
+
+            # The functions of intersight_api_methods call sys.exit() on failure, which
+            # would tear down the event loop without cancelling the other tasks.
+            except SystemExit as exception:
+                raise StepExit(exception.code) from None
+
+    async def _execute(self, plan):
+        """Run each operation of an Execution Plan as a task awaiting its dependencies.
+
+        Args:
+            - plan (ExecutionPlan object): plan whose operations call the steps of the pipeline.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        resource_locks = {resource: asyncio.Lock() for resource in plan.resources()}
+        tasks = {}
+
+        async def run_operation(operation):
+            await asyncio.gather(
+                *(tasks[dependency] for dependency in operation.dependencies)
+            )
+            if operation.resource is None:
+                return await self._call(operation.action)
+
+            # The operations updating the same object are serialized.
+            async with resource_locks[operation.resource]:
+                return await self._call(operation.action)
+
+        # The operations are added after their dependencies.
+        for key, operation in plan.operations.items():
+            tasks[key] = asyncio.ensure_future(run_operation(operation))
+
+        await asyncio.gather(*tasks.values())
+
+    def execute(self, plan):
+        """Run the operations of an Execution Plan on an asyncio event loop, as soon as their dependencies are completed.
+
+        Args:
+            - plan (ExecutionPlan object): plan whose operations call the steps of the pipeline.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        try:
+            asyncio.run(self._execute(plan))
+
+        except StepExit as exception:
+            sys.exit(exception.code)
+
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,200 @@
+"""Module providing a journal of the completed provisioning steps, to resume interrupted runs."""
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import time
+
+
+###############################################################################
+#                             Checkpoint Journal                              #
+###############################################################################
+
+
+class CheckpointJournal:
+    """Append-only journal of the completed steps of each Server Profile.
+
+    Each completed step is appended to the journal file as a JSON line with the
+    moids it produced, and flushed to disk before the next step starts. When the
+    journal file already exists, it is replayed so that the completed steps are
+    skipped. Without a path, the journal only lives in memory.
+
+    The steps of a Server Profile are: 'cloned', 'detached', 'policy_detached',
+    'reserved:<vhba_name>' for each vHBA, 'associated', 'policy_attached' and
+    'attached'.
+
+    Each step is recorded with the id of its run, so that the rollback of a run
+    cancels the steps it completed, which are replayed as not completed.
+    """
+
+    def __init__(self, path=None, run_id=None):
+        """Create a Checkpoint Journal and replay the existing journal file, if any.
+
+        Args:
+            - path (string): path of the journal file, or None to keep the journal in memory.
+            - run_id (string): id of the run recording the steps, or None.
+        """
+        self.path = path
+        self.run_id = run_id
+        self._steps = {}
+        self._step_run_ids = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+        if self.path:
+            if os.path.exists(self.path):
+                self._replay()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def _replay(self):
+        """Load the completed steps of the journal file."""
+        with open(self.path, "r", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+
+                # A run killed while writing leaves a truncated last line.
+                except json.JSONDecodeError:
+                    continue
+
+                # The steps completed by a run rolled back since are not completed.
+                if "rolled_back_run_id" in entry:
+                    self._cancel(entry["rolled_back_run_id"])
+                    continue
+
+                key = (entry["server_profile_name"], entry["step"])
+                self._steps[key] = entry["data"]
+                self._step_run_ids[key] = entry.get("run_id")
+
+        print(
+            f"- Resuming from journal {self.path}: {len(self._steps)} completed steps."
+        )
+
+    def is_done(self, server_profile_name, step):
+        """Check whether a step of a Server Profile is completed.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - step (string): name of the step.
+
+        Returns:
+            - done (boolean): True if the step is completed.
+        """
+        with self._lock:
+            return (server_profile_name, step) in self._steps
+
+    def data(self, server_profile_name, step):
+        """Get the data recorded with a completed step of a Server Profile.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - step (string): name of the step.
+
+        Returns:
+            - data (dictionary): data recorded with the step, or None if the step is not completed.
+        """
+        with self._lock:
+            return self._steps.get((server_profile_name, step))
+
+    def record(self, server_profile_name, step, **data):
+        """Record a completed step of a Server Profile.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - step (string): name of the step.
+            - data: moids produced by the step.
+        """
+        entry = {
+            "time": time.time(),
+            "server_profile_name": server_profile_name,
+            "step": step,
+            "data": data,
+        }
+        if self.run_id is not None:
+            entry["run_id"] = self.run_id
+
+        with self._lock:
+            self._steps[(server_profile_name, step)] = data
+            self._step_run_ids[(server_profile_name, step)] = self.run_id
+            if self._file is not None:
+                self._file.write(json.dumps(entry) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def _cancel(self, run_id):
+        """Forget the steps completed by a run.
+
+        Args:
+            - run_id (string): id of the run.
+        """
+        for key, step_run_id in list(self._step_run_ids.items()):
+            if step_run_id == run_id:
+                del self._steps[key]
+                del self._step_run_ids[key]
+
+    def restore_reservations(self, server_profile_name, reservations):
+        """Set the 'reservation_moid' of the reservations already created by a previous run.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - reservations (list of dictionnaries): reservations of the Server Profile.
+        """
+        for reservation in reservations:
+            data = self.data(
+                server_profile_name, f"reserved:{reservation['vhba_name']}"
+            )
+            if data is not None:
+                reservation["reservation_moid"] = data["reservation_moid"]
+
+    def record_reservation(self, server_profile_name, reservation):
+        """Record a created reservation of a Server Profile.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - reservation (dictionnary): reservation holding its 'reservation_moid'.
+        """
+        self.record(
+            server_profile_name,
+            f"reserved:{reservation['vhba_name']}",
+            wwpn=reservation["wwpn_to_reserve"],
+            reservation_moid=reservation["reservation_moid"],
+        )
+
+    def close(self):
+        """Close the journal file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def cancel_run(path, run_id):
+    """Cancel the steps completed by a run in a journal file, once the run is rolled back.
+
+    Args:
+        - path (string): path of the journal file.
+        - run_id (string): id of the rolled back run.
+
+    Returns:
+        - cancelled (boolean): False if the journal file does not exist.
+    """
+    if not os.path.exists(path):
+        return False
+
+    with open(path, "a", encoding="utf-8") as journal_file:
+        journal_file.write(
+            json.dumps({"time": time.time(), "rolled_back_run_id": run_id}) + "\n"
+        )
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+    return True
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
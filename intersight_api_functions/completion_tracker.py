@@ -0,0 +1,375 @@
+"""Module providing a tracker waiting for the completion of the asynchronous Intersight operations."""
+#!/usr/bin/env python3
+
+import concurrent.futures
+import threading
+import time
+
+from intersight.api import bulk_api
+
+from intersight_api_functions import intersight_session, tracing
+
+
+# Default delay in seconds between two polls, and maximum delay after the backoff.
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_MAX_POLL_INTERVAL = 8.0
+
+# Factor applied to the poll interval after each poll completing nothing.
+POLL_BACKOFF_FACTOR = 2
+
+# Default time in seconds after which a tracked operation is considered failed.
+DEFAULT_TIMEOUT = 600.0
+
+# Maximum number of moids in the 'in' filter of a single poll.
+MAX_MOIDS_PER_POLL = 100
+
+# Resources tracked until completion: list query reading them and terminal statuses.
+TRACKED_TYPES = {
+    "bulk.Result": {
+        "api_class": bulk_api.BulkApi,
+        "list_method": "get_bulk_result_list",
+        "status": ("Status", "status"),
+        "terminal_statuses": ("Completed", "CompletedWithErrors", "Failed", "TimedOut"),
+        "select": "Status,StatusMessage,Results",
+        "expand": "Results($select=Status,TargetMoid,BodyString)",
+    },
+}
+
+# Lock installing the default tracker of the ApiClients without one.
+_default_tracker_lock = threading.Lock()
+
+
+###############################################################################
+#                               Status Queries                                #
+###############################################################################
+
+
+@tracing.traced
+def get_completion_statuses(api_client, object_type, moids):
+    """Read the status of several tracked resources with one filtered list query per chunk of moids.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - object_type (string): type of the tracked resources, e.g. 'bulk.Result'.
+        - moids (list of strings): moids of the tracked resources.
+
+    Returns:
+        - mos (dictionary): resources found (SDK model objects, or dictionaries with raw responses), indexed by moid.
+    """
+    tracked_type = TRACKED_TYPES[object_type]
+    api_instance = intersight_session.get_api(api_client, tracked_type["api_class"])
+    list_method = getattr(api_instance, tracked_type["list_method"])
+
+    mos = {}
+
+    for start in range(0, len(moids), MAX_MOIDS_PER_POLL):
+        chunk = moids[start : start + MAX_MOIDS_PER_POLL]
+        quoted_moids = ", ".join(f"'{moid}'" for moid in chunk)
+
+        # Create filter and only select the status of the resources.
+        kwargs = dict(
+            filter=f"Moid in ({quoted_moids})",
+            select=tracked_type["select"],
+            top=len(chunk),
+        )
+        if tracked_type["expand"]:
+            kwargs["expand"] = tracked_type["expand"]
+
+        result = intersight_session.call_endpoint(api_client, list_method, **kwargs)
+        results = result.get("Results") if isinstance(result, dict) else result.results
+
+        for mo in results or []:
+            mos[intersight_session.moid_of(mo)] = mo
+
+    return mos
+
+
+def get_status(object_type, mo):
+    """Get the status of a tracked resource.
+
+    Args:
+        - object_type (string): type of the tracked resource, e.g. 'bulk.Result'.
+        - mo (SDK model object or dictionary): tracked resource.
+
+    Returns:
+        - status (string): status of the resource, or None if it was not selected.
+    """
+    api_name, sdk_name = TRACKED_TYPES[object_type]["status"]
+
+    return mo.get(api_name) if isinstance(mo, dict) else mo.get(sdk_name)
+
+
+###############################################################################
+#                             Completion Tracker                              #
+###############################################################################
+
+
+class CompletionTracker:
+    """Tracker waiting for the 'bulk.Result' of the asynchronous operations.
+
+    - Every operation tracked by any worker is polled by a single poller thread,
+      with one filtered list query per type of resource and per poll, instead of
+      one read per operation and per worker.
+    - The poll interval starts at `poll_interval` and is multiplied by two after
+      each poll completing nothing, up to `max_poll_interval`. It is reset as soon
+      as an operation completes or a new one is tracked.
+    - Each operation resolves its own future once it reaches a terminal status, so
+      the steps depending on it are released as soon as it is complete, without
+      waiting for the others.
+    """
+
+    def __init__(
+        self,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        max_poll_interval=DEFAULT_MAX_POLL_INTERVAL,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        """Create a Completion Tracker.
+
+        Args:
+            - poll_interval (float): delay in seconds before the first poll and after a poll completing an operation.
+            - max_poll_interval (float): maximum delay in seconds between two polls.
+            - timeout (float): time in seconds after which a tracked operation fails with a TimeoutError.
+        """
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+        self.timeout = timeout
+
+        self.counters = {
+            "tracked": 0,
+            "polls": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+        }
+
+        self._api_client = None
+        self._pending = {}
+        self._poller = None
+        self._condition = threading.Condition()
+
+    def install(self, api_client):
+        """Track the asynchronous operations started through an ApiClient.
+
+        Args:
+            - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+
+        Returns:
+            - api_client (Intersight ApiClient object): the same ApiClient object.
+        """
+        self._api_client = api_client
+        api_client.completion_tracker = self
+
+        return api_client
+
+    def track(self, object_type, moid):
+        """Track an asynchronous operation until its completion.
+
+        Args:
+            - object_type (string): type of the resource tracking the operation, one of TRACKED_TYPES, e.g. 'bulk.Result'.
+            - moid (string): moid of the resource.
+
+        Returns:
+            - future (concurrent.futures.Future object): future resolved with the completed resource, or failed with a TimeoutError or the error of the polls.
+        """
+        if object_type not in TRACKED_TYPES:
+            raise ValueError(f"Cannot track the completion of {object_type}.")
+
+        with self._condition:
+            entry = self._pending.get((object_type, moid))
+            if entry is not None:
+                return entry[0]
+
+            future = concurrent.futures.Future()
+            self._pending[(object_type, moid)] = (
+                future,
+                time.monotonic() + self.timeout,
+            )
+            self.counters["tracked"] += 1
+
+            # The poller stops when nothing is tracked, and starts again on demand.
+            if self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._run, name="completion-tracker", daemon=True
+                )
+                self._poller.start()
+            self._condition.notify()
+
+            return future
+
+    def wait(self, object_type, moids):
+        """Wait for the completion of several asynchronous operations.
+
+        Args:
+            - object_type (string): type of the resources tracking the operations, one of TRACKED_TYPES, e.g. 'bulk.Result'.
+            - moids (list of strings): moids of the resources.
+
+        Returns:
+            - mos (dictionary): completed resources (SDK model objects, or dictionaries with raw responses), indexed by moid.
+
+        Raises:
+            - TimeoutError: an operation did not complete within the timeout of the tracker and the longest poll interval.
+        """
+        futures = {moid: self.track(object_type, moid) for moid in moids}
+
+        # The poller fails the operations past their deadline: this one only guards against a poller that is gone.
+        deadline = time.monotonic() + self.timeout + self.max_poll_interval
+        mos = {}
+        for moid, future in futures.items():
+            try:
+                mos[moid] = future.result(timeout=max(deadline - time.monotonic(), 0))
+
+            except concurrent.futures.TimeoutError:
+                raise TimeoutError(
+                    f"{object_type} {moid} did not complete within {self.timeout}s"
+                ) from None
+
+        return mos
+
+    def summary(self):
+        """Get the counters of the tracker.
+
+        Returns:
+            - counters (dictionary): counters of the tracker and the number of operations still pending.
+        """
+        with self._condition:
+            return dict(self.counters, pending=len(self._pending))
+
+    def print_summary(self):
+        """Print the counters of the tracker, if it tracked anything."""
+        summary = self.summary()
+        if not summary["tracked"]:
+            return
+
+        print("\nAsynchronous operations:")
+        for counter, value in summary.items():
+            print(f"- {counter}: {value}")
+
+    def _run(self):
+        """Poll the tracked operations until none of them is pending.
+
+        An unexpected error stops the poller and fails all the pending operations
+        with it, so that no waiter is left waiting for a poller that is gone.
+        """
+        try:
+            self._poll()
+
+        except Exception as exception:
+            with self._condition:
+                pending = list(self._pending.items())
+                self._pending.clear()
+                self._poller = None
+                self.counters["failed"] += len(pending)
+
+            for _, (future, _) in pending:
+                future.set_exception(exception)
+
+    def _poll(self):
+        """Poll the tracked operations until none of them is pending."""
+        interval = self.poll_interval
+
+        while True:
+            with self._condition:
+                wake_up_at = time.monotonic() + interval
+                while True:
+                    remaining = wake_up_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    if self._condition.wait(remaining):
+                        # Newly tracked operations are polled after the minimum interval.
+                        interval = self.poll_interval
+                        wake_up_at = min(wake_up_at, time.monotonic() + interval)
+
+                moids_by_type = {}
+                for object_type, moid in self._pending:
+                    moids_by_type.setdefault(object_type, []).append(moid)
+
+            completed = 0
+            for object_type, moids in moids_by_type.items():
+                with self._condition:
+                    self.counters["polls"] += 1
+
+                try:
+                    mos = get_completion_statuses(self._api_client, object_type, moids)
+
+                except Exception as exception:
+                    for moid in moids:
+                        self._resolve(object_type, moid, exception=exception)
+                    continue
+
+                for moid, mo in mos.items():
+                    if (
+                        get_status(object_type, mo)
+                        in TRACKED_TYPES[object_type]["terminal_statuses"]
+                    ):
+                        self._resolve(object_type, moid, mo=mo)
+                        completed += 1
+
+            with self._condition:
+                now = time.monotonic()
+                for (object_type, moid), (future, deadline) in list(
+                    self._pending.items()
+                ):
+                    if now >= deadline:
+                        del self._pending[(object_type, moid)]
+                        self.counters["timed_out"] += 1
+                        future.set_exception(
+                            TimeoutError(
+                                f"{object_type} {moid} did not complete within {self.timeout}s"
+                            )
+                        )
+
+                if not self._pending:
+                    self._poller = None
+                    return
+
+            interval = (
+                self.poll_interval
+                if completed
+                else min(interval * POLL_BACKOFF_FACTOR, self.max_poll_interval)
+            )
+
+    def _resolve(self, object_type, moid, mo=None, exception=None):
+        """Stop tracking an operation and resolve its future with the completed resource or an exception."""
+        with self._condition:
+            entry = self._pending.pop((object_type, moid), None)
+            if entry is None:
+                return
+
+            self.counters["failed" if exception is not None else "completed"] += 1
+
+        if exception is not None:
+            entry[0].set_exception(exception)
+        else:
+            entry[0].set_result(mo)
+
+
+###############################################################################
+#                              Default Tracker                                #
+###############################################################################
+
+
+def get_tracker(api_client):
+    """Get the tracker of an ApiClient, installing a default one if none is installed.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+
+    Returns:
+        - tracker (CompletionTracker object): tracker of the ApiClient.
+    """
+    with _default_tracker_lock:
+        tracker = getattr(api_client, "completion_tracker", None)
+        if tracker is None:
+            tracker = CompletionTracker()
+            tracker.install(api_client)
+
+        return tracker
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
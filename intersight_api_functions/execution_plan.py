@@ -0,0 +1,1278 @@
+"""Module providing the plan of the Intersight API operations of an inventory as a DAG, and its executor."""
+#!/usr/bin/env python3
+
+import functools
+import heapq
+import json
+import math
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from prettytable import PrettyTable
+
+from intersight_api_functions import intersight_api_methods, reconcile, rollback_log
+
+
+# Kinds of operations, in the order of the provisioning of a Server Profile.
+OPERATION_KINDS = [
+    "lookup",
+    "reconcile",
+    "clone",
+    "detach",
+    "policy_detach",
+    "reservation",
+    "association",
+    "policy_attach",
+    "attach",
+]
+
+
+###############################################################################
+#                               Execution Plan                                #
+###############################################################################
+
+
+class Operation:
+    """Node of an Execution Plan: an Intersight API operation and the operations it depends on."""
+
+    def __init__(
+        self, key, kind, description, action, api_calls, dependencies, resource
+    ):
+        """Create an Operation.
+
+        Args:
+            - key (tuple): unique key of the operation in the plan.
+            - kind (string): kind of the operation, one of OPERATION_KINDS.
+            - description (string): description of the operation.
+            - action (callable): function without arguments running the operation.
+            - api_calls (integer): minimum number of Intersight API calls of the operation.
+            - dependencies (list of tuples): keys of the operations to complete before this one.
+            - resource (tuple): Intersight object updated by the operation, whose updates are serialized, or None.
+        """
+        self.key = key
+        self.kind = kind
+        self.description = description
+        self.action = action
+        self.api_calls = api_calls
+        self.dependencies = dependencies
+        self.resource = resource
+
+
+class ExecutionPlan:
+    """DAG of the Intersight API operations of a run, built before any API call.
+
+    - The operations are keyed, so that an operation shared by several Server
+      Profiles, such as a lookup, is only planned and run once.
+    - An operation is added after its dependencies, so the order of insertion is
+      a topological order.
+    - The operations updating the same Intersight object (the shared San
+      Connectivity Policy) declare it as their resource and never run at the same
+      time. Every other operation runs as soon as its dependencies are completed.
+    """
+
+    def __init__(self):
+        """Create an empty Execution Plan."""
+        self.operations = {}
+        self.shared_operations = 0
+
+    def add(
+        self,
+        key,
+        kind,
+        description,
+        action,
+        api_calls=1,
+        dependencies=(),
+        resource=None,
+    ):
+        """Add an operation to the plan, unless an operation with the same key is already planned.
+
+        Args:
+            - key (tuple): unique key of the operation in the plan.
+            - kind (string): kind of the operation, one of OPERATION_KINDS.
+            - description (string): description of the operation.
+            - action (callable): function without arguments running the operation.
+            - api_calls (integer): minimum number of Intersight API calls of the operation.
+            - dependencies (list of tuples): keys of the operations to complete before this one.
+            - resource (tuple): Intersight object updated by the operation, whose updates are serialized, or None.
+
+        Returns:
+            - key (tuple): key of the operation.
+        """
+        if key in self.operations:
+            self.shared_operations += 1
+            return key
+
+        dependencies = list(dict.fromkeys(dependencies))
+        for dependency in dependencies:
+            if dependency not in self.operations:
+                raise ValueError(f"Unknown dependency {dependency} of {key}.")
+
+        self.operations[key] = Operation(
+            key=key,
+            kind=kind,
+            description=description,
+            action=action,
+            api_calls=api_calls,
+            dependencies=dependencies,
+            resource=resource,
+        )
+
+        return key
+
+    def resources(self):
+        """Get the Intersight objects whose updates are serialized.
+
+        Returns:
+            - resources (list of tuples): resources of the operations.
+        """
+        return list(
+            dict.fromkeys(
+                operation.resource
+                for operation in self.operations.values()
+                if operation.resource is not None
+            )
+        )
+
+    def dependents(self):
+        """Get the operations depending on each operation.
+
+        Returns:
+            - dependents (dictionary): keys of the dependent operations, indexed by operation key.
+        """
+        dependents = {key: [] for key in self.operations}
+        for key, operation in self.operations.items():
+            for dependency in operation.dependencies:
+                dependents[dependency].append(key)
+
+        return dependents
+
+    def remaining_path_lengths(self):
+        """Get the number of API round trips of the longest path from each operation to the end of the plan.
+
+        Returns:
+            - lengths (dictionary): API round trips, indexed by operation key.
+        """
+        dependents = self.dependents()
+        lengths = {}
+        for key in reversed(self.operations):
+            lengths[key] = self.operations[key].api_calls + max(
+                (lengths[dependent] for dependent in dependents[key]), default=0
+            )
+
+        return lengths
+
+    def critical_path(self):
+        """Get the longest chain of dependent operations, in API round trips.
+
+        Returns:
+            - length (integer): number of API round trips of the critical path.
+            - path (list of tuples): keys of the operations of the critical path.
+        """
+        lengths = {}
+        predecessors = {}
+        for key, operation in self.operations.items():
+            predecessor = (
+                max(operation.dependencies, key=lambda dependency: lengths[dependency])
+                if operation.dependencies
+                else None
+            )
+            predecessors[key] = predecessor
+            lengths[key] = operation.api_calls + (
+                lengths[predecessor] if predecessor is not None else 0
+            )
+
+        if not lengths:
+            return 0, []
+
+        key = max(lengths, key=lengths.get)
+        length = lengths[key]
+        path = []
+        while key is not None:
+            path.append(key)
+            key = predecessors[key]
+
+        return length, path[::-1]
+
+    def summary(self):
+        """Get the size of the plan.
+
+        Returns:
+            - summary (dictionary): number of operations, of API calls and of shared operations planned once,
+              API round trips of the critical path and API round trips serialized on each resource.
+        """
+        serialized = {}
+        for operation in self.operations.values():
+            if operation.resource is not None:
+                serialized[operation.resource] = (
+                    serialized.get(operation.resource, 0) + operation.api_calls
+                )
+
+        return {
+            "operations": len(self.operations),
+            "api_calls": sum(
+                operation.api_calls for operation in self.operations.values()
+            ),
+            "shared_operations": self.shared_operations,
+            "critical_path": self.critical_path()[0],
+            "serialized": serialized,
+        }
+
+    def print_summary(self):
+        """Print the size of the plan on a single line."""
+        summary = self.summary()
+        print(
+            f"- Planned {summary['operations']} operations: at least {summary['api_calls']} API calls, {summary['critical_path']} on the critical path."
+        )
+
+    def export(self, plan_file, **fields):
+        """Write the plan as JSON lines: a line with its summary, then a line per operation in topological order.
+
+        Args:
+            - plan_file (file object): text file to write to.
+            - fields: other fields of the summary line, e.g. the Server Profiles of the plan.
+        """
+        summary = self.summary()
+        summary["serialized"] = [
+            {"resource": resource, "api_calls": api_calls}
+            for resource, api_calls in summary["serialized"].items()
+        ]
+        plan_file.write(json.dumps(dict(summary, type="plan", **fields)) + "\n")
+
+        for operation in self.operations.values():
+            plan_file.write(
+                json.dumps(
+                    {
+                        "type": "operation",
+                        "key": operation.key,
+                        "kind": operation.kind,
+                        "description": operation.description,
+                        "api_calls": operation.api_calls,
+                        "dependencies": operation.dependencies,
+                        "resource": operation.resource,
+                    }
+                )
+                + "\n"
+            )
+
+    def print_plan(self, workers=1):
+        """Print the operations of the plan by kind, its minimum number of API calls and its critical path.
+
+        Args:
+            - workers (integer): number of operations run concurrently.
+        """
+        summary = self.summary()
+
+        table_operations = PrettyTable()
+        table_operations.field_names = ["Operation", "Count", "API calls"]
+        for kind in OPERATION_KINDS:
+            operations = [
+                operation
+                for operation in self.operations.values()
+                if operation.kind == kind
+            ]
+            if operations:
+                table_operations.add_row(
+                    [
+                        kind,
+                        len(operations),
+                        sum(operation.api_calls for operation in operations),
+                    ]
+                )
+
+        print("\nExecution plan:\n")
+        print(table_operations)
+        print(
+            f"\n- {summary['operations']} operations, {summary['shared_operations']} references to shared operations merged."
+        )
+        print(
+            f"- Minimum API calls: {summary['api_calls']} (without the retries nor the polls of the asynchronous operations)."
+        )
+
+        length, path = self.critical_path()
+        print(f"- Critical path: {length} API round trips.")
+        for key in path:
+            operation = self.operations[key]
+            if operation.api_calls:
+                print(f"    - {operation.description} ({operation.api_calls}).")
+
+        for (object_type, organization, name), api_calls in summary[
+            "serialized"
+        ].items():
+            print(
+                f"- Serialized updates of {object_type} '{name}' of Organization '{organization}': {api_calls} API round trips."
+            )
+
+        # The run lasts at least the critical path, the serialized updates and the API calls shared by the workers.
+        lower_bound = max(
+            [length, math.ceil(summary["api_calls"] / max(workers, 1))]
+            + list(summary["serialized"].values())
+        )
+        print(
+            f"- Lower bound with {workers} concurrent operations: {lower_bound} API round trips."
+        )
+
+    def execute(self, workers=1):
+        """Run the operations on a pool of threads, as soon as their dependencies are completed.
+
+        Among the operations ready to run, the ones with the longest remaining path
+        run first. The first exception raised by an operation (including the
+        SystemExit raised by the functions of intersight_api_methods) cancels the
+        pending operations and is re-raised.
+
+        Args:
+            - workers (integer): maximum number of operations running concurrently.
+
+        Returns:
+            - results (dictionary): result of each operation, indexed by operation key.
+        """
+        workers = max(workers, 1)
+        dependents = self.dependents()
+        priorities = self.remaining_path_lengths()
+        order = {key: index for index, key in enumerate(self.operations)}
+        waiting = {
+            key: len(operation.dependencies)
+            for key, operation in self.operations.items()
+        }
+
+        ready = [
+            (-priorities[key], order[key], key) for key in waiting if not waiting[key]
+        ]
+        heapq.heapify(ready)
+        busy_resources = set()
+        running = {}
+        results = {}
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            while ready or running:
+                # Start the ready operations whose resource is free, by priority.
+                blocked = []
+                while ready and len(running) < workers:
+                    entry = heapq.heappop(ready)
+                    operation = self.operations[entry[2]]
+                    if operation.resource is not None:
+                        if operation.resource in busy_resources:
+                            blocked.append(entry)
+                            continue
+                        busy_resources.add(operation.resource)
+                    running[executor.submit(operation.action)] = operation
+                for entry in blocked:
+                    heapq.heappush(ready, entry)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    operation = running.pop(future)
+                    if future.exception() is not None:
+                        raise future.exception()
+
+                    results[operation.key] = future.result()
+                    busy_resources.discard(operation.resource)
+                    for dependent in dependents[operation.key]:
+                        waiting[dependent] -= 1
+                        if not waiting[dependent]:
+                            heapq.heappush(
+                                ready,
+                                (-priorities[dependent], order[dependent], dependent),
+                            )
+
+            return results
+
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+###############################################################################
+#                              Inventory Planner                              #
+###############################################################################
+
+
+def chunks(items, size):
+    """Split a list into chunks.
+
+    Args:
+        - items (list): items to split.
+        - size (integer): maximum number of items per chunk.
+
+    Returns:
+        - chunks (list of lists): consecutive chunks of items.
+    """
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+class InventoryPlanner:
+    """Planner turning an inventory into the Execution Plan of its provisioning.
+
+    The operations of the plan call the steps of a ProvisioningPipeline, whose
+    moids are resolved by the lookups of the plan:
+    - The lookups of the Organization, San Connectivity Policy, Server Profile
+      Template and WWPN Pools run concurrently, and are free when cached.
+    - Every write depends on all the lookups, so that an unknown name fails the run
+      before anything is created.
+    - The WWPN reservations only depend on the lookups, and are created while the
+      Server Profiles are cloned and detached.
+    - The steps of each Server Profile (or of each chunk of 100 Server Profiles
+      with bulk requests) only wait for the steps of the same Server Profiles,
+      except the coalesced San Connectivity Policy updates, which wait for all
+      of them.
+
+    The journal is read when planning, so the completed steps cost no API call.
+    With reconcile, the Server Profiles found complete are only skipped when the
+    plan runs, so the plan is an upper bound.
+    """
+
+    def __init__(
+        self,
+        inventory_config,
+        pipeline,
+        cache,
+        clone_chunk_size=intersight_api_methods.DEFAULT_CLONE_CHUNK_SIZE,
+        reconcile_inventory=False,
+        subscriptions=None,
+        existing_objects=None,
+    ):
+        """Create an Inventory Planner.
+
+        Args:
+            - inventory_config (dictionary): content of the inventory_config JSON file, or a group of inventory.inventory_groups().
+            - pipeline (ProvisioningPipeline object): pipeline running the steps, with its journal and its flags.
+            - cache (ResolverCache object): cache of the name to moid resolutions.
+            - clone_chunk_size (integer): maximum number of Server Profiles cloned per 'bulk.MoCloner' request.
+            - reconcile_inventory (boolean): only provision the delta with the existing Server Profiles and WWPN reservations.
+            - subscriptions (dictionary): planners waiting for the result of each lookup, indexed by lookup key, shared by the planners of the groups of an inventory.
+            - existing_objects (ExistingObjects object): existing objects referenced by the inventory, read once for all the groups and windows, or None for the group only.
+        """
+        self.inventory_config = inventory_config
+        self.pipeline = pipeline
+        self.cache = cache
+        self.clone_chunk_size = clone_chunk_size
+        self.reconcile_inventory = reconcile_inventory
+        self.subscriptions = {} if subscriptions is None else subscriptions
+        if existing_objects is None:
+            existing_objects = reconcile.ExistingObjects()
+            for server_profile in inventory_config["server_profiles"]:
+                existing_objects.add_server_profile(
+                    inventory_config["organization"], server_profile
+                )
+        self.existing_objects = existing_objects
+
+        # Keys of the operations of the group, which are not shared with the other groups.
+        self.group = (
+            inventory_config["organization"],
+            inventory_config["server_profile_template"],
+            inventory_config["san_connectivity_policy"],
+        )
+
+        self.server_profiles = {
+            server_profile["server_profile_name"]: server_profile
+            for server_profile in inventory_config["server_profiles"]
+        }
+        self.server_profile_moids = {}
+        self.complete_server_profile_names = set()
+
+    @property
+    def failed_server_profiles(self):
+        """Reason of each Server Profile that could not be provisioned, indexed by Server Profile name."""
+        return self.pipeline.failed_server_profiles
+
+    def is_active(self, server_profile_name):
+        """Check whether a Server Profile is still to provision.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+
+        Returns:
+            - active (boolean): False if the Server Profile is complete or failed.
+        """
+        return (
+            server_profile_name not in self.complete_server_profile_names
+            and server_profile_name not in self.pipeline.failed_server_profiles
+        )
+
+    def jobs(self, server_profile_names):
+        """Get the name, moid and reservations of the active Server Profiles.
+
+        Args:
+            - server_profile_names (list of strings): names of the Server Profiles.
+
+        Returns:
+            - jobs (list of tuples): name, moid (None until cloned) and reservations of each active Server Profile.
+        """
+        return [
+            (
+                server_profile_name,
+                self.server_profile_moids.get(server_profile_name),
+                self.server_profiles[server_profile_name]["reservations"],
+            )
+            for server_profile_name in server_profile_names
+            if self.is_active(server_profile_name)
+        ]
+
+    def pending(self, server_profile_names, step):
+        """Count the Server Profiles whose step is not completed in the journal.
+
+        Args:
+            - server_profile_names (list of strings): names of the Server Profiles.
+            - step (string): name of the step in the journal.
+
+        Returns:
+            - pending (integer): number of Server Profiles whose step is not completed.
+        """
+        return sum(
+            not self.pipeline.journal.is_done(server_profile_name, step)
+            for server_profile_name in server_profile_names
+        )
+
+    def plan(self, plan=None):
+        """Plan the lookups, clones and provisioning steps of the inventory.
+
+        Args:
+            - plan (ExecutionPlan object): plan shared with the other groups of the inventory, or None for a new plan.
+
+        Returns:
+            - plan (ExecutionPlan object): plan of the run.
+        """
+        plan = plan or ExecutionPlan()
+        lookups = self.plan_lookups(plan)
+        sources = self.plan_clones(plan, lookups)
+        self.plan_provisioning(plan, lookups, sources)
+
+        return plan
+
+    def plan_lookup(
+        self,
+        plan,
+        object_type,
+        name,
+        organization,
+        lookup,
+        attribute,
+        on_resolve=None,
+        dependencies=(),
+    ):
+        """Plan the resolution of a name to a moid, free when it is cached.
+
+        A lookup shared with the other groups of the inventory is planned once,
+        and sets the moid in the pipelines of all the groups referencing it.
+
+        Args:
+            - plan (ExecutionPlan object): plan of the run.
+            - object_type (string): Intersight object type, e.g. 'organization.Organization'.
+            - name (string): name of the object.
+            - organization (string): name of the Organization of the object, if any.
+            - lookup (callable): function without arguments returning the moid from the Intersight API.
+            - attribute (string): attribute of the pipeline set with the moid.
+            - on_resolve (callable): function called with the moid once resolved, if any.
+            - dependencies (list of tuples): keys of the lookups of the moids used by the lookup.
+
+        Returns:
+            - key (tuple): key of the lookup.
+        """
+        key = ("lookup", object_type, organization, name)
+
+        def bind(moid):
+            setattr(self.pipeline, attribute, moid)
+            if on_resolve is not None:
+                on_resolve(moid)
+
+        subscribers = self.subscriptions.setdefault(key, {})
+        subscribers[self] = bind
+
+        def resolve():
+            moid = self.cache.resolve(
+                object_type=object_type,
+                name=name,
+                organization=organization,
+                lookup=lookup,
+            )
+            for bind_moid in subscribers.values():
+                bind_moid(moid)
+
+            return moid
+
+        cached = self.cache.get(
+            object_type=object_type, name=name, organization=organization
+        )
+
+        return plan.add(
+            key=key,
+            kind="lookup",
+            description=f"Get the moid of {object_type} '{name}'",
+            action=resolve,
+            api_calls=0 if cached else 1,
+            dependencies=dependencies,
+        )
+
+    def plan_lookups(self, plan):
+        """Plan the lookups of the moids referenced by the inventory and, with reconcile, the delta with the existing objects.
+
+        Args:
+            - plan (ExecutionPlan object): plan of the run.
+
+        Returns:
+            - lookups (list of tuples): keys of the operations to complete before any write.
+        """
+        # Get the moids of all the WWPN Pools referenced in the inventory at once.
+        wwpn_pool_names = sorted(
+            {
+                reservation["wwpn_pool"]
+                for server_profile in self.server_profiles.values()
+                for reservation in server_profile["reservations"]
+            }
+        )
+
+        # The lookups referenced by several groups are planned once, and counted as shared.
+        lookups = self.plan_references(plan, wwpn_pool_names)
+        if not self.reconcile_inventory:
+            return lookups
+
+        # The existing WWPN reservations and Server Profiles of the Organization are
+        # streamed once for all the groups and windows of the inventory.
+        organization_name = self.inventory_config["organization"]
+        api_calls = (
+            0
+            if organization_name in self.existing_objects.planned_organization_names
+            else 2
+        )
+        self.existing_objects.planned_organization_names.add(organization_name)
+        delta = plan.add(
+            key=("reconcile",) + self.group,
+            kind="reconcile",
+            description="Plan the delta with the existing Server Profiles and WWPN reservations",
+            action=self.reconcile,
+            api_calls=api_calls,
+            dependencies=lookups,
+        )
+
+        return lookups + [delta]
+
+    def plan_references(self, plan, wwpn_pool_names):
+        """Plan the lookups of the moids referenced by the Server Profiles of the group.
+
+        Args:
+            - plan (ExecutionPlan object): plan of the run.
+            - wwpn_pool_names (list of strings): names of all the WWPN Pools of the inventory, resolved together.
+
+        Returns:
+            - lookups (list of tuples): keys of the lookups of the Organization, San Connectivity Policy, Server Profile Template and WWPN Pools.
+        """
+        api_client = self.pipeline.api_client
+        organization_name = self.inventory_config["organization"]
+        san_connectivity_policy_name = self.inventory_config["san_connectivity_policy"]
+        server_profile_template_name = self.inventory_config["server_profile_template"]
+
+        # Get Organization moid from Organization Name.
+        organization_lookup = self.plan_lookup(
+            plan,
+            object_type="organization.Organization",
+            name=organization_name,
+            organization=None,
+            lookup=lambda: intersight_api_methods.get_organization_moid_from_organization_name(
+                api_client=api_client, organization_name=organization_name
+            ),
+            attribute="organization_moid",
+        )
+
+        # The other names are looked up in the Organization of the group only, since
+        # their moids are cached under the name of this Organization.
+        scope = [organization_lookup]
+
+        # Get San Connectivity Policy moid from San Connectivity Policy Name.
+        san_connectivity_policy_lookup = self.plan_lookup(
+            plan,
+            object_type="vnic.SanConnectivityPolicy",
+            name=san_connectivity_policy_name,
+            organization=organization_name,
+            lookup=lambda: intersight_api_methods.get_san_connectivity_policy_moid_from_san_connectivity_policy_name(
+                api_client=api_client,
+                san_connectivity_policy_name=san_connectivity_policy_name,
+                organization_moid=self.pipeline.organization_moid,
+            ),
+            attribute="san_connectivity_policy_moid",
+            dependencies=scope,
+        )
+
+        # Get Server Profile Template moid from Server Profile Template Name.
+        # The rollback of the run attaches back the Server Profiles to this template.
+        server_profile_template_lookup = self.plan_lookup(
+            plan,
+            object_type="server.ProfileTemplate",
+            name=server_profile_template_name,
+            organization=organization_name,
+            lookup=lambda: intersight_api_methods.get_server_profile_template_moid_from_server_profile_template_name(
+                api_client=api_client,
+                server_profile_template_name=server_profile_template_name,
+                organization_moid=self.pipeline.organization_moid,
+            ),
+            attribute="server_profile_template_moid",
+            on_resolve=lambda moid: rollback_log.record(
+                api_client, "run", server_profile_template_moid=moid
+            ),
+            dependencies=scope,
+        )
+
+        # The WWPN Pools of all the groups of an Organization are resolved together.
+        key = ("lookup", "fcpool.Pool", organization_name)
+        subscribers = self.subscriptions.setdefault(key, {})
+        subscribers[self] = wwpn_pool_names
+        organization_wwpn_pool_names = sorted(set().union(*subscribers.values()))
+
+        def resolve():
+            wwpn_pool_moids = self.resolve_wwpn_pools(
+                sorted(set().union(*subscribers.values())),
+                self.pipeline.organization_moid,
+            )
+            for planner, planner_wwpn_pool_names in subscribers.items():
+                planner.pipeline.wwpn_pool_moids.update(
+                    {
+                        wwpn_pool_name: wwpn_pool_moids[wwpn_pool_name]
+                        for wwpn_pool_name in planner_wwpn_pool_names
+                    }
+                )
+
+            return wwpn_pool_moids
+
+        unresolved_wwpn_pool_names = [
+            wwpn_pool_name
+            for wwpn_pool_name in organization_wwpn_pool_names
+            if self.cache.get(
+                object_type="fcpool.Pool",
+                name=wwpn_pool_name,
+                organization=organization_name,
+            )
+            is None
+        ]
+        description = f"Get the moids of {len(organization_wwpn_pool_names)} WWPN Pools"
+        api_calls = math.ceil(
+            len(unresolved_wwpn_pool_names)
+            / intersight_api_methods.MAX_NAMES_PER_FILTER
+        )
+        wwpn_pool_lookup = plan.add(
+            key=key,
+            kind="lookup",
+            description=description,
+            action=resolve,
+            api_calls=api_calls,
+            dependencies=scope,
+        )
+
+        # A group joining the lookup of another group adds its WWPN Pools to it.
+        operation = plan.operations[wwpn_pool_lookup]
+        operation.description, operation.api_calls = description, api_calls
+
+        return [
+            organization_lookup,
+            san_connectivity_policy_lookup,
+            server_profile_template_lookup,
+            wwpn_pool_lookup,
+        ]
+
+    def resolve_wwpn_pools(self, wwpn_pool_names, organization_moid=None):
+        """Get the moids of WWPN Pools from the cache, and the missing ones with a single filtered list query.
+
+        Args:
+            - wwpn_pool_names (list of strings): names of the WWPN Pools.
+            - organization_moid (string): moid of the Organization the WWPN Pools are looked up in, or None for all the Organizations.
+
+        Returns:
+            - wwpn_pool_moids (dictionary): moid of each WWPN Pool, indexed by WWPN Pool name.
+        """
+        return self.cache.resolve_many(
+            object_type="fcpool.Pool",
+            names=wwpn_pool_names,
+            lookup=lambda unresolved_wwpn_pool_names: intersight_api_methods.get_wwpn_pool_moids_from_wwpn_pool_names(
+                api_client=self.pipeline.api_client,
+                wwpn_pool_names=unresolved_wwpn_pool_names,
+                organization_moid=organization_moid,
+            ),
+            organization=self.inventory_config["organization"],
+        )
+
+    def reconcile(self):
+        """Skip the complete Server Profiles and reuse the existing Server Profiles and WWPN reservations.
+
+        The existing objects of the Organization are read by the first group
+        reconciled, for the WWPN Pools of the whole inventory in the Organization.
+        """
+        api_client = self.pipeline.api_client
+        organization_name = self.inventory_config["organization"]
+
+        self.existing_objects.read_organization(
+            organization_name,
+            wwpn_pool_moids=lambda: self.resolve_wwpn_pools(
+                sorted(
+                    self.existing_objects.wwpn_pool_names.get(organization_name, ())
+                ),
+                self.pipeline.organization_moid,
+            ).values(),
+            read_fcpool_reservations=lambda wwpn_pool_moids: intersight_api_methods.get_fcpool_reservations_in_wwpn_pools(
+                api_client=api_client, wwpn_pool_moids=wwpn_pool_moids
+            ),
+            read_server_profiles=lambda: intersight_api_methods.get_server_profiles_in_organization(
+                api_client=api_client,
+                organization_moid=self.pipeline.organization_moid,
+            ),
+        )
+
+        (
+            server_profiles_to_provision,
+            existing_server_profile_moids,
+            complete_server_profile_names,
+            conflicts,
+        ) = reconcile.plan_delta(
+            server_profiles=list(self.server_profiles.values()),
+            existing_objects=self.existing_objects,
+            wwpn_pool_moids=self.pipeline.wwpn_pool_moids,
+            server_profile_template_moid=self.pipeline.server_profile_template_moid,
+        )
+
+        if conflicts:
+            print("\nThe following WWPNs are already reserved elsewhere:")
+            for conflict in conflicts:
+                print(f"- {conflict}.")
+            sys.exit(1)
+
+        print(
+            f"- {len(complete_server_profile_names)} Server Profiles are already complete, {len(server_profiles_to_provision)} to provision, {len(existing_server_profile_moids)} of which already exist."
+        )
+
+        self.server_profile_moids.update(existing_server_profile_moids)
+        self.complete_server_profile_names.update(complete_server_profile_names)
+
+    def plan_clones(self, plan, lookups):
+        """Plan the 'bulk.MoCloner' of the Server Profiles not cloned by a previous run, one operation per chunk.
+
+        Args:
+            - plan (ExecutionPlan object): plan of the run.
+            - lookups (list of tuples): keys of the operations to complete before any write.
+
+        Returns:
+            - sources (dictionary): keys of the operations after which each Server Profile exists, indexed by Server Profile name.
+        """
+        sources = {}
+        server_profile_names_to_clone = []
+
+        # Get the moids of the Server Profiles already cloned by a previous run.
+        for server_profile_name in self.server_profiles:
+            cloned = self.pipeline.journal.data(server_profile_name, "cloned")
+            if cloned is not None:
+                self.server_profile_moids[server_profile_name] = cloned[
+                    "server_profile_moid"
+                ]
+                sources[server_profile_name] = list(lookups)
+            else:
+                server_profile_names_to_clone.append(server_profile_name)
+
+        # Create the other Server Profiles from the Server Profile Template, chunks in parallel.
+        for index, chunk in enumerate(
+            chunks(server_profile_names_to_clone, self.clone_chunk_size)
+        ):
+            clone = plan.add(
+                key=("clone", self.group, index),
+                kind="clone",
+                description=f"Clone {len(chunk)} Server Profiles from Server Profile Template '{self.inventory_config['server_profile_template']}'",
+                action=lambda chunk=chunk: self.clone(chunk),
+                dependencies=lookups,
+            )
+            for server_profile_name in chunk:
+                sources[server_profile_name] = [clone]
+
+        return sources
+
+    def clone(self, server_profile_names):
+        """Create Server Profiles from the Server Profile Template, unless they already exist, and Get their moids.
+
+        Args:
+            - server_profile_names (list of strings): names of the Server Profiles.
+        """
+        server_profile_names = [
+            server_profile_name
+            for server_profile_name in server_profile_names
+            if server_profile_name not in self.server_profile_moids
+            and server_profile_name not in self.complete_server_profile_names
+        ]
+        if not server_profile_names:
+            return
+
+        cloned_server_profile_moids = (
+            intersight_api_methods.create_server_profiles_from_template(
+                api_client=self.pipeline.api_client,
+                organization_moid=self.pipeline.organization_moid,
+                server_profile_names=server_profile_names,
+                server_profile_template_moid=self.pipeline.server_profile_template_moid,
+                chunk_size=self.clone_chunk_size,
+            )
+        )
+        for (
+            server_profile_name,
+            server_profile_moid,
+        ) in cloned_server_profile_moids.items():
+            self.pipeline.journal.record(
+                server_profile_name, "cloned", server_profile_moid=server_profile_moid
+            )
+        self.server_profile_moids.update(cloned_server_profile_moids)
+
+    def step_for_server_profile(self, step, server_profile_name):
+        """Get an action running a step of the pipeline for a Server Profile, if it is still active.
+
+        Args:
+            - step (callable): step of the pipeline taking the name and moid of the Server Profile.
+            - server_profile_name (string): name of the Server Profile.
+
+        Returns:
+            - action (callable): function without arguments running the step.
+        """
+
+        def action():
+            if self.is_active(server_profile_name):
+                step(
+                    server_profile_name, self.server_profile_moids[server_profile_name]
+                )
+
+        return action
+
+    def step_for_server_profiles(self, step, server_profile_names):
+        """Get an action running a step of the pipeline for the active Server Profiles of a chunk.
+
+        Args:
+            - step (callable): step of the pipeline taking the jobs of the Server Profiles.
+            - server_profile_names (list of strings): names of the Server Profiles.
+
+        Returns:
+            - action (callable): function without arguments running the step.
+        """
+
+        def action():
+            jobs = self.jobs(server_profile_names)
+            if jobs:
+                step(jobs)
+
+        return action
+
+    def reserve_wwpn(self, server_profile_name, reservation):
+        """Create the WWPN reservation of a vHBA, if its Server Profile is still active.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - reservation (dictionnary): reservation of the vHBA, updated with its 'reservation_moid'.
+        """
+        if self.is_active(server_profile_name):
+            self.pipeline.reserve_wwpn(server_profile_name, reservation)
+
+    def associate_reservations(self, server_profile_name, server_profile_moid):
+        """Associate the reservations to a Server Profile.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - server_profile_moid (string): moid of the Server Profile.
+        """
+        self.pipeline.associate_reservations(
+            server_profile_name,
+            server_profile_moid,
+            self.server_profiles[server_profile_name]["reservations"],
+        )
+
+    def plan_step(
+        self, plan, last, kind, step, description, api_calls, per_server_profile
+    ):
+        """Plan a step for each Server Profile, for each chunk of Server Profiles or, for the San Connectivity Policy, for all the Server Profiles.
+
+        Args:
+            - plan (ExecutionPlan object): plan of the run.
+            - last (dictionary): keys of the last operations of each Server Profile, indexed by Server Profile name, updated.
+            - kind (string): kind of the operations, one of OPERATION_KINDS.
+            - step (callable): step of the pipeline, taking the name and moid of a Server Profile or the jobs of a chunk.
+            - description (string): description of the operation, formatted with the Server Profiles.
+            - api_calls (callable): function returning the minimum number of API calls of the step for a list of Server Profile names.
+            - per_server_profile (boolean): whether the step runs for each Server Profile.
+        """
+        organization_name = self.inventory_config["organization"]
+        san_connectivity_policy_name = self.inventory_config["san_connectivity_policy"]
+        resource = (
+            (
+                "vnic.SanConnectivityPolicy",
+                organization_name,
+                san_connectivity_policy_name,
+            )
+            if kind in ("policy_detach", "policy_attach")
+            else None
+        )
+
+        if per_server_profile:
+            for server_profile_name in self.server_profiles:
+                last[server_profile_name] = [
+                    plan.add(
+                        key=(kind, server_profile_name),
+                        kind=kind,
+                        description=description.format(
+                            f"Server Profile '{server_profile_name}'"
+                        ),
+                        action=self.step_for_server_profile(step, server_profile_name),
+                        api_calls=api_calls([server_profile_name]),
+                        dependencies=last[server_profile_name],
+                        resource=resource,
+                    )
+                ]
+            return
+
+        server_profile_names = list(self.server_profiles)
+        for index, chunk in enumerate(
+            chunks(server_profile_names, intersight_api_methods.MAX_BULK_SUB_REQUESTS)
+            if resource is None
+            else [server_profile_names]
+        ):
+            key = plan.add(
+                key=(kind, self.group, index),
+                kind=kind,
+                description=description.format(f"{len(chunk)} Server Profiles"),
+                action=self.step_for_server_profiles(step, chunk),
+                api_calls=api_calls(chunk),
+                dependencies=[
+                    dependency
+                    for server_profile_name in chunk
+                    for dependency in last[server_profile_name]
+                ],
+                resource=resource,
+            )
+            for server_profile_name in chunk:
+                last[server_profile_name] = [key]
+
+    def plan_reservations(self, plan, lookups):
+        """Plan the creation of the WWPN reservations, per vHBA or with 'bulk.Request' resources of up to 100 reservations.
+
+        Args:
+            - plan (ExecutionPlan object): plan of the run.
+            - lookups (list of tuples): keys of the operations to complete before any write.
+
+        Returns:
+            - reservations (dictionary): keys of the operations creating the reservations of each Server Profile, indexed by Server Profile name.
+        """
+        reservations = {}
+
+        # The reservations created by a previous run are not created again.
+        for server_profile_name, server_profile in self.server_profiles.items():
+            self.pipeline.journal.restore_reservations(
+                server_profile_name, server_profile["reservations"]
+            )
+
+        if not self.pipeline.bulk_reservations:
+            for server_profile_name, server_profile in self.server_profiles.items():
+                reservations[server_profile_name] = [
+                    plan.add(
+                        key=(
+                            "reservation",
+                            server_profile_name,
+                            reservation["vhba_name"],
+                        ),
+                        kind="reservation",
+                        description=f"Reserve WWPN {reservation['wwpn_to_reserve']} for '{server_profile_name}/{reservation['vhba_name']}'",
+                        action=functools.partial(
+                            self.reserve_wwpn, server_profile_name, reservation
+                        ),
+                        api_calls=0 if reservation.get("reservation_moid") else 1,
+                        dependencies=lookups,
+                    )
+                    for reservation in server_profile["reservations"]
+                ]
+
+            return reservations
+
+        # Fill each 'bulk.Request' with the reservations of whole Server Profiles.
+        bulk_chunks = [[]]
+        size = 0
+        for server_profile_name, server_profile in self.server_profiles.items():
+            server_profile_size = len(server_profile["reservations"])
+            if (
+                bulk_chunks[-1]
+                and size + server_profile_size
+                > intersight_api_methods.MAX_BULK_SUB_REQUESTS
+            ):
+                bulk_chunks.append([])
+                size = 0
+            bulk_chunks[-1].append(server_profile_name)
+            size += server_profile_size
+
+        for index, chunk in enumerate(bulk_chunks):
+            if not chunk:
+                continue
+
+            reservations_to_create = sum(
+                not reservation.get("reservation_moid")
+                for server_profile_name in chunk
+                for reservation in self.server_profiles[server_profile_name][
+                    "reservations"
+                ]
+            )
+            key = plan.add(
+                key=("reservation", self.group, index),
+                kind="reservation",
+                description=f"Reserve the WWPNs of {len(chunk)} Server Profiles",
+                action=self.step_for_server_profiles(
+                    self.pipeline.reserve_in_bulk, chunk
+                ),
+                api_calls=math.ceil(
+                    reservations_to_create
+                    / intersight_api_methods.MAX_BULK_SUB_REQUESTS
+                ),
+                dependencies=lookups,
+            )
+            for server_profile_name in chunk:
+                reservations[server_profile_name] = [key]
+
+        return reservations
+
+    def plan_provisioning(self, plan, lookups, sources):
+        """Plan the detaches, reservations, associations and attaches of the Server Profiles.
+
+        Args:
+            - plan (ExecutionPlan object): plan of the run.
+            - lookups (list of tuples): keys of the operations to complete before any write.
+            - sources (dictionary): keys of the operations after which each Server Profile exists, indexed by Server Profile name.
+        """
+        pipeline = self.pipeline
+        san_connectivity_policy_name = self.inventory_config["san_connectivity_policy"]
+        last = dict(sources)
+
+        def bulk_api_calls(step, calls_per_request=1):
+            return lambda server_profile_names: calls_per_request * math.ceil(
+                self.pending(server_profile_names, step)
+                / intersight_api_methods.MAX_BULK_SUB_REQUESTS
+            )
+
+        def policy_api_calls(step):
+            # The 'Profiles' of the policy are read, then updated.
+            return lambda server_profile_names: 2 * bool(
+                self.pending(server_profile_names, step)
+            )
+
+        # Detach the Server Profiles from the Server Profile Template.
+        self.plan_step(
+            plan,
+            last,
+            kind="detach",
+            step=pipeline.detach_in_bulk
+            if pipeline.bulk_profile_updates
+            else pipeline.detach_from_template,
+            description="Detach {} from the Server Profile Template",
+            api_calls=bulk_api_calls("detached"),
+            per_server_profile=not pipeline.bulk_profile_updates,
+        )
+
+        # Detach the San Connectivity Policy from the Server Profiles.
+        self.plan_step(
+            plan,
+            last,
+            kind="policy_detach",
+            step=pipeline.detach_policy_in_batch
+            if pipeline.coalesce_policy_updates
+            else pipeline.detach_policy,
+            description=f"Detach San Connectivity Policy '{san_connectivity_policy_name}' from {{}}",
+            api_calls=policy_api_calls("policy_detached"),
+            per_server_profile=not pipeline.coalesce_policy_updates,
+        )
+
+        # The associations wait for the reservations and the detaches of their Server Profiles.
+        for server_profile_name, keys in self.plan_reservations(plan, lookups).items():
+            last[server_profile_name] = last[server_profile_name] + keys
+
+        # Associate the reservations to the Server Profiles.
+        self.plan_step(
+            plan,
+            last,
+            kind="association",
+            step=pipeline.associate_in_bulk
+            if pipeline.bulk_profile_updates
+            else self.associate_reservations,
+            description="Associate the WWPN reservations to {}",
+            api_calls=bulk_api_calls("associated"),
+            per_server_profile=not pipeline.bulk_profile_updates,
+        )
+
+        # Attach the San Connectivity Policy to the Server Profiles.
+        self.plan_step(
+            plan,
+            last,
+            kind="policy_attach",
+            step=pipeline.attach_policy_in_batch
+            if pipeline.coalesce_policy_updates
+            else pipeline.attach_policy,
+            description=f"Attach San Connectivity Policy '{san_connectivity_policy_name}' to {{}}",
+            api_calls=policy_api_calls("policy_attached"),
+            per_server_profile=not pipeline.coalesce_policy_updates,
+        )
+
+        # Attach the Server Profiles back to the Server Profile Template: 'bulk.MoMerger' then update.
+        self.plan_step(
+            plan,
+            last,
+            kind="attach",
+            step=pipeline.attach_in_bulk
+            if pipeline.bulk_profile_updates
+            else pipeline.attach,
+            description="Attach {} to the Server Profile Template",
+            api_calls=bulk_api_calls("attached", calls_per_request=2),
+            per_server_profile=not pipeline.bulk_profile_updates,
+        )
+
+
+def plan_inventory(
+    groups,
+    pipelines,
+    cache,
+    clone_chunk_size=intersight_api_methods.DEFAULT_CLONE_CHUNK_SIZE,
+    reconcile_inventory=False,
+    existing_objects=None,
+):
+    """Plan the groups of an inventory in a single Execution Plan.
+
+    The lookups shared by several groups (the Organization, the Server Profile
+    Templates, San Connectivity Policies and WWPN Pools referenced by several
+    groups) are planned and run once, and the updates of a San Connectivity Policy
+    shared by several groups are serialized. The names are looked up in the
+    Organization of their group.
+
+    Args:
+        - groups (list of dictionaries): groups of the inventory, as returned by inventory.inventory_groups().
+        - pipelines (list of ProvisioningPipeline objects): pipeline running the steps of each group, sharing the same ApiClient and journal.
+        - cache (ResolverCache object): cache of the name to moid resolutions.
+        - clone_chunk_size (integer): maximum number of Server Profiles cloned per 'bulk.MoCloner' request.
+        - reconcile_inventory (boolean): only provision the delta with the existing Server Profiles and WWPN reservations.
+        - existing_objects (ExistingObjects object): existing objects referenced by the whole inventory, shared by its windows, or None for the groups only.
+
+    Returns:
+        - plan (ExecutionPlan object): plan of the run.
+        - planners (list of InventoryPlanner objects): planner of each group.
+    """
+    plan = ExecutionPlan()
+    subscriptions = {}
+    if existing_objects is None:
+        existing_objects = reconcile.ExistingObjects()
+        for group in groups:
+            for server_profile in group["server_profiles"]:
+                existing_objects.add_server_profile(
+                    group["organization"], server_profile
+                )
+
+    planners = []
+    for group, pipeline in zip(groups, pipelines):
+        planner = InventoryPlanner(
+            inventory_config=group,
+            pipeline=pipeline,
+            cache=cache,
+            clone_chunk_size=clone_chunk_size,
+            reconcile_inventory=reconcile_inventory,
+            subscriptions=subscriptions,
+            existing_objects=existing_objects,
+        )
+        planner.plan(plan)
+        planners.append(planner)
+
+    return plan, planners
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
@@ -1,78 +1,115 @@
 """Module to print the Server Profiles to be created."""
 #!/usr/bin/env python3
 
-import json
+import itertools
+
 from prettytable import PrettyTable
 
+from intersight_api_functions import inventory
+
+
+# Number of Server Profiles per table of the review.
+REVIEW_PAGE_SIZE = 100
+
 ###############################################################################
 #                                   Main                                      #
 ###############################################################################
 
 
-def print_server_profiles_before_creation(inventory_config_file):
+def print_server_profiles_before_creation(
+    inventory_config_file, assume_yes=False, server_profile_counts=None
+):
     """Print the Server Profiles to be created in tables so that the user can validate the parameters.
 
+    The parameters of each group are printed in a table, then the Server Profiles
+    in tables of REVIEW_PAGE_SIZE rows, and the user validates them all at once.
+
     Args:
-        - inventory_config_file (String): Path to the configuration inventory JSON file.
+        - inventory_config_file (String): Path to the configuration inventory JSON file, or JSON lines file.
+        - assume_yes (boolean): only print the parameters and continue without asking for validation.
+        - server_profile_counts (dictionary): number of Server Profiles of each group, indexed by Organization, Server Profile Template and San Connectivity Policy, if already counted.
     """
-    # Extract data from inventory_config JSON file.
-    with open(inventory_config_file, "r", encoding="utf-8") as json_file:
-        inventory_config = json.load(json_file)
-
-    # Set parameters.
-    organization_name = inventory_config["organization"]
-    san_connectivity_policy_name = inventory_config["san_connectivity_policy"]
-    server_profile_template_name = inventory_config["server_profile_template"]
-    server_profiles = inventory_config["server_profiles"]
-
-    # Create the parameters table.
+    # Count the Server Profiles of each group, streaming the inventory file, unless already counted.
+    if server_profile_counts is None:
+        server_profile_counts = {}
+        for parameters, _ in inventory.unique_server_profiles(
+            inventory.read_inventory(inventory_config_file)
+        ):
+            group = tuple(parameters.values())
+            server_profile_counts[group] = server_profile_counts.get(group, 0) + 1
+
+    # Create the parameters table, with a row per group of Server Profiles.
     table_parameters = PrettyTable()
     table_parameters.field_names = [
         "Server Profile Template",
         "San Connectivity Policy",
         "Organization",
+        "Server Profiles",
     ]
     table_parameters.add_rows(
         [
             [
-                server_profile_template_name,
-                san_connectivity_policy_name,
-                organization_name,
+                server_profile_template,
+                san_connectivity_policy,
+                organization,
+                server_profile_count,
             ]
+            for (
+                organization,
+                server_profile_template,
+                san_connectivity_policy,
+            ), server_profile_count in server_profile_counts.items()
         ]
     )
 
-    print("\nAll the Server Profiles will use the following parameters:\n")
+    print("\nThe Server Profiles will use the following parameters:\n")
     print(table_parameters)
-    input1 = input("\nEnter 'y' to continue: ")
 
-    # Create the Server Profiles table.
-    if input1 == "y":
-        for i, server_profile in enumerate(server_profiles):
-            server_profile_name = server_profile["server_profile_name"]
+    # Batch mode: the parameters table is the whole review.
+    if assume_yes:
+        print(
+            f"\n- {sum(server_profile_counts.values())} Server Profiles will be created, review skipped with --yes."
+        )
+        return
+
+    # Create the Server Profiles table, streaming the inventory file again.
+    print("\nThe following Server Profiles will be created:\n")
+    server_profiles = enumerate(
+        inventory.read_inventory(inventory_config_file), start=1
+    )
+    while True:
+        page = list(itertools.islice(server_profiles, REVIEW_PAGE_SIZE))
+        if not page:
+            break
+
+        vhba_count = max(
+            len(server_profile["reservations"]) for _, (_, server_profile) in page
+        )
+        table_server_profiles = PrettyTable()
+        table_server_profiles.field_names = ["#", "Server Profile"] + [
+            field
+            for j in range(vhba_count)
+            for field in [f"vHBA {j}", f"WWPN of vHBA {j}"]
+        ]
+        for i, (_, server_profile) in page:
             server_profile_reservations = server_profile["reservations"]
+            table_server_profiles.add_row(
+                [i, server_profile["server_profile_name"]]
+                + [
+                    value
+                    for server_profile_reservation in server_profile_reservations
+                    for value in [
+                        server_profile_reservation["vhba_name"],
+                        server_profile_reservation["wwpn_to_reserve"],
+                    ]
+                ]
+                + ["", ""] * (vhba_count - len(server_profile_reservations))
+            )
+
+        print(table_server_profiles)
 
-            table_server_profiles = PrettyTable()
-            table_server_profiles.add_column("Server Profile", [server_profile_name])
-
-            for j, server_profile_reservation in enumerate(server_profile_reservations):
-                table_server_profiles.add_column(
-                    f"vHBA {j}", [server_profile_reservation["vhba_name"]]
-                )
-                table_server_profiles.add_column(
-                    f"WWPN of vHBA {j}",
-                    [server_profile_reservation["wwpn_to_reserve"]],
-                )
-
-            print(f"\n{i+1}) The following Server Profile will be created:\n")
-            print(table_server_profiles)
-            input2 = input("\nEnter 'y' to continue: ")
-
-            if input2 != "y":
-                print("Skipping the creation.")
-                exit()
-
-    else:
+    input1 = input("\nEnter 'y' to continue: ")
+    if input1 != "y":
         print("Skipping the creation.")
         exit()
 
@@ -14,12 +14,21 @@ from intersight.model.server_profile_template import ServerProfileTemplate
 from intersight.model.vnic_san_connectivity_policy import VnicSanConnectivityPolicy
 from intersight.api import bulk_api, fcpool_api, organization_api, server_api, vnic_api
 
+from intersight_api_functions import (
+    completion_tracker,
+    intersight_session,
+    paginated_list,
+    rollback_log,
+    tracing,
+)
+
 
 ###############################################################################
 #                           Get Org moid from Org Name                        #
 ###############################################################################
 
 
+@tracing.traced
 def get_organization_moid_from_organization_name(api_client, organization_name):
     """Get Organization moid from Organization name.
 
@@ -30,10 +39,12 @@ def get_organization_moid_from_organization_name(api_client, organization_name):
     Returns:
         - organization_moid (string) : moid of the Organization.
     """
-    api_instance = organization_api.OrganizationApi(api_client)
+    api_instance = intersight_session.get_api(
+        api_client, organization_api.OrganizationApi
+    )
 
-    # Create filter.
-    kwargs = dict(filter=f"Name eq {organization_name}")
+    # Create filter and only select the Moid of the Organization.
+    kwargs = dict(filter=f"Name eq {organization_name}", select="Moid")
 
     # Read a 'organization.Organization' resource with filter.
     try:
@@ -52,28 +63,51 @@ def get_organization_moid_from_organization_name(api_client, organization_name):
         sys.exit(1)
 
 
+def organization_filter(name_filter, organization_moid=None):
+    """Restrict the filter of a lookup by name to an Organization, if any.
+
+    Args:
+        - name_filter (string): filter on the name of the objects, e.g. "Name eq 'x'".
+        - organization_moid (string): moid of the Organization, or None to search all the Organizations.
+
+    Returns:
+        - filter (string): filter of the lookup.
+    """
+    if organization_moid is None:
+        return name_filter
+
+    return f"{name_filter} and Organization.Moid eq '{organization_moid}'"
+
+
 ###############################################################################
 #                           Get SPT moid from SPT Name                        #
 ###############################################################################
 
 
+@tracing.traced
 def get_server_profile_template_moid_from_server_profile_template_name(
-    api_client, server_profile_template_name
+    api_client, server_profile_template_name, organization_moid=None
 ):
     """Get Server Profile Template moid from Server Profile Template name.
 
     Args:
         - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
         - server_profile_template_name (string): name of the Server Profile Template.
+        - organization_moid (string): moid of the Organization of the Server Profile Template, to tell apart the templates of the same name in other Organizations.
 
     Returns:
         - server_profile_template_moid (moid) : moid of the Server Profile Template.
     """
 
-    api_instance = server_api.ServerApi(api_client)
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
 
-    # Create filter.
-    kwargs = dict(filter=f"Name eq '{server_profile_template_name}'")
+    # Create filter and only select the Moid of the Server Profile Template.
+    kwargs = dict(
+        filter=organization_filter(
+            f"Name eq '{server_profile_template_name}'", organization_moid
+        ),
+        select="Moid",
+    )
 
     # Read a 'server.ProfileTemplate' resource with filter.
     try:
@@ -99,23 +133,30 @@ def get_server_profile_template_moid_from_server_profile_template_name(
 ###############################################################################
 
 
+@tracing.traced
 def get_san_connectivity_policy_moid_from_san_connectivity_policy_name(
-    api_client, san_connectivity_policy_name
+    api_client, san_connectivity_policy_name, organization_moid=None
 ):
     """Get San Connectivity Policy moid from San Connectivity Policy name.
 
     Args:
         - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
         - san_connectivity_policy_name (string): name of the San Connectivity Policy.
+        - organization_moid (string): moid of the Organization of the San Connectivity Policy, to tell apart the policies of the same name in other Organizations.
 
     Returns:
         - san_connectivity_policy_moid (moid) : moid of the San Connectivity Policy.
     """
 
-    api_instance = vnic_api.VnicApi(api_client)
+    api_instance = intersight_session.get_api(api_client, vnic_api.VnicApi)
 
-    # Create filter.
-    kwargs = dict(filter=f"Name eq '{san_connectivity_policy_name}'")
+    # Create filter and only select the Moid of the San Connectivity Policy.
+    kwargs = dict(
+        filter=organization_filter(
+            f"Name eq '{san_connectivity_policy_name}'", organization_moid
+        ),
+        select="Moid",
+    )
 
     # Read a 'vnic.SanConnectivityPolicy' resource. with filter.
     try:
@@ -136,11 +177,55 @@ def get_san_connectivity_policy_moid_from_san_connectivity_policy_name(
         sys.exit(1)
 
 
+###############################################################################
+#                   Get Server Profiles of an Organization                    #
+###############################################################################
+
+
+def get_server_profiles_in_organization(
+    api_client, organization_moid, page_size=paginated_list.DEFAULT_PAGE_SIZE
+):
+    """Iterate lazily over the Server Profiles of an Organization, read page by page.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - organization_moid (string): moid of the Organization.
+        - page_size (integer): number of Server Profiles read per page.
+
+    Yields:
+        - server_profile (Intersight ServerProfile object, or dictionary with raw responses): Server Profile with only its Name, Moid, SrcTemplate and ReservationReferences.
+    """
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
+
+    found = 0
+
+    # Read the 'server.Profile' resources with filter, only selecting the needed attributes.
+    try:
+        for server_profile in paginated_list.iterate(
+            api_client,
+            api_instance.get_server_profile_list,
+            page_size=page_size,
+            filter=f"Organization.Moid eq '{organization_moid}'",
+            select="Name,Moid,SrcTemplate,ReservationReferences",
+        ):
+            found += 1
+            yield server_profile
+
+    except intersight.ApiException as exception:
+        print(
+            f"Exception when calling ServerApi->get_server_profile_list: {exception}\n"
+        )
+        sys.exit(1)
+
+    print(f"- Found {found} Server Profiles in Organization {organization_moid}.")
+
+
 ###############################################################################
 #                           Create Server Profile                             #
 ###############################################################################
 
 
+@tracing.traced
 def create_server_profile(api_client, organization_moid, server_profile_name):
     """Create a Server Profile in a defined Organization.
 
@@ -152,7 +237,7 @@ def create_server_profile(api_client, organization_moid, server_profile_name):
     Returns:
         - resp_create_server_profile
     """
-    api_instance = server_api.ServerApi(api_client)
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
 
     # Create 'Organization' object.
     organization = MoMoRef(
@@ -169,8 +254,16 @@ def create_server_profile(api_client, organization_moid, server_profile_name):
 
     try:
         # Create a 'server.Profile' resource.
-        resp_create_server_profile = api_instance.create_server_profile(
-            server_profile=server_profile
+        resp_create_server_profile = intersight_session.call_endpoint(
+            api_client,
+            api_instance.create_server_profile,
+            server_profile=server_profile,
+        )
+        rollback_log.record(
+            api_client,
+            "created",
+            object_type="server.Profile",
+            moids=[intersight_session.moid_of(resp_create_server_profile)],
         )
         print(f"- Creating Server Profile: {server_profile_name}.")
 
@@ -186,6 +279,7 @@ def create_server_profile(api_client, organization_moid, server_profile_name):
 ###############################################################################
 
 
+@tracing.traced
 def create_server_profile_from_template(
     api_client, organization_moid, server_profile_name, server_profile_template_moid
 ):
@@ -200,7 +294,7 @@ def create_server_profile_from_template(
     Returns:
         - resp_create_server_profile_from_template
     """
-    api_instance = bulk_api.BulkApi(api_client)
+    api_instance = intersight_session.get_api(api_client, bulk_api.BulkApi)
 
     # Create 'Organization' object.
     organization = MoMoRef(
@@ -227,216 +321,305 @@ def create_server_profile_from_template(
 
     try:
         # Create a 'bulk.MoCloner' resource.
-        resp_create_server_profile_from_template = api_instance.create_bulk_mo_cloner(
-            server_profile_from_template
+        resp_create_server_profile_from_template = intersight_session.call_endpoint(
+            api_client,
+            api_instance.create_bulk_mo_cloner,
+            bulk_mo_cloner=server_profile_from_template,
         )
         print(
             f"- Creating Server Profile {server_profile_name} from Server Profile Template {server_profile_template_moid}."
         )
 
-        return resp_create_server_profile_from_template
-
     except intersight.ApiException as exception:
         print(f"Exception when calling BulkApi->create_bulk_mo_cloner: {exception}\n")
         sys.exit(1)
 
+    # Only return once the Server Profile exists if the 'bulk.MoCloner' is still executing.
+    async_result_moid = get_async_result_moid(resp_create_server_profile_from_template)
+    if async_result_moid is not None:
+        error, target_errors = get_bulk_result_errors(
+            wait_for_bulk_results(api_client, [async_result_moid])[async_result_moid]
+        )
+        if error or target_errors:
+            print(
+                f"Failed to create Server Profile {server_profile_name}: {error or ', '.join(message for _, message in target_errors)}\n"
+            )
+            sys.exit(1)
+
+        server_profile_moids = list(
+            get_server_profile_moids_from_server_profile_names(
+                api_client=api_client,
+                organization_moid=organization_moid,
+                server_profile_names=[server_profile_name],
+            ).values()
+        )
+    else:
+        server_profile_moids = [
+            moid
+            for _, moid, _ in get_bulk_results(
+                resp_create_server_profile_from_template, "Responses"
+            )
+            if moid
+        ]
+    rollback_log.record(
+        api_client, "created", object_type="server.Profile", moids=server_profile_moids
+    )
+
+    return resp_create_server_profile_from_template
+
 
 ###############################################################################
-#                    Detach Server Profile from Template                      #
+#                          JSON Bodies and Bulk Requests                      #
 ###############################################################################
 
 
-def detach_server_profile_from_template(api_client, server_profile_moid):
-    """Detach a Server Profile from a Server Profile Template.
+def mo_ref_json(object_type, moid):
+    """Get the JSON body of a reference to a resource.
 
     Args:
-        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
-        - server_profile_moid (string): moid of the Server Profile.
+        - object_type (string): type of the resource, e.g. 'server.Profile'.
+        - moid (string): moid of the resource.
 
     Returns:
-        - resp_detach_server_profile
+        - mo_ref (dictionary): 'mo.MoRef' with the attribute names of the API.
     """
-    api_instance = server_api.ServerApi(api_client)
+    return {"ClassId": "mo.MoRef", "ObjectType": object_type, "Moid": moid}
 
-    # 'ServerProfile' | The 'server.Profile' resource to update.
-    server_profile = ServerProfile(moid=server_profile_moid)
-
-    # Updating attribute src_template object of server_profile instance to None.
-    server_profile.src_template = None
 
-    try:
-        # Update a 'server.Profile' resource.
-        resp_detach_server_profile = api_instance.update_server_profile(
-            server_profile=server_profile, moid=server_profile_moid
-        )
-        print(
-            f"- Detaching Server Profile {server_profile_moid} from Server Profile Template."
-        )
+def get_bulk_results(resp_create_bulk, name):
+    """Get the status, moid and error of each sub-request of a 'bulk.MoCloner' or a 'bulk.Request'.
 
-        return resp_detach_server_profile
+    Args:
+        - resp_create_bulk (SDK model object, or dictionary with raw responses): response of the creation of the bulk resource.
+        - name (string): attribute holding the results, 'Responses' for a 'bulk.MoCloner' and 'Results' for a 'bulk.Request'.
 
-    except intersight.ApiException as exception:
-        print(f"Exception when calling ServerApi->update_server_profile: {exception}\n")
-        sys.exit(1)
+    Returns:
+        - results (list of tuples): HTTP status, moid of the resource (or None) and error message (or None) of each sub-request, in the order of the sub-requests.
+    """
+    results = []
+
+    if isinstance(resp_create_bulk, dict):
+        for result in resp_create_bulk.get(name) or []:
+            status, body = result["Status"], result.get("Body")
+            if 200 <= status < 300:
+                results.append((status, (body or {}).get("Moid"), None))
+            else:
+                results.append((status, None, result.get("BodyString") or body))
+
+        return results
+
+    for result in resp_create_bulk.get(name.lower()) or []:
+        status, body = result.status, result.get("body")
+        if 200 <= status < 300:
+            results.append(
+                (status, body.get("moid") if body is not None else None, None)
+            )
+        else:
+            results.append((status, None, result.get("body_string") or body))
 
+    return results
 
-###############################################################################
-#                         Get San Connectivity Policy                         #
-###############################################################################
 
+def run_bulk_request(api_client, verb, uri, sub_requests):
+    """Create a 'bulk.Request' resource, whose other sub-requests keep being processed when one of them fails.
 
-def get_san_connectivity_policy_by_moid(api_client, vnic_san_connectivity_policy_moid):
-    """Get San Connectivity Policy from its moid.
+    The 'bulk.Request' is always sent and read as JSON, whether the responses are
+    raw or not: building and reading the SDK models of a hundred sub-requests
+    costs seconds of CPU, far more than the request itself.
 
     Args:
         - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
-        - vnic_san_connectivity_policy_moid (string): moid of San Connectivity Policy.
+        - verb (string): 'POST', 'PATCH' or 'DELETE'.
+        - uri (string): URI of the resources, e.g. '/v1/server/Profiles'.
+        - sub_requests (list of tuples): moid of the target resource (None for a creation) and JSON body with the attribute names of the API (None for a deletion) of each sub-request.
 
     Returns:
-        - resp_get_vnic_san_connectivity_policy_by_moid
+        - results (list of tuples): HTTP status, moid of the resource (or None) and error message (or None) of each sub-request, in the order of the sub-requests.
     """
-    api_instance = vnic_api.VnicApi(api_client)
+    api_instance = intersight_session.get_api(api_client, bulk_api.BulkApi)
 
     try:
-        # Read a 'vnic.SanConnectivityPolicy' resource.
-        resp_get_vnic_san_connectivity_policy_by_moid = (
-            api_instance.get_vnic_san_connectivity_policy_by_moid(
-                moid=vnic_san_connectivity_policy_moid
-            )
+        # Create a 'bulk.Request' resource, with one 'bulk.RestSubRequest' per body.
+        resp_create_bulk_request = intersight_session.send_json(
+            api_client,
+            api_instance.create_bulk_request_endpoint,
+            body={
+                "ClassId": "bulk.Request",
+                "ObjectType": "bulk.Request",
+                "Verb": verb,
+                "Uri": uri,
+                "ActionOnError": "Proceed",
+                "Requests": [
+                    dict(
+                        {
+                            "ClassId": "bulk.RestSubRequest",
+                            "ObjectType": "bulk.RestSubRequest",
+                        },
+                        **({"Body": body} if body is not None else {}),
+                        **({"TargetMoid": target_moid} if target_moid else {}),
+                    )
+                    for target_moid, body in sub_requests
+                ],
+            },
         )
-        print(resp_get_vnic_san_connectivity_policy_by_moid)
-
-        return resp_get_vnic_san_connectivity_policy_by_moid
 
     except intersight.ApiException as exception:
-        print(
-            f"Exception when calling VnicApi->get_vnic_san_connectivity_policy_by_moid: {exception}\n"
-        )
+        print(f"Exception when calling BulkApi->create_bulk_request: {exception}\n")
         sys.exit(1)
 
+    return get_bulk_results(resp_create_bulk_request, "Results")
+
 
 ###############################################################################
-#              Detach San Connectivity Policy from Server Profile             #
+#                      Wait for Asynchronous Bulk Results                     #
 ###############################################################################
 
 
-def detach_san_connectivity_policy_from_server_profile(
-    api_client, vnic_san_connectivity_policy_moid, server_profile_moid
-):
-    """Detach a San Connectivity Policy from a Server Profile.
+def get_async_result_moid(resp_create_bulk):
+    """Get the moid of the 'bulk.Result' of a 'bulk.MoCloner' or 'bulk.MoMerger' still executing.
 
     Args:
-        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
-        - server_profile_moid (string): moid of the Server Profile.
-        - vnic_san_connectivity_policy_moid (string): moid of San Connectivity Policy.
+        - resp_create_bulk (SDK model object, or dictionary with raw responses): response of the creation of the bulk resource.
 
     Returns:
-        - resp_detach_san_connectivity_policy_from_server_profile
+        - async_result_moid (string): moid of the 'bulk.Result', or None if the bulk resource was executed synchronously.
     """
-    api_instance = vnic_api.VnicApi(api_client)
+    if isinstance(resp_create_bulk, dict):
+        async_result = resp_create_bulk.get("AsyncResult")
+        if resp_create_bulk.get("Responses") or not async_result:
+            return None
 
-    try:
-        # Read a 'vnic.SanConnectivityPolicy' resource.
-        resp_get_vnic_san_connectivity_policy_by_moid = (
-            api_instance.get_vnic_san_connectivity_policy_by_moid(
-                moid=vnic_san_connectivity_policy_moid
-            )
-        )
+        return async_result.get("Moid")
 
-    except intersight.ApiException as exception:
-        print(
-            f"Exception when calling VnicApi->get_vnic_san_connectivity_policy_by_moid: {exception}\n"
-        )
-        sys.exit(1)
+    async_result = resp_create_bulk.get("async_result")
+    if resp_create_bulk.get("responses") or async_result is None:
+        return None
 
-    # Update the 'Profiles' object of the fetched vnic_san_connectivity_policy instance.
-    profiles = resp_get_vnic_san_connectivity_policy_by_moid.profiles
-    profiles = [
-        profile for profile in profiles if profile.get("moid") != server_profile_moid
-    ]
+    return async_result.moid
 
-    # 'VnicSanConnectivityPolicy' | The 'vnic.SanConnectivityPolicy' resource to update.
-    vnic_san_connectivity_policy = VnicSanConnectivityPolicy(
-        moid=vnic_san_connectivity_policy_moid
-    )
 
-    # Update 'Profiles' object of vnic_san_connectivity_policy instance.
-    vnic_san_connectivity_policy.profiles = profiles
+def get_bulk_result_sub_requests(bulk_result):
+    """Get the status of a completed 'bulk.Result' and of each of its sub-requests.
 
-    try:
-        # Update a 'vnic.SanConnectivityPolicy' resource.
-        resp_detach_san_connectivity_policy_from_server_profile = (
-            api_instance.update_vnic_san_connectivity_policy(
-                vnic_san_connectivity_policy=vnic_san_connectivity_policy,
-                moid=vnic_san_connectivity_policy_moid,
-            )
-        )
-        print(
-            f"- Detaching San Connectivity Policy {vnic_san_connectivity_policy_moid} from Server Profile {server_profile_moid}."
+    Args:
+        - bulk_result (SDK model object or dictionary): completed 'bulk.Result' resource.
+
+    Returns:
+        - status (string): status of the 'bulk.Result', e.g. 'Completed' or 'CompletedWithErrors'.
+        - status_message (string): status message of the 'bulk.Result', or None.
+        - sub_requests (list of tuples): status, moid of the target (None for a creation, unless returned) and body of each sub-request, in the order of the targets.
+    """
+    if isinstance(bulk_result, dict):
+        return (
+            bulk_result.get("Status"),
+            bulk_result.get("StatusMessage"),
+            [
+                (
+                    sub_request.get("Status"),
+                    sub_request.get("TargetMoid"),
+                    sub_request.get("BodyString"),
+                )
+                for sub_request in bulk_result.get("Results") or []
+            ],
         )
 
-        return resp_detach_san_connectivity_policy_from_server_profile
+    return (
+        bulk_result.get("status"),
+        bulk_result.get("status_message"),
+        [
+            (
+                sub_request.get("status"),
+                sub_request.get("target_moid"),
+                sub_request.get("body_string"),
+            )
+            for sub_request in bulk_result.get("results") or []
+        ],
+    )
 
-    except intersight.ApiException as exception:
-        print(
-            f"Exception when calling VnicApi->update_vnic_san_connectivity_policy: {exception}\n"
-        )
-        sys.exit(1)
 
+def get_bulk_result_errors(bulk_result):
+    """Get the error of a completed 'bulk.Result' and of each of its failed targets.
 
-###############################################################################
-#                     Get WWPN Pool moid from WWPN Pool name                  #
-###############################################################################
+    Args:
+        - bulk_result (SDK model object or dictionary): completed 'bulk.Result' resource.
+
+    Returns:
+        - error (string): status message of the 'bulk.Result' if it failed as a whole, or None.
+        - target_errors (list of tuples): moid of the target (None for a creation) and error message of each failed sub-request.
+    """
+    status, status_message, sub_requests = get_bulk_result_sub_requests(bulk_result)
 
+    if status in ("Failed", "TimedOut"):
+        return status_message or status, []
 
-def get_wwpn_pool_moid_from_wwpn_pool_name(api_client, wwpn_pool_name):
-    """Get moid of WWPN Pool from its name.
+    target_errors = [
+        (target_moid, body_string or sub_request_status)
+        for sub_request_status, target_moid, body_string in sub_requests
+        if sub_request_status not in (None, "Completed")
+    ]
+
+    return None, target_errors
+
+
+def wait_for_bulk_results(api_client, async_result_moids):
+    """Wait for the completion of several 'bulk.Result' resources, polled together by the Completion Tracker.
 
     Args:
         - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
-        - wwpn_pool_name (string): name of the WWPN Pool.
+        - async_result_moids (list of strings): moids of the 'bulk.Result' resources.
 
     Returns:
-        - wwpn_pool_moid (string): moid of the WWPN Pool.
+        - bulk_results (dictionary): completed 'bulk.Result' resources, indexed by moid.
     """
-    api_instance = fcpool_api.FcpoolApi(api_client)
-
-    # Create filter.
-    kwargs = dict(filter=f"Name eq '{wwpn_pool_name}'")
-
-    # Read a 'fcpool.Pool' resource with filter.
     try:
-        wwpn_pool_result = api_instance.get_fcpool_pool_list(**kwargs)
-        wwpn_pool_moid = wwpn_pool_result.results[0].moid
-        print(f"- Moid of the WWPN Pool {wwpn_pool_name} is: {wwpn_pool_moid}.")
-
-        return wwpn_pool_moid
+        return completion_tracker.get_tracker(api_client).wait(
+            "bulk.Result", async_result_moids
+        )
 
-    except intersight.ApiException as exception:
-        print(f"Exception when calling FcpoolApi->get_fcpool_pool_list: {exception}\n")
+    # The errors of the polls, raised in the poller thread, are re-raised by the futures.
+    except Exception as exception:
+        print(
+            f"Exception when waiting for the completion of 'bulk.Result' resources: {exception!r}\n"
+        )
         sys.exit(1)
 
 
 ###############################################################################
-#                       Create FC Pool Reservations                           #
+#                Create Server Profiles from Template (batched)               #
 ###############################################################################
 
 
-def create_fcpool_reservation(
-    api_client, organization_moid, wwpn_pool_moid, wwpn_to_reserve
+# Number of 'server.Profile' targets sent in a single 'bulk.MoCloner' request.
+DEFAULT_CLONE_CHUNK_SIZE = 100
+
+
+@tracing.traced
+def create_server_profiles_from_template(
+    api_client,
+    organization_moid,
+    server_profile_names,
+    server_profile_template_moid,
+    chunk_size=DEFAULT_CLONE_CHUNK_SIZE,
 ):
-    """Create a WWPN reservation in a WWPN Pool.
+    """Create several Server Profiles from a Server Profile Template with as few 'bulk.MoCloner' requests as possible.
+
+    All the chunks are sent before waiting for the ones still executing, whose
+    'bulk.Result' are then polled together.
 
     Args:
         - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
         - organization_moid (string): moid of the Organization.
-        - wwpn_pool_moid (string): moid of the WWPN Pool.
-        - wwpn_to_reserve (string): WWPN to reserve.
+        - server_profile_names (list of strings): names of the Server Profiles to create.
+        - server_profile_template_moid (string): moid of the Server Profile Template source.
+        - chunk_size (integer): maximum number of Server Profiles cloned per 'bulk.MoCloner' request.
 
     Returns:
-        - resp_create_fcpool_reservation
+        - server_profile_moids (dictionary): moid of each new Server Profile, indexed by Server Profile name.
     """
-    api_instance = fcpool_api.FcpoolApi(api_client)
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be a positive integer, got {chunk_size}.")
+
+    api_instance = intersight_session.get_api(api_client, bulk_api.BulkApi)
 
     # Create 'Organization' object.
     organization = MoMoRef(
@@ -444,166 +627,1351 @@ def create_fcpool_reservation(
         moid=organization_moid,
     )
 
-    # 'FcpoolReservation' | The 'fcpool.Reservation' resource to create.
-    fcpool_reservation = FcpoolReservation()
-
-    # Create 'fcpool.Pool' object.
-    wwpn_pool = MoMoRef(object_type="fcpool.Pool", moid=wwpn_pool_moid)
+    server_profile_moids = {}
+    async_result_moids = {}
+
+    for start in range(0, len(server_profile_names), chunk_size):
+        chunk = server_profile_names[start : start + chunk_size]
+
+        try:
+            # Create a 'bulk.MoCloner' resource.
+            if intersight_session.raw_responses(api_client):
+                # Send the JSON body as is, without building an SDK model per target.
+                resp_create_server_profiles_from_template = (
+                    intersight_session.send_json(
+                        api_client,
+                        api_instance.create_bulk_mo_cloner_endpoint,
+                        body={
+                            "ClassId": "bulk.MoCloner",
+                            "ObjectType": "bulk.MoCloner",
+                            "Sources": [
+                                mo_ref_json(
+                                    "server.ProfileTemplate",
+                                    server_profile_template_moid,
+                                )
+                            ],
+                            "Targets": [
+                                {
+                                    "ClassId": "server.Profile",
+                                    "ObjectType": "server.Profile",
+                                    "Name": server_profile_name,
+                                    "Organization": mo_ref_json(
+                                        "organization.Organization", organization_moid
+                                    ),
+                                }
+                                for server_profile_name in chunk
+                            ],
+                        },
+                    )
+                )
+            else:
+                # 'BulkMoCloner' | The 'bulk.MoCloner' resource to create.
+                server_profiles_from_template = BulkMoCloner()
+
+                # Create 'Sources' object with inner server_profile_template instance.
+                server_profiles_from_template.sources = [
+                    ServerProfileTemplate(moid=server_profile_template_moid)
+                ]
+
+                # Create 'Targets' object with one server_profile instance per name of the chunk.
+                server_profiles_from_template.targets = [
+                    ServerProfile(name=server_profile_name, organization=organization)
+                    for server_profile_name in chunk
+                ]
+
+                resp_create_server_profiles_from_template = (
+                    api_instance.create_bulk_mo_cloner(
+                        bulk_mo_cloner=server_profiles_from_template
+                    )
+                )
+            print(
+                f"- Creating {len(chunk)} Server Profiles from Server Profile Template {server_profile_template_moid}."
+            )
 
-    # Setting all the attributes for fcpool_reservation instance.
-    fcpool_reservation.allocation_type = "dynamic"
-    fcpool_reservation.identity = wwpn_to_reserve
-    fcpool_reservation.id_purpose = "WWPN"
-    fcpool_reservation.organization = organization
-    fcpool_reservation.pool = wwpn_pool
+        except intersight.ApiException as exception:
+            print(
+                f"Exception when calling BulkApi->create_bulk_mo_cloner: {exception}\n"
+            )
+            sys.exit(1)
 
-    try:
-        # Create a 'fcpool.Reservation' resource.
-        resp_create_fcpool_reservation = api_instance.create_fcpool_reservation(
-            fcpool_reservation=fcpool_reservation
+        async_result_moid = get_async_result_moid(
+            resp_create_server_profiles_from_template
         )
-        print(
-            f"- Creating a WWPN reservation for WWPN {wwpn_to_reserve} in WWPN Pool {wwpn_pool_moid}."
+        if async_result_moid is not None:
+            async_result_moids[async_result_moid] = chunk
+            continue
+
+        # The responses are returned in the same order as the targets.
+        created_server_profile_moids = {
+            server_profile_name: moid
+            for server_profile_name, (status, moid, _) in zip(
+                chunk,
+                get_bulk_results(
+                    resp_create_server_profiles_from_template, "Responses"
+                ),
+            )
+            if 200 <= status < 300
+        }
+        rollback_log.record(
+            api_client,
+            "created",
+            object_type="server.Profile",
+            moids=list(created_server_profile_moids.values()),
+        )
+        server_profile_moids.update(created_server_profile_moids)
+
+    if async_result_moids:
+        # Only the targets whose sub-request completed, or that exist when the results
+        # cannot be matched to the targets, are known to be created by the run.
+        created_server_profile_names = []
+        for async_result_moid, bulk_result in wait_for_bulk_results(
+            api_client, list(async_result_moids)
+        ).items():
+            chunk = async_result_moids[async_result_moid]
+            status, status_message, sub_requests = get_bulk_result_sub_requests(
+                bulk_result
+            )
+            if status in ("Failed", "TimedOut"):
+                print(
+                    f"- 'bulk.MoCloner' failed ('bulk.Result' {async_result_moid}): {status_message or status}."
+                )
+                continue
+
+            # The sub-requests are returned in the same order as the targets. When they
+            # cannot be matched, the targets of the chunk that exist are read back by name.
+            if len(sub_requests) != len(chunk):
+                print(
+                    f"- 'bulk.MoCloner' returned {len(sub_requests)} results for {len(chunk)} targets ('bulk.Result' {async_result_moid}), reading them back by name."
+                )
+                created_server_profile_names.extend(chunk)
+                continue
+
+            for server_profile_name, (
+                sub_request_status,
+                target_moid,
+                body_string,
+            ) in zip(chunk, sub_requests):
+                if sub_request_status not in (None, "Completed"):
+                    print(
+                        f"- 'bulk.MoCloner' target {server_profile_name} failed ('bulk.Result' {async_result_moid}): {body_string or sub_request_status}."
+                    )
+                    continue
+
+                created_server_profile_names.append(server_profile_name)
+                if target_moid:
+                    server_profile_moids[server_profile_name] = target_moid
+
+        # The Server Profiles created asynchronously without their moid are read back by name.
+        unresolved_server_profile_names = [
+            server_profile_name
+            for server_profile_name in created_server_profile_names
+            if server_profile_name not in server_profile_moids
+        ]
+        if unresolved_server_profile_names:
+            server_profile_moids.update(
+                get_server_profile_moids_from_server_profile_names(
+                    api_client=api_client,
+                    organization_moid=organization_moid,
+                    server_profile_names=unresolved_server_profile_names,
+                )
+            )
+        rollback_log.record(
+            api_client,
+            "created",
+            object_type="server.Profile",
+            moids=[
+                server_profile_moids[server_profile_name]
+                for server_profile_name in created_server_profile_names
+                if server_profile_name in server_profile_moids
+            ],
         )
 
-        return resp_create_fcpool_reservation
-
-    except intersight.ApiException as exception:
+    missing_server_profile_names = [
+        server_profile_name
+        for server_profile_name in server_profile_names
+        if server_profile_name not in server_profile_moids
+    ]
+    if missing_server_profile_names:
         print(
-            f"Exception when calling FcpoolApi->create_fcpool_reservation: {exception}\n"
+            f"The 'bulk.MoCloner' requests did not create the Server Profiles: {', '.join(missing_server_profile_names)}.\n"
         )
         sys.exit(1)
 
-
-###############################################################################
-#              Associate FC Pool Reservations to Server Profile               #
-###############################################################################
+    return server_profile_moids
 
 
-def associate_fc_pool_reservations_to_server_profile(
-    api_client, reservations, server_profile_moid
+@tracing.traced
+def get_server_profile_moids_from_server_profile_names(
+    api_client, organization_moid, server_profile_names
 ):
-    """Associate FC Pool Reservations to Server Profile.
+    """Get moids of several Server Profiles of an Organization from their names with filtered list queries.
 
     Args:
         - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
-        - reservations (list of dictionnaries): object used to describe FC Pool Reservations. It has for format the following structure:
-            reservations = [{"vhba_name": "vhba_name","wwpn_to_reserve": "wwpn_to_reserve","wwpn_pool": "wwpn_pool","reservation_moid": "reservation_moid"},...]
-        - server_profile_moid (string): moid of the Server Profile.
+        - organization_moid (string): moid of the Organization.
+        - server_profile_names (list of strings): names of the Server Profiles.
 
     Returns:
-        - resp_associate_fc_pool_reservations_to_server_profile
+        - server_profile_moids (dictionary): moid of each Server Profile found, indexed by Server Profile name.
     """
-    api_instance = server_api.ServerApi(api_client)
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
 
-    # 'ServerProfile' | The 'server.Profile' resource to update.
-    server_profile = ServerProfile(moid=server_profile_moid)
+    server_profile_moids = {}
 
-    # Create 'FcpoolReservationReference' object.
-    server_profile.reservation_references = []
-    for reservation in reservations:
-        fcpool_reservation_reference = PoolReservationReference(
-            object_type="fcpool.ReservationReference",
-            class_id="fcpool.ReservationReference",
-            consumer_type="Vhba",
-            consumer_name=reservation["vhba_name"],
-            reservation_moid=reservation["reservation_moid"],
+    for start in range(0, len(server_profile_names), MAX_NAMES_PER_FILTER):
+        chunk = server_profile_names[start : start + MAX_NAMES_PER_FILTER]
+        quoted_server_profile_names = ", ".join(
+            f"'{server_profile_name}'" for server_profile_name in chunk
         )
 
-        # Update attribute reservation_references of server_profile instance
-        server_profile.reservation_references.append(fcpool_reservation_reference)
-
-    try:
-        # Update a 'server.Profile' resource.
-        resp_associate_fc_pool_reservations_to_server_profile = (
-            api_instance.update_server_profile(
-                server_profile=server_profile, moid=server_profile_moid
-            )
-        )
-        print(
-            f"- Associating FC Pool Reservations to Server Profile {server_profile_moid}."
+        # Create filter and only select the Name and the Moid of the Server Profiles.
+        kwargs = dict(
+            filter=f"Organization.Moid eq '{organization_moid}' and Name in ({quoted_server_profile_names})",
+            select="Name,Moid",
+            top=len(chunk),
         )
 
-        return resp_associate_fc_pool_reservations_to_server_profile
+        # Read the 'server.Profile' resources with filter.
+        try:
+            server_profile_result = intersight_session.call_endpoint(
+                api_client, api_instance.get_server_profile_list, **kwargs
+            )
 
-    except intersight.ApiException as exception:
-        print(f"Exception when calling ServerApi->update_server_profile: {exception}\n")
-        sys.exit(1)
+        except intersight.ApiException as exception:
+            print(
+                f"Exception when calling ServerApi->get_server_profile_list: {exception}\n"
+            )
+            sys.exit(1)
 
+        if isinstance(server_profile_result, dict):
+            for server_profile in server_profile_result.get("Results") or []:
+                server_profile_moids[server_profile["Name"]] = server_profile["Moid"]
+        else:
+            for server_profile in server_profile_result.results:
+                server_profile_moids[server_profile.name] = server_profile.moid
 
-###############################################################################
-#                Attach San Connectivity Policy to Server Profile             #
-###############################################################################
+    return server_profile_moids
 
 
-def attach_san_connectivity_policy_from_server_profile(
-    api_client, server_profile_moid, vnic_san_connectivity_policy_moid
-):
-    """Attach a San Connectivity Policy to Server Profile.
+@tracing.traced
+def get_server_profiles_reservation_references(api_client, server_profile_moids):
+    """Get the reservations referenced by several Server Profiles with filtered list queries.
 
     Args:
         - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
-        - server_profile_moid (string): moid of the Server Profile.
-        - vnic_san_connectivity_policy_moid (string): moid of the San Connectivity Policy.
+        - server_profile_moids (list of strings): moids of the Server Profiles.
 
     Returns:
-        - resp_attach_san_connectivity_policy_from_server_profile
+        - reservations_by_server_profile_moid (dictionary): 'vhba_name' and 'reservation_moid' of the reservations referenced by each Server Profile found, indexed by Server Profile moid.
     """
-    api_instance = vnic_api.VnicApi(api_client)
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
 
-    try:
-        # Read a 'vnic.SanConnectivityPolicy' resource.
-        resp_get_vnic_san_connectivity_policy_by_moid = (
-            api_instance.get_vnic_san_connectivity_policy_by_moid(
-                moid=vnic_san_connectivity_policy_moid
-            )
-        )
+    reservations_by_server_profile_moid = {}
 
-    except intersight.ApiException as exception:
-        print(
-            f"Exception when calling VnicApi->get_vnic_san_connectivity_policy_by_moid: {exception}\n"
+    for start in range(0, len(server_profile_moids), MAX_NAMES_PER_FILTER):
+        chunk = server_profile_moids[start : start + MAX_NAMES_PER_FILTER]
+        quoted_server_profile_moids = ", ".join(
+            f"'{server_profile_moid}'" for server_profile_moid in chunk
         )
-        sys.exit(1)
-
-    # 'VnicSanConnectivityPolicy' | The 'vnic.SanConnectivityPolicy' resource to update.
-    vnic_san_connectivity_policy = VnicSanConnectivityPolicy(
-        moid=vnic_san_connectivity_policy_moid
-    )
 
-    # Create 'server.Profile' object.
-    profile = MoMoRef(object_type="server.Profile", moid=server_profile_moid)
+        # Create filter and only select the Moid and the ReservationReferences of the Server Profiles.
+        kwargs = dict(
+            filter=f"Moid in ({quoted_server_profile_moids})",
+            select="Moid,ReservationReferences",
+            top=len(chunk),
+        )
 
-    # Append 'server.Profile' object to 'Profiles' object of vnic_san_connectivity_policy instance.
-    profiles = resp_get_vnic_san_connectivity_policy_by_moid.profiles
-    profiles.append(profile)
-    vnic_san_connectivity_policy.profiles = profiles
+        # Read the 'server.Profile' resources with filter.
+        try:
+            server_profile_result = intersight_session.call_endpoint(
+                api_client, api_instance.get_server_profile_list, **kwargs
+            )
 
-    try:
-        # Update a 'vnic.SanConnectivityPolicy' resource.
-        resp_attach_san_connectivity_policy_from_server_profile = (
-            api_instance.update_vnic_san_connectivity_policy(
-                vnic_san_connectivity_policy=vnic_san_connectivity_policy,
-                moid=vnic_san_connectivity_policy_moid,
+        except intersight.ApiException as exception:
+            print(
+                f"Exception when calling ServerApi->get_server_profile_list: {exception}\n"
             )
-        )
-        print(
-            f"- Attaching San Connectivity Policy {vnic_san_connectivity_policy_moid} to Server Profile {server_profile_moid}."
-        )
+            sys.exit(1)
+
+        if isinstance(server_profile_result, dict):
+            server_profiles = server_profile_result.get("Results") or []
+        else:
+            server_profiles = server_profile_result.results
+
+        for server_profile in server_profiles:
+            reservations_by_server_profile_moid[
+                intersight_session.attribute_of(server_profile, "Moid")
+            ] = [
+                {
+                    "vhba_name": intersight_session.attribute_of(
+                        reservation_reference, "ConsumerName"
+                    ),
+                    "reservation_moid": intersight_session.attribute_of(
+                        reservation_reference, "ReservationMoid"
+                    ),
+                }
+                for reservation_reference in intersight_session.attribute_of(
+                    server_profile, "ReservationReferences"
+                )
+                or []
+            ]
+
+    return reservations_by_server_profile_moid
 
-        return resp_attach_san_connectivity_policy_from_server_profile
+
+###############################################################################
+#                    Detach Server Profile from Template                      #
+###############################################################################
+
+
+@tracing.traced
+def detach_server_profile_from_template(
+    api_client, server_profile_moid, server_profile_template_moid=None
+):
+    """Detach a Server Profile from a Server Profile Template.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - server_profile_moid (string): moid of the Server Profile.
+        - server_profile_template_moid (string): moid of the Server Profile Template, recorded to attach the Server Profile back on rollback.
+
+    Returns:
+        - resp_detach_server_profile
+    """
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
+
+    # 'ServerProfile' | The 'server.Profile' resource to update.
+    server_profile = ServerProfile(moid=server_profile_moid)
+
+    # Updating attribute src_template object of server_profile instance to None.
+    server_profile.src_template = None
+
+    rollback_log.record(
+        api_client,
+        "detached_from_template",
+        server_profile_moids=[server_profile_moid],
+        server_profile_template_moid=server_profile_template_moid,
+    )
+
+    try:
+        # Update a 'server.Profile' resource.
+        resp_detach_server_profile = intersight_session.call_endpoint(
+            api_client,
+            api_instance.update_server_profile,
+            server_profile=server_profile,
+            moid=server_profile_moid,
+        )
+        print(
+            f"- Detaching Server Profile {server_profile_moid} from Server Profile Template."
+        )
+
+        return resp_detach_server_profile
+
+    except intersight.ApiException as exception:
+        print(f"Exception when calling ServerApi->update_server_profile: {exception}\n")
+        sys.exit(1)
+
+
+###############################################################################
+#                         Get San Connectivity Policy                         #
+###############################################################################
+
+
+@tracing.traced
+def get_san_connectivity_policy_by_moid(
+    api_client, vnic_san_connectivity_policy_moid, select=None
+):
+    """Get San Connectivity Policy from its moid.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - vnic_san_connectivity_policy_moid (string): moid of San Connectivity Policy.
+        - select (string): comma separated attributes to read, or None for all the attributes.
+
+    Returns:
+        - resp_get_vnic_san_connectivity_policy_by_moid
+    """
+    api_instance = intersight_session.get_api(api_client, vnic_api.VnicApi)
+
+    # Only select the requested attributes.
+    kwargs = dict(moid=vnic_san_connectivity_policy_moid)
+    if select:
+        kwargs["select"] = select
+
+    try:
+        # Read a 'vnic.SanConnectivityPolicy' resource.
+        resp_get_vnic_san_connectivity_policy_by_moid = (
+            api_instance.get_vnic_san_connectivity_policy_by_moid(**kwargs)
+        )
+        print(resp_get_vnic_san_connectivity_policy_by_moid)
+
+        return resp_get_vnic_san_connectivity_policy_by_moid
+
+    except intersight.ApiException as exception:
+        print(
+            f"Exception when calling VnicApi->get_vnic_san_connectivity_policy_by_moid: {exception}\n"
+        )
+        sys.exit(1)
+
+
+###############################################################################
+#                   Read and Update San Connectivity Policy Profiles          #
+###############################################################################
+
+
+@tracing.traced
+def get_san_connectivity_policy_profiles(api_client, vnic_san_connectivity_policy_moid):
+    """Get the objects attached to a San Connectivity Policy, reading only its 'Profiles'.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - vnic_san_connectivity_policy_moid (string): moid of San Connectivity Policy.
+
+    Returns:
+        - profiles (list of tuples): object type and moid of each Server Profile or Server Profile Template attached to the policy.
+    """
+    api_instance = intersight_session.get_api(api_client, vnic_api.VnicApi)
+
+    try:
+        # Read a 'vnic.SanConnectivityPolicy' resource, only selecting its 'Profiles'.
+        resp_get_vnic_san_connectivity_policy_by_moid = (
+            intersight_session.call_endpoint(
+                api_client,
+                api_instance.get_vnic_san_connectivity_policy_by_moid,
+                moid=vnic_san_connectivity_policy_moid,
+                select="Profiles",
+            )
+        )
+
+    except intersight.ApiException as exception:
+        print(
+            f"Exception when calling VnicApi->get_vnic_san_connectivity_policy_by_moid: {exception}\n"
+        )
+        sys.exit(1)
+
+    if isinstance(resp_get_vnic_san_connectivity_policy_by_moid, dict):
+        return [
+            (profile["ObjectType"], profile["Moid"])
+            for profile in resp_get_vnic_san_connectivity_policy_by_moid.get("Profiles")
+            or []
+        ]
+
+    return [
+        (profile.object_type, profile.moid)
+        for profile in resp_get_vnic_san_connectivity_policy_by_moid.profiles or []
+    ]
+
+
+@tracing.traced
+def update_san_connectivity_policy_profiles(
+    api_client, vnic_san_connectivity_policy_moid, profiles
+):
+    """Replace the objects attached to a San Connectivity Policy.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - vnic_san_connectivity_policy_moid (string): moid of San Connectivity Policy.
+        - profiles (list of tuples): object type and moid of each Server Profile or Server Profile Template to attach to the policy.
+
+    Returns:
+        - resp_update_vnic_san_connectivity_policy
+    """
+    api_instance = intersight_session.get_api(api_client, vnic_api.VnicApi)
+
+    try:
+        # Update a 'vnic.SanConnectivityPolicy' resource.
+        if intersight_session.raw_responses(api_client):
+            # Send the JSON body as is, without building an SDK model per attached object.
+            return intersight_session.send_json(
+                api_client,
+                api_instance.update_vnic_san_connectivity_policy_endpoint,
+                body={
+                    "ClassId": "vnic.SanConnectivityPolicy",
+                    "ObjectType": "vnic.SanConnectivityPolicy",
+                    "Moid": vnic_san_connectivity_policy_moid,
+                    "Profiles": [
+                        mo_ref_json(object_type, moid) for object_type, moid in profiles
+                    ],
+                },
+                moid=vnic_san_connectivity_policy_moid,
+            )
+
+        # 'VnicSanConnectivityPolicy' | The 'vnic.SanConnectivityPolicy' resource to update.
+        vnic_san_connectivity_policy = VnicSanConnectivityPolicy(
+            moid=vnic_san_connectivity_policy_moid,
+            profiles=[
+                MoMoRef(object_type=object_type, moid=moid)
+                for object_type, moid in profiles
+            ],
+        )
+
+        return api_instance.update_vnic_san_connectivity_policy(
+            vnic_san_connectivity_policy=vnic_san_connectivity_policy,
+            moid=vnic_san_connectivity_policy_moid,
+        )
+
+    except intersight.ApiException as exception:
+        print(
+            f"Exception when calling VnicApi->update_vnic_san_connectivity_policy: {exception}\n"
+        )
+        sys.exit(1)
+
+
+###############################################################################
+#              Detach San Connectivity Policy from Server Profile             #
+###############################################################################
+
+
+@tracing.traced
+def detach_san_connectivity_policy_from_server_profile(
+    api_client, vnic_san_connectivity_policy_moid, server_profile_moid
+):
+    """Detach a San Connectivity Policy from a Server Profile.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - server_profile_moid (string): moid of the Server Profile.
+        - vnic_san_connectivity_policy_moid (string): moid of San Connectivity Policy.
+
+    Returns:
+        - resp_detach_san_connectivity_policy_from_server_profile
+    """
+    rollback_log.record(
+        api_client,
+        "policy_detached",
+        vnic_san_connectivity_policy_moid=vnic_san_connectivity_policy_moid,
+        server_profile_moids=[server_profile_moid],
+    )
+
+    # Remove the Server Profile from the 'Profiles' of the policy.
+    profiles = [
+        profile
+        for profile in get_san_connectivity_policy_profiles(
+            api_client, vnic_san_connectivity_policy_moid
+        )
+        if profile[1] != server_profile_moid
+    ]
+
+    resp_detach_san_connectivity_policy_from_server_profile = (
+        update_san_connectivity_policy_profiles(
+            api_client, vnic_san_connectivity_policy_moid, profiles
+        )
+    )
+    print(
+        f"- Detaching San Connectivity Policy {vnic_san_connectivity_policy_moid} from Server Profile {server_profile_moid}."
+    )
+
+    return resp_detach_san_connectivity_policy_from_server_profile
+
+
+###############################################################################
+#         Detach San Connectivity Policy from Server Profiles (batched)       #
+###############################################################################
+
+
+@tracing.traced
+def detach_san_connectivity_policy_from_server_profiles(
+    api_client, vnic_san_connectivity_policy_moid, server_profile_moids
+):
+    """Detach a San Connectivity Policy from several Server Profiles with a single read and a single update of the policy.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - vnic_san_connectivity_policy_moid (string): moid of San Connectivity Policy.
+        - server_profile_moids (list of strings): moids of the Server Profiles.
+
+    Returns:
+        - resp_detach_san_connectivity_policy_from_server_profiles
+    """
+    rollback_log.record(
+        api_client,
+        "policy_detached",
+        vnic_san_connectivity_policy_moid=vnic_san_connectivity_policy_moid,
+        server_profile_moids=list(server_profile_moids),
+    )
+
+    # Remove all the Server Profiles of the batch from the 'Profiles' of the policy.
+    server_profile_moids = set(server_profile_moids)
+    profiles = [
+        profile
+        for profile in get_san_connectivity_policy_profiles(
+            api_client, vnic_san_connectivity_policy_moid
+        )
+        if profile[1] not in server_profile_moids
+    ]
+
+    resp_detach_san_connectivity_policy_from_server_profiles = (
+        update_san_connectivity_policy_profiles(
+            api_client, vnic_san_connectivity_policy_moid, profiles
+        )
+    )
+    print(
+        f"- Detaching San Connectivity Policy {vnic_san_connectivity_policy_moid} from {len(server_profile_moids)} Server Profiles."
+    )
+
+    return resp_detach_san_connectivity_policy_from_server_profiles
+
+
+###############################################################################
+#                     Get WWPN Pool moid from WWPN Pool name                  #
+###############################################################################
+
+
+@tracing.traced
+def get_wwpn_pool_moid_from_wwpn_pool_name(api_client, wwpn_pool_name):
+    """Get moid of WWPN Pool from its name.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - wwpn_pool_name (string): name of the WWPN Pool.
+
+    Returns:
+        - wwpn_pool_moid (string): moid of the WWPN Pool.
+    """
+    api_instance = intersight_session.get_api(api_client, fcpool_api.FcpoolApi)
+
+    # Create filter and only select the Moid of the WWPN Pool.
+    kwargs = dict(filter=f"Name eq '{wwpn_pool_name}'", select="Moid")
+
+    # Read a 'fcpool.Pool' resource with filter.
+    try:
+        wwpn_pool_result = api_instance.get_fcpool_pool_list(**kwargs)
+        wwpn_pool_moid = wwpn_pool_result.results[0].moid
+        print(f"- Moid of the WWPN Pool {wwpn_pool_name} is: {wwpn_pool_moid}.")
+
+        return wwpn_pool_moid
+
+    except intersight.ApiException as exception:
+        print(f"Exception when calling FcpoolApi->get_fcpool_pool_list: {exception}\n")
+        sys.exit(1)
+
+
+###############################################################################
+#                Get WWPN Pool moids from WWPN Pool names (batched)           #
+###############################################################################
+
+
+# Maximum number of names in the 'in' filter of a single list query.
+MAX_NAMES_PER_FILTER = 100
+
+
+@tracing.traced
+def get_wwpn_pool_moids_from_wwpn_pool_names(
+    api_client, wwpn_pool_names, organization_moid=None
+):
+    """Get moids of several WWPN Pools from their names with a single filtered list query.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - wwpn_pool_names (list of strings): names of the WWPN Pools.
+        - organization_moid (string): moid of the Organization of the WWPN Pools, to tell apart the pools of the same name in other Organizations.
+
+    Returns:
+        - wwpn_pool_moids (dictionary): moid of each WWPN Pool, indexed by WWPN Pool name.
+    """
+    api_instance = intersight_session.get_api(api_client, fcpool_api.FcpoolApi)
+
+    wwpn_pool_names = sorted(set(wwpn_pool_names))
+    wwpn_pool_moids = {}
+
+    for start in range(0, len(wwpn_pool_names), MAX_NAMES_PER_FILTER):
+        chunk = wwpn_pool_names[start : start + MAX_NAMES_PER_FILTER]
+        quoted_wwpn_pool_names = ", ".join(
+            f"'{wwpn_pool_name}'" for wwpn_pool_name in chunk
+        )
+
+        # Create filter and only select the Name and the Moid of the WWPN Pools.
+        kwargs = dict(
+            filter=organization_filter(
+                f"Name in ({quoted_wwpn_pool_names})", organization_moid
+            ),
+            select="Name,Moid",
+            top=len(chunk),
+        )
+
+        # Read the 'fcpool.Pool' resources with filter.
+        try:
+            wwpn_pool_result = api_instance.get_fcpool_pool_list(**kwargs)
+
+        except intersight.ApiException as exception:
+            print(
+                f"Exception when calling FcpoolApi->get_fcpool_pool_list: {exception}\n"
+            )
+            sys.exit(1)
+
+        for wwpn_pool in wwpn_pool_result.results:
+            wwpn_pool_moids[wwpn_pool.name] = wwpn_pool.moid
+            print(f"- Moid of the WWPN Pool {wwpn_pool.name} is: {wwpn_pool.moid}.")
+
+    # Report all the unknown WWPN Pools at once.
+    missing_wwpn_pool_names = [
+        wwpn_pool_name
+        for wwpn_pool_name in wwpn_pool_names
+        if wwpn_pool_name not in wwpn_pool_moids
+    ]
+    if missing_wwpn_pool_names:
+        print(
+            f"The following WWPN Pools were not found in Intersight: {', '.join(missing_wwpn_pool_names)}.\n"
+        )
+        sys.exit(1)
+
+    return wwpn_pool_moids
+
+
+###############################################################################
+#                    Get FC Pool Reservations of WWPN Pools                   #
+###############################################################################
+
+
+def get_fcpool_reservations_in_wwpn_pools(
+    api_client, wwpn_pool_moids, page_size=paginated_list.DEFAULT_PAGE_SIZE
+):
+    """Iterate lazily over the WWPN reservations of several WWPN Pools, read page by page.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - wwpn_pool_moids (list of strings): moids of the WWPN Pools.
+        - page_size (integer): number of reservations read per page.
+
+    Yields:
+        - fcpool_reservation (Intersight FcpoolReservation object, or dictionary with raw responses): reservation with only its Identity, Moid and Pool.
+    """
+    api_instance = intersight_session.get_api(api_client, fcpool_api.FcpoolApi)
+
+    quoted_wwpn_pool_moids = ", ".join(
+        f"'{wwpn_pool_moid}'" for wwpn_pool_moid in sorted(set(wwpn_pool_moids))
+    )
+    found = 0
+
+    # Read the 'fcpool.Reservation' resources with filter, only selecting the needed attributes.
+    try:
+        for fcpool_reservation in paginated_list.iterate(
+            api_client,
+            api_instance.get_fcpool_reservation_list,
+            page_size=page_size,
+            filter=f"Pool.Moid in ({quoted_wwpn_pool_moids}) and IdPurpose eq 'WWPN'",
+            select="Identity,Moid,Pool",
+        ):
+            found += 1
+            yield fcpool_reservation
+
+    except intersight.ApiException as exception:
+        print(
+            f"Exception when calling FcpoolApi->get_fcpool_reservation_list: {exception}\n"
+        )
+        sys.exit(1)
+
+    print(f"- Found {found} WWPN reservations.")
+
+
+###############################################################################
+#                      Get FC Pool Leases of WWPN Pools                       #
+###############################################################################
+
+
+def get_fcpool_leases_in_wwpn_pools(
+    api_client, wwpn_pool_moids, page_size=paginated_list.DEFAULT_PAGE_SIZE
+):
+    """Iterate lazily over the WWPN leases of several WWPN Pools, read page by page.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - wwpn_pool_moids (list of strings): moids of the WWPN Pools.
+        - page_size (integer): number of leases read per page.
+
+    Yields:
+        - fcpool_lease (Intersight FcpoolLease object, or dictionary with raw responses): lease with only its WwnId, Pool and Reservation.
+    """
+    api_instance = intersight_session.get_api(api_client, fcpool_api.FcpoolApi)
+
+    quoted_wwpn_pool_moids = ", ".join(
+        f"'{wwpn_pool_moid}'" for wwpn_pool_moid in sorted(set(wwpn_pool_moids))
+    )
+    found = 0
+
+    # Read the 'fcpool.Lease' resources with filter, only selecting the needed attributes.
+    try:
+        for fcpool_lease in paginated_list.iterate(
+            api_client,
+            api_instance.get_fcpool_lease_list,
+            page_size=page_size,
+            filter=f"Pool.Moid in ({quoted_wwpn_pool_moids}) and PoolPurpose eq 'WWPN'",
+            select="WwnId,Pool,Reservation",
+        ):
+            found += 1
+            yield fcpool_lease
+
+    except intersight.ApiException as exception:
+        print(f"Exception when calling FcpoolApi->get_fcpool_lease_list: {exception}\n")
+        sys.exit(1)
+
+    print(f"- Found {found} WWPN leases.")
+
+
+###############################################################################
+#                     Get ID Blocks of WWPN Pools                             #
+###############################################################################
+
+
+def get_wwpn_pools_id_blocks(api_client, page_size=paginated_list.DEFAULT_PAGE_SIZE):
+    """Iterate lazily over the WWPN Pools of the account with their ID blocks, read page by page.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - page_size (integer): number of WWPN Pools read per page.
+
+    Yields:
+        - wwpn_pool (Intersight FcpoolPool object, or dictionary with raw responses): WWPN Pool with only its Name and IdBlocks.
+    """
+    api_instance = intersight_session.get_api(api_client, fcpool_api.FcpoolApi)
+
+    found = 0
+
+    # Read the 'fcpool.Pool' resources with filter, only selecting the needed attributes.
+    try:
+        for wwpn_pool in paginated_list.iterate(
+            api_client,
+            api_instance.get_fcpool_pool_list,
+            page_size=page_size,
+            filter="PoolPurpose eq 'WWPN'",
+            select="Name,IdBlocks",
+        ):
+            found += 1
+            yield wwpn_pool
+
+    except intersight.ApiException as exception:
+        print(f"Exception when calling FcpoolApi->get_fcpool_pool_list: {exception}\n")
+        sys.exit(1)
+
+    print(f"- Found {found} WWPN Pools.")
+
+
+###############################################################################
+#                       Create FC Pool Reservations                           #
+###############################################################################
+
+
+@tracing.traced
+def create_fcpool_reservation(
+    api_client, organization_moid, wwpn_pool_moid, wwpn_to_reserve
+):
+    """Create a WWPN reservation in a WWPN Pool.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - organization_moid (string): moid of the Organization.
+        - wwpn_pool_moid (string): moid of the WWPN Pool.
+        - wwpn_to_reserve (string): WWPN to reserve.
+
+    Returns:
+        - resp_create_fcpool_reservation
+    """
+    api_instance = intersight_session.get_api(api_client, fcpool_api.FcpoolApi)
+
+    # Create 'Organization' object.
+    organization = MoMoRef(
+        object_type="organization.Organization",
+        moid=organization_moid,
+    )
+
+    # 'FcpoolReservation' | The 'fcpool.Reservation' resource to create.
+    fcpool_reservation = FcpoolReservation()
+
+    # Create 'fcpool.Pool' object.
+    wwpn_pool = MoMoRef(object_type="fcpool.Pool", moid=wwpn_pool_moid)
+
+    # Setting all the attributes for fcpool_reservation instance.
+    fcpool_reservation.allocation_type = "dynamic"
+    fcpool_reservation.identity = wwpn_to_reserve
+    fcpool_reservation.id_purpose = "WWPN"
+    fcpool_reservation.organization = organization
+    fcpool_reservation.pool = wwpn_pool
+
+    try:
+        # Create a 'fcpool.Reservation' resource.
+        resp_create_fcpool_reservation = intersight_session.call_endpoint(
+            api_client,
+            api_instance.create_fcpool_reservation,
+            fcpool_reservation=fcpool_reservation,
+        )
+        rollback_log.record(
+            api_client,
+            "created",
+            object_type="fcpool.Reservation",
+            moids=[intersight_session.moid_of(resp_create_fcpool_reservation)],
+        )
+        print(
+            f"- Creating a WWPN reservation for WWPN {wwpn_to_reserve} in WWPN Pool {wwpn_pool_moid}."
+        )
+
+        return resp_create_fcpool_reservation
 
     except intersight.ApiException as exception:
         print(
-            f"Exception when calling VnicApi->update_vnic_san_connectivity_policy: {exception}\n"
+            f"Exception when calling FcpoolApi->create_fcpool_reservation: {exception}\n"
+        )
+        sys.exit(1)
+
+
+###############################################################################
+#                  Create FC Pool Reservations (bulk.Request)                 #
+###############################################################################
+
+
+# Maximum number of sub-requests accepted by Intersight in a single 'bulk.Request'.
+MAX_BULK_SUB_REQUESTS = 100
+
+
+@tracing.traced
+def create_fcpool_reservations(
+    api_client,
+    organization_moid,
+    reservations,
+    wwpn_pool_moids,
+    chunk_size=MAX_BULK_SUB_REQUESTS,
+):
+    """Create many WWPN reservations with 'bulk.Request' resources of up to chunk_size reservations.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - organization_moid (string): moid of the Organization.
+        - reservations (list of dictionnaries): reservations to create, updated with their 'reservation_moid'. It has for format the following structure:
+            reservations = [{"vhba_name": "vhba_name","wwpn_to_reserve": "wwpn_to_reserve","wwpn_pool": "wwpn_pool"},...]
+        - wwpn_pool_moids (dictionary): moid of each WWPN Pool, indexed by WWPN Pool name.
+        - chunk_size (integer): maximum number of reservations per 'bulk.Request'.
+
+    Returns:
+        - failed_reservations (list of tuples): (reservation, error message) of each reservation that could not be created.
+    """
+    if not 1 <= chunk_size <= MAX_BULK_SUB_REQUESTS:
+        raise ValueError(
+            f"chunk_size must be between 1 and {MAX_BULK_SUB_REQUESTS}, got {chunk_size}."
+        )
+
+    failed_reservations = []
+
+    for start in range(0, len(reservations), chunk_size):
+        chunk = reservations[start : start + chunk_size]
+
+        # Create one 'fcpool.Reservation' per reservation, and keep processing the
+        # other reservations of the chunk when one of them fails.
+        results = run_bulk_request(
+            api_client=api_client,
+            verb="POST",
+            uri="/v1/fcpool/Reservations",
+            sub_requests=[
+                (
+                    None,
+                    {
+                        "ClassId": "fcpool.Reservation",
+                        "ObjectType": "fcpool.Reservation",
+                        "AllocationType": "dynamic",
+                        "Identity": reservation["wwpn_to_reserve"],
+                        "IdPurpose": "WWPN",
+                        "Organization": mo_ref_json(
+                            "organization.Organization", organization_moid
+                        ),
+                        "Pool": mo_ref_json(
+                            "fcpool.Pool", wwpn_pool_moids[reservation["wwpn_pool"]]
+                        ),
+                    },
+                )
+                for reservation in chunk
+            ],
+        )
+        print(f"- Creating {len(chunk)} WWPN reservations in a bulk request.")
+
+        # The results are returned in the same order as the sub-requests.
+        for reservation, (status, moid, error) in zip(chunk, results):
+            if 200 <= status < 300:
+                reservation["reservation_moid"] = moid
+            else:
+                failed_reservations.append((reservation, f"HTTP {status}: {error}"))
+
+        rollback_log.record(
+            api_client,
+            "created",
+            object_type="fcpool.Reservation",
+            moids=[moid for status, moid, _ in results if 200 <= status < 300],
+        )
+
+        for reservation in chunk[len(results) :]:
+            failed_reservations.append((reservation, "no result returned"))
+
+    for reservation, message in failed_reservations:
+        print(
+            f"- Failed to reserve WWPN {reservation['wwpn_to_reserve']} for vHBA {reservation['vhba_name']}: {message}."
+        )
+
+    return failed_reservations
+
+
+###############################################################################
+#              Associate FC Pool Reservations to Server Profile               #
+###############################################################################
+
+
+@tracing.traced
+def associate_fc_pool_reservations_to_server_profile(
+    api_client, reservations, server_profile_moid
+):
+    """Associate FC Pool Reservations to Server Profile.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - reservations (list of dictionnaries): object used to describe FC Pool Reservations. It has for format the following structure:
+            reservations = [{"vhba_name": "vhba_name","wwpn_to_reserve": "wwpn_to_reserve","wwpn_pool": "wwpn_pool","reservation_moid": "reservation_moid"},...]
+        - server_profile_moid (string): moid of the Server Profile.
+
+    Returns:
+        - resp_associate_fc_pool_reservations_to_server_profile
+    """
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
+
+    # 'ServerProfile' | The 'server.Profile' resource to update.
+    server_profile = ServerProfile(moid=server_profile_moid)
+
+    # Create 'FcpoolReservationReference' object.
+    server_profile.reservation_references = []
+    for reservation in reservations:
+        fcpool_reservation_reference = PoolReservationReference(
+            object_type="fcpool.ReservationReference",
+            class_id="fcpool.ReservationReference",
+            consumer_type="Vhba",
+            consumer_name=reservation["vhba_name"],
+            reservation_moid=reservation["reservation_moid"],
+        )
+
+        # Update attribute reservation_references of server_profile instance
+        server_profile.reservation_references.append(fcpool_reservation_reference)
+
+    # Record the reservations referenced before, to restore them on rollback.
+    rollback_log.record(
+        api_client,
+        "associated",
+        reservations_by_server_profile_moid={
+            server_profile_moid: [
+                {
+                    "vhba_name": reservation["vhba_name"],
+                    "reservation_moid": reservation["reservation_moid"],
+                }
+                for reservation in reservations
+            ]
+        },
+        previous_reservations_by_server_profile_moid=get_server_profiles_reservation_references(
+            api_client,
+            rollback_log.existed_before_the_run(api_client, [server_profile_moid]),
+        ),
+    )
+
+    try:
+        # Update a 'server.Profile' resource.
+        resp_associate_fc_pool_reservations_to_server_profile = (
+            intersight_session.call_endpoint(
+                api_client,
+                api_instance.update_server_profile,
+                server_profile=server_profile,
+                moid=server_profile_moid,
+            )
+        )
+        print(
+            f"- Associating FC Pool Reservations to Server Profile {server_profile_moid}."
         )
+
+        return resp_associate_fc_pool_reservations_to_server_profile
+
+    except intersight.ApiException as exception:
+        print(f"Exception when calling ServerApi->update_server_profile: {exception}\n")
         sys.exit(1)
 
 
+###############################################################################
+#                Attach San Connectivity Policy to Server Profile             #
+###############################################################################
+
+
+@tracing.traced
+def attach_san_connectivity_policy_from_server_profile(
+    api_client, server_profile_moid, vnic_san_connectivity_policy_moid
+):
+    """Attach a San Connectivity Policy to Server Profile.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - server_profile_moid (string): moid of the Server Profile.
+        - vnic_san_connectivity_policy_moid (string): moid of the San Connectivity Policy.
+
+    Returns:
+        - resp_attach_san_connectivity_policy_from_server_profile
+    """
+    # Append the Server Profile to the 'Profiles' of the policy, unless already attached.
+    profiles = get_san_connectivity_policy_profiles(
+        api_client, vnic_san_connectivity_policy_moid
+    )
+    if all(moid != server_profile_moid for _, moid in profiles):
+        profiles.append(("server.Profile", server_profile_moid))
+
+    resp_attach_san_connectivity_policy_from_server_profile = (
+        update_san_connectivity_policy_profiles(
+            api_client, vnic_san_connectivity_policy_moid, profiles
+        )
+    )
+    print(
+        f"- Attaching San Connectivity Policy {vnic_san_connectivity_policy_moid} to Server Profile {server_profile_moid}."
+    )
+
+    return resp_attach_san_connectivity_policy_from_server_profile
+
+
+###############################################################################
+#          Attach San Connectivity Policy to Server Profiles (batched)        #
+###############################################################################
+
+
+@tracing.traced
+def attach_san_connectivity_policy_to_server_profiles(
+    api_client, server_profile_moids, vnic_san_connectivity_policy_moid
+):
+    """Attach a San Connectivity Policy to several Server Profiles with a single read and a single update of the policy.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - server_profile_moids (list of strings): moids of the Server Profiles.
+        - vnic_san_connectivity_policy_moid (string): moid of the San Connectivity Policy.
+
+    Returns:
+        - resp_attach_san_connectivity_policy_to_server_profiles
+    """
+    # Append the Server Profiles not already attached to the 'Profiles' of the policy.
+    profiles = get_san_connectivity_policy_profiles(
+        api_client, vnic_san_connectivity_policy_moid
+    )
+    attached_server_profile_moids = {moid for _, moid in profiles}
+    for server_profile_moid in server_profile_moids:
+        if server_profile_moid not in attached_server_profile_moids:
+            profiles.append(("server.Profile", server_profile_moid))
+            attached_server_profile_moids.add(server_profile_moid)
+
+    resp_attach_san_connectivity_policy_to_server_profiles = (
+        update_san_connectivity_policy_profiles(
+            api_client, vnic_san_connectivity_policy_moid, profiles
+        )
+    )
+    print(
+        f"- Attaching San Connectivity Policy {vnic_san_connectivity_policy_moid} to {len(server_profile_moids)} Server Profiles."
+    )
+
+    return resp_attach_san_connectivity_policy_to_server_profiles
+
+
+###############################################################################
+#                     Update Server Profiles (bulk.Request)                   #
+###############################################################################
+
+
+@tracing.traced
+def update_server_profiles(
+    api_client, server_profiles, chunk_size=MAX_BULK_SUB_REQUESTS
+):
+    """Update many Server Profiles with 'bulk.Request' resources of up to chunk_size PATCH sub-requests.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - server_profiles (dictionary): JSON body holding the attributes to update with the attribute names of the API, indexed by Server Profile moid.
+        - chunk_size (integer): maximum number of Server Profiles updated per 'bulk.Request'.
+
+    Returns:
+        - failed_server_profile_moids (dictionary): error message of each Server Profile that could not be updated, indexed by Server Profile moid.
+    """
+    if not 1 <= chunk_size <= MAX_BULK_SUB_REQUESTS:
+        raise ValueError(
+            f"chunk_size must be between 1 and {MAX_BULK_SUB_REQUESTS}, got {chunk_size}."
+        )
+
+    server_profile_moids = list(server_profiles)
+    failed_server_profile_moids = {}
+
+    for start in range(0, len(server_profile_moids), chunk_size):
+        chunk = server_profile_moids[start : start + chunk_size]
+
+        # Send one PATCH per Server Profile, and keep processing the other Server
+        # Profiles of the chunk when one of them fails.
+        results = run_bulk_request(
+            api_client=api_client,
+            verb="PATCH",
+            uri="/v1/server/Profiles",
+            sub_requests=[
+                (server_profile_moid, server_profiles[server_profile_moid])
+                for server_profile_moid in chunk
+            ],
+        )
+        print(f"- Updating {len(chunk)} Server Profiles in a bulk request.")
+
+        # The results are returned in the same order as the sub-requests.
+        for server_profile_moid, (status, _, error) in zip(chunk, results):
+            if not 200 <= status < 300:
+                failed_server_profile_moids[
+                    server_profile_moid
+                ] = f"HTTP {status}: {error}"
+
+        for server_profile_moid in chunk[len(results) :]:
+            failed_server_profile_moids[server_profile_moid] = "no result returned"
+
+    for server_profile_moid, message in failed_server_profile_moids.items():
+        print(f"- Failed to update Server Profile {server_profile_moid}: {message}.")
+
+    return failed_server_profile_moids
+
+
+@tracing.traced
+def detach_server_profiles_from_template(
+    api_client,
+    server_profile_moids,
+    server_profile_template_moid=None,
+    chunk_size=MAX_BULK_SUB_REQUESTS,
+):
+    """Detach many Server Profiles from their Server Profile Template with 'bulk.Request' resources.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - server_profile_moids (list of strings): moids of the Server Profiles.
+        - server_profile_template_moid (string): moid of the Server Profile Template, recorded to attach the Server Profiles back on rollback.
+        - chunk_size (integer): maximum number of Server Profiles updated per 'bulk.Request'.
+
+    Returns:
+        - failed_server_profile_moids (dictionary): error message of each Server Profile that could not be detached, indexed by Server Profile moid.
+    """
+    rollback_log.record(
+        api_client,
+        "detached_from_template",
+        server_profile_moids=list(server_profile_moids),
+        server_profile_template_moid=server_profile_template_moid,
+    )
+
+    return update_server_profiles(
+        api_client=api_client,
+        server_profiles={
+            server_profile_moid: {
+                "ClassId": "server.Profile",
+                "ObjectType": "server.Profile",
+                "SrcTemplate": None,
+            }
+            for server_profile_moid in server_profile_moids
+        },
+        chunk_size=chunk_size,
+    )
+
+
+@tracing.traced
+def associate_fc_pool_reservations_to_server_profiles(
+    api_client, reservations_by_server_profile_moid, chunk_size=MAX_BULK_SUB_REQUESTS
+):
+    """Associate the FC Pool Reservations of many Server Profiles with 'bulk.Request' resources.
+
+    The reservations referenced before by the Server Profiles that existed before
+    the run are read first and recorded in the Rollback Log, if any.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - reservations_by_server_profile_moid (dictionary): reservations holding their 'reservation_moid', indexed by Server Profile moid.
+        - chunk_size (integer): maximum number of Server Profiles updated per 'bulk.Request'.
+
+    Returns:
+        - failed_server_profile_moids (dictionary): error message of each Server Profile whose reservations could not be associated, indexed by Server Profile moid.
+    """
+    rollback_log.record(
+        api_client,
+        "associated",
+        reservations_by_server_profile_moid={
+            server_profile_moid: [
+                {
+                    "vhba_name": reservation["vhba_name"],
+                    "reservation_moid": reservation["reservation_moid"],
+                }
+                for reservation in reservations
+            ]
+            for server_profile_moid, reservations in reservations_by_server_profile_moid.items()
+        },
+        previous_reservations_by_server_profile_moid=get_server_profiles_reservation_references(
+            api_client,
+            rollback_log.existed_before_the_run(
+                api_client, list(reservations_by_server_profile_moid)
+            ),
+        ),
+    )
+
+    return update_server_profiles(
+        api_client=api_client,
+        server_profiles={
+            server_profile_moid: {
+                "ClassId": "server.Profile",
+                "ObjectType": "server.Profile",
+                "ReservationReferences": [
+                    {
+                        "ClassId": "fcpool.ReservationReference",
+                        "ObjectType": "fcpool.ReservationReference",
+                        "ConsumerType": "Vhba",
+                        "ConsumerName": reservation["vhba_name"],
+                        "ReservationMoid": reservation["reservation_moid"],
+                    }
+                    for reservation in reservations
+                ],
+            }
+            for server_profile_moid, reservations in reservations_by_server_profile_moid.items()
+        },
+        chunk_size=chunk_size,
+    )
+
+
+###############################################################################
+#                       Delete Resources (bulk.Request)                       #
+###############################################################################
+
+
+@tracing.traced
+def delete_resources(api_client, uri, moids):
+    """Delete up to MAX_BULK_SUB_REQUESTS resources of the same type with a single 'bulk.Request'.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - uri (string): URI of the resources, e.g. '/v1/server/Profiles'.
+        - moids (list of strings): moids of the resources to delete.
+
+    Returns:
+        - failed_moids (dictionary): error message of each resource that could not be deleted, indexed by moid. Resources already deleted are not failures.
+    """
+    if not 1 <= len(moids) <= MAX_BULK_SUB_REQUESTS:
+        raise ValueError(
+            f"Between 1 and {MAX_BULK_SUB_REQUESTS} resources can be deleted per 'bulk.Request', got {len(moids)}."
+        )
+
+    # Send one DELETE per resource, and keep deleting the other resources when one of them fails.
+    results = run_bulk_request(
+        api_client=api_client,
+        verb="DELETE",
+        uri=uri,
+        sub_requests=[(moid, None) for moid in moids],
+    )
+    print(f"- Deleting {len(moids)} resources of {uri} in a bulk request.")
+
+    # The results are returned in the same order as the sub-requests.
+    failed_moids = {
+        moid: f"HTTP {status}: {error}"
+        for moid, (status, _, error) in zip(moids, results)
+        if not 200 <= status < 300 and status != 404
+    }
+    for moid in moids[len(results) :]:
+        failed_moids[moid] = "no result returned"
+
+    return failed_moids
+
+
 ###############################################################################
 #                Attach Server Profile to Server Profile Template             #
 ###############################################################################
 
 
+@tracing.traced
 def attach_server_profile_to_server_profile_template(
     api_client, server_profile_moid, server_profile_template_moid
 ):
@@ -618,7 +1986,7 @@ def attach_server_profile_to_server_profile_template(
         - resp_attach_server_profile_to_server_profile_template
     """
     ### Bulk Mo Merger ###
-    api_instance = bulk_api.BulkApi(api_client)
+    api_instance = intersight_session.get_api(api_client, bulk_api.BulkApi)
 
     # 'BulkMoMerger' | The 'bulk.MoMerger' resource to create.
     server_profile_attached_to_template = BulkMoMerger()
@@ -641,8 +2009,10 @@ def attach_server_profile_to_server_profile_template(
     try:
         # Create a 'bulk.MoMerger' resource.
         resp_attach_server_profile_to_server_profile_template_mo_merger = (
-            api_instance.create_bulk_mo_merger(
-                bulk_mo_merger=server_profile_attached_to_template
+            intersight_session.call_endpoint(
+                api_client,
+                api_instance.create_bulk_mo_merger,
+                bulk_mo_merger=server_profile_attached_to_template,
             )
         )
 
@@ -650,8 +2020,32 @@ def attach_server_profile_to_server_profile_template(
         print(f"Exception when calling BulkApi->create_bulk_mo_merger: {exception}\n")
         sys.exit(1)
 
+    # Only attach the Server Profile once the policies of the template are merged into it.
+    async_result_moid = get_async_result_moid(
+        resp_attach_server_profile_to_server_profile_template_mo_merger
+    )
+    if async_result_moid is not None:
+        error, target_errors = get_bulk_result_errors(
+            wait_for_bulk_results(api_client, [async_result_moid])[async_result_moid]
+        )
+    else:
+        error = None
+        target_errors = [
+            (server_profile_moid, message or status)
+            for status, _, message in get_bulk_results(
+                resp_attach_server_profile_to_server_profile_template_mo_merger,
+                "Responses",
+            )
+            if not 200 <= status < 300
+        ]
+    if error or target_errors:
+        print(
+            f"Failed to merge Server Profile Template {server_profile_template_moid} into Server Profile {server_profile_moid}: {error or ', '.join(str(message) for _, message in target_errors)}\n"
+        )
+        sys.exit(1)
+
     ### Update Server Profile ###
-    api_instance = server_api.ServerApi(api_client)
+    api_instance = intersight_session.get_api(api_client, server_api.ServerApi)
 
     # 'ServerProfile' | The 'server.Profile' resource to update.
     server_profile = ServerProfile(moid=server_profile_moid)
@@ -667,8 +2061,11 @@ def attach_server_profile_to_server_profile_template(
     try:
         # Update a 'server.Profile' resource.
         resp_attach_server_profile_to_server_profile_template = (
-            api_instance.update_server_profile(
-                server_profile=server_profile, moid=server_profile_moid
+            intersight_session.call_endpoint(
+                api_client,
+                api_instance.update_server_profile,
+                server_profile=server_profile,
+                moid=server_profile_moid,
             )
         )
         print(
@@ -682,6 +2079,130 @@ def attach_server_profile_to_server_profile_template(
         sys.exit(1)
 
 
+###############################################################################
+#          Attach Server Profiles to Server Profile Template (batched)        #
+###############################################################################
+
+
+@tracing.traced
+def attach_server_profiles_to_server_profile_template(
+    api_client,
+    server_profile_moids,
+    server_profile_template_moid,
+    chunk_size=MAX_BULK_SUB_REQUESTS,
+):
+    """Attach many Server Profiles to a Server Profile Template with one 'bulk.MoMerger' and one 'bulk.Request' per chunk.
+
+    All the 'bulk.MoMerger' are sent before waiting for the ones still executing,
+    and the Server Profiles whose merge failed are not attached.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - server_profile_moids (list of strings): moids of the Server Profiles.
+        - server_profile_template_moid (string): moid of the Server Profile Template.
+        - chunk_size (integer): maximum number of Server Profiles per 'bulk.MoMerger' and per 'bulk.Request'.
+
+    Returns:
+        - failed_server_profile_moids (dictionary): error message of each Server Profile that could not be attached, indexed by Server Profile moid.
+    """
+    api_instance = intersight_session.get_api(api_client, bulk_api.BulkApi)
+
+    async_result_moids = {}
+    failed_merges = {}
+
+    for start in range(0, len(server_profile_moids), chunk_size):
+        chunk = server_profile_moids[start : start + chunk_size]
+
+        try:
+            # Create a 'bulk.MoMerger' resource, with all the Server Profiles of the chunk as targets.
+            # The JSON body is sent as is, without building an SDK model per target.
+            resp_create_bulk_mo_merger = intersight_session.send_json(
+                api_client,
+                api_instance.create_bulk_mo_merger_endpoint,
+                body={
+                    "ClassId": "bulk.MoMerger",
+                    "ObjectType": "bulk.MoMerger",
+                    "MergeAction": "Replace",
+                    "Sources": [
+                        mo_ref_json(
+                            "server.ProfileTemplate", server_profile_template_moid
+                        )
+                    ],
+                    "Targets": [
+                        mo_ref_json("server.Profile", server_profile_moid)
+                        for server_profile_moid in chunk
+                    ],
+                },
+            )
+
+        except intersight.ApiException as exception:
+            print(
+                f"Exception when calling BulkApi->create_bulk_mo_merger: {exception}\n"
+            )
+            sys.exit(1)
+
+        async_result_moid = get_async_result_moid(resp_create_bulk_mo_merger)
+        if async_result_moid is not None:
+            async_result_moids[async_result_moid] = chunk
+            continue
+
+        # The responses of a 'bulk.MoMerger' executed synchronously are returned in the same order as the targets.
+        failed_merges.update(
+            (server_profile_moid, error or status)
+            for server_profile_moid, (status, _, error) in zip(
+                chunk, get_bulk_results(resp_create_bulk_mo_merger, "Responses")
+            )
+            if not 200 <= status < 300
+        )
+
+    # Wait for all the 'bulk.MoMerger' still executing, and keep aside the Server Profiles whose merge failed.
+    if async_result_moids:
+        for async_result_moid, bulk_result in wait_for_bulk_results(
+            api_client, list(async_result_moids)
+        ).items():
+            chunk = async_result_moids[async_result_moid]
+            error, target_errors = get_bulk_result_errors(bulk_result)
+            if error:
+                failed_merges.update(
+                    (server_profile_moid, error) for server_profile_moid in chunk
+                )
+
+            # A target error without the moid of its target cannot be matched to a
+            # Server Profile, so none of the Server Profiles of the chunk is attached.
+            for target_moid, target_error in target_errors:
+                if target_moid is not None:
+                    failed_merges[target_moid] = target_error
+                else:
+                    failed_merges.update(
+                        (server_profile_moid, target_error)
+                        for server_profile_moid in chunk
+                        if server_profile_moid not in failed_merges
+                    )
+
+    # Update the 'src_template' of all the other Server Profiles.
+    failed_server_profile_moids = update_server_profiles(
+        api_client=api_client,
+        server_profiles={
+            server_profile_moid: {
+                "ClassId": "server.Profile",
+                "ObjectType": "server.Profile",
+                "SrcTemplate": mo_ref_json(
+                    "server.ProfileTemplate", server_profile_template_moid
+                ),
+            }
+            for server_profile_moid in server_profile_moids
+            if server_profile_moid not in failed_merges
+        },
+        chunk_size=chunk_size,
+    )
+    failed_server_profile_moids.update(failed_merges)
+    print(
+        f"- Attaching {len(server_profile_moids) - len(failed_server_profile_moids)} Server Profiles to Server Profile Template {server_profile_template_moid}."
+    )
+
+    return failed_server_profile_moids
+
+
 ##############################################################################
 #                                   Main                                     #
 ##############################################################################
@@ -5,6 +5,8 @@ import datetime
 import intersight
 import urllib3
 
+from intersight_api_functions import intersight_session
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
@@ -13,18 +15,27 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 ##############################################################################
 
 
-def authenticate_to_intersight(intersight_key_id, intersight_secret_key_path):
+def authenticate_to_intersight(
+    intersight_key_id,
+    intersight_secret_key_path,
+    intersight_host="https://intersight.com",
+    max_connections=None,
+    raw_responses=False,
+):
     """Authenticate to Cisco Intersight with Key ID and Secret Key from Cisco Intersight API.
 
     Args:
     - intersight_key_id (string): Cisco Intersight API Key ID.
     - intersight_secret_key_path (string): Path to the Cisco Intersight API Private Key.
+    - intersight_host (string): URL of the Cisco Intersight server.
+    - max_connections (integer): number of workers sending requests concurrently to the Cisco Intersight server, or None for the default connection pool of the SDK.
+    - raw_responses (boolean): whether the hot-path calls read the JSON responses without deserializing them into SDK models.
 
     Returns:
-    - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+    - api_client (IntersightSession object): ApiClient object used to communicate with the Intersight server, sharing its connections and API instances between all the operations.
     """
     configuration = intersight.Configuration(
-        host="https://intersight.com",
+        host=intersight_host,
         signing_info=intersight.signing.HttpSigningConfiguration(
             key_id=intersight_key_id,
             private_key_path=intersight_secret_key_path,
@@ -58,7 +69,9 @@ def authenticate_to_intersight(intersight_key_id, intersight_secret_key_path):
 
     configuration.verify_ssl = False
 
-    api_client = intersight.ApiClient(configuration)
+    api_client = intersight_session.IntersightSession(
+        configuration, max_connections=max_connections, raw_responses=raw_responses
+    )
     api_client.set_default_header("Content-Type", "application/json")
 
     return api_client
@@ -0,0 +1,235 @@
+"""Module providing a session sharing one ApiClient and its API instances between all the operations."""
+#!/usr/bin/env python3
+
+import json
+import keyword
+import re
+import threading
+
+import intersight
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Besides its own requests, each worker may prefetch the next page of the two
+# paginated lists streamed into a reconciliation on a helper thread.
+PREFETCH_CONNECTIONS_PER_WORKER = 2
+
+# The CompletionTracker polls the asynchronous bulk operations on its own thread.
+POLLER_CONNECTIONS = 1
+
+
+###############################################################################
+#                              Intersight Session                             #
+###############################################################################
+
+
+class IntersightSession(intersight.ApiClient):
+    """ApiClient shared by all the operations and workers of a run.
+
+    - Its urllib3 connection pool is sized to the concurrency of the run, and
+      never below the default of the SDK, so that the keep-alive connections are
+      reused instead of being opened and discarded when more requests are in
+      flight than the pool holds.
+    - The API instances (ServerApi, VnicApi, FcpoolApi, BulkApi, ...) are created
+      once and shared: they only hold the description of the endpoints.
+
+    - With raw responses, the hot-path functions of intersight_api_methods read
+      the JSON bodies themselves instead of letting the SDK deserialize them into
+      model objects, which costs far more CPU than the request itself.
+
+    A session is an ApiClient, so it is accepted by all the functions of
+    intersight_api_methods, and the RequestGovernor and the Tracer install on it.
+    """
+
+    def __init__(self, configuration, max_connections=None, raw_responses=False):
+        """Create an Intersight Session.
+
+        Args:
+            - configuration (Intersight Configuration object): configuration of the ApiClient.
+            - max_connections (integer): number of workers sending requests concurrently, or None for the default pool of the SDK.
+            - raw_responses (boolean): whether the hot-path calls skip the deserialization of the responses into SDK models.
+        """
+        # The pool is only ever enlarged from the default of the SDK, to hold a
+        # connection for each worker and each helper thread sending requests.
+        if max_connections:
+            configuration.connection_pool_maxsize = max(
+                configuration.connection_pool_maxsize,
+                max_connections * (1 + PREFETCH_CONNECTIONS_PER_WORKER)
+                + POLLER_CONNECTIONS,
+            )
+
+        super().__init__(configuration)
+        self.raw_responses = raw_responses
+        self._api_instances = {}
+        self._api_instances_lock = threading.Lock()
+
+    def api(self, api_class):
+        """Get the shared instance of an API of the SDK.
+
+        Args:
+            - api_class (class): API of the SDK, e.g. server_api.ServerApi.
+
+        Returns:
+            - api_instance: instance of the API bound to the session.
+        """
+        with self._api_instances_lock:
+            api_instance = self._api_instances.get(api_class)
+            if api_instance is None:
+                api_instance = api_class(self)
+                self._api_instances[api_class] = api_instance
+
+            return api_instance
+
+
+def get_api(api_client, api_class):
+    """Get an instance of an API of the SDK, shared if the ApiClient is an Intersight Session.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - api_class (class): API of the SDK, e.g. server_api.ServerApi.
+
+    Returns:
+        - api_instance: instance of the API bound to the ApiClient.
+    """
+    if isinstance(api_client, IntersightSession):
+        return api_client.api(api_class)
+
+    return api_class(api_client)
+
+
+###############################################################################
+#                                Raw Responses                                #
+###############################################################################
+
+
+def raw_responses(api_client):
+    """Tell whether the responses of an ApiClient are read as raw JSON.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+
+    Returns:
+        - raw_responses (boolean): True for an Intersight Session created with raw_responses.
+    """
+    return getattr(api_client, "raw_responses", False)
+
+
+def call_endpoint(api_client, endpoint, **kwargs):
+    """Call an endpoint of the SDK, reading its response as raw JSON if the ApiClient has raw responses.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - endpoint (callable): endpoint of an API instance, e.g. api_instance.update_server_profile.
+        - kwargs: arguments of the endpoint.
+
+    Returns:
+        - response (SDK model object, or dictionary with raw responses): response of the endpoint.
+    """
+    if raw_responses(api_client):
+        return read_json(endpoint(_preload_content=False, **kwargs))
+
+    return endpoint(**kwargs)
+
+
+def send_json(api_client, endpoint, body, moid=None):
+    """Send a JSON body to an endpoint of the SDK and read the response as raw JSON.
+
+    The body is neither type checked nor converted into SDK models: building the
+    models of the sub-requests of a 'bulk.Request' or of the 'Profiles' of a
+    policy costs milliseconds per object.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - endpoint (SDK Endpoint object): endpoint of an API instance, e.g. api_instance.create_bulk_request_endpoint.
+        - body (dictionary): JSON body with the attribute names of the API (e.g. 'ClassId', 'Moid').
+        - moid (string): moid of the resource, for the endpoints of a single resource.
+
+    Returns:
+        - body (dictionary): parsed JSON body of the response.
+    """
+    return read_json(
+        api_client.call_api(
+            endpoint.settings["endpoint_path"],
+            endpoint.settings["http_method"],
+            path_params={"Moid": moid} if moid is not None else {},
+            header_params={
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+            },
+            body=body,
+            auth_settings=endpoint.settings["auth"],
+            _return_http_data_only=True,
+            _preload_content=False,
+        )
+    )
+
+
+def moid_of(response):
+    """Get the moid of a resource returned by call_endpoint().
+
+    Args:
+        - response (SDK model object or dictionary): resource.
+
+    Returns:
+        - moid (string): moid of the resource.
+    """
+    if isinstance(response, dict):
+        return response["Moid"]
+
+    return response.moid
+
+
+def attribute_of(response, name):
+    """Get an attribute of a resource returned by call_endpoint(), by its name in the API.
+
+    Args:
+        - response (SDK model object or dictionary): resource.
+        - name (string): name of the attribute in the API, e.g. 'SrcTemplate'.
+
+    Returns:
+        - value (SDK model object, dictionary, list or scalar): value of the attribute, None if it is not set.
+    """
+    if isinstance(response, dict):
+        return response.get(name)
+
+    # The SDK prefixes the attributes named after a Python keyword, e.g. '_from' for 'From'.
+    attribute_name = re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+    if keyword.iskeyword(attribute_name):
+        attribute_name = f"_{attribute_name}"
+
+    return response.get(attribute_name)
+
+
+def read_json(response):
+    """Read the JSON body of a response requested with _preload_content=False.
+
+    The body is parsed with orjson when it is installed, and the connection is
+    released to the pool once the body is read.
+
+    Args:
+        - response (urllib3 HTTPResponse object): response returned by an endpoint of the SDK.
+
+    Returns:
+        - body (dictionary): parsed JSON body, with the attribute names of the API (e.g. 'Moid', 'Profiles').
+    """
+    try:
+        data = response.data
+    finally:
+        response.release_conn()
+
+    if not data:
+        return {}
+
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
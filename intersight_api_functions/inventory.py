@@ -0,0 +1,659 @@
+"""Module providing the streaming of the Server Profiles of an inventory, and their groups."""
+#!/usr/bin/env python3
+
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from intersight_api_functions import wwpn_index
+
+
+# Parameters shared by the Server Profiles of a group.
+GROUP_PARAMETERS = [
+    "organization",
+    "server_profile_template",
+    "san_connectivity_policy",
+]
+
+# Default number of Server Profiles planned and provisioned together.
+DEFAULT_INVENTORY_WINDOW = 1000
+
+# File extensions read as JSON lines, one Server Profile per line.
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+# Number of characters read from the inventory file at once.
+READ_SIZE = 65536
+
+# Largest WWPN, as an integer.
+MAX_WWPN = 2**64 - 1
+
+
+###############################################################################
+#                                 JSON Stream                                 #
+###############################################################################
+
+
+class JsonStream:
+    """Incremental reader of a JSON document, decoding one value at a time.
+
+    The objects and arrays of the document are walked key by key and element by
+    element, and the values are decoded with json.JSONDecoder.raw_decode() from a
+    buffer refilled as needed: only the value being decoded is held in memory.
+    """
+
+    def __init__(self, file, read_size=READ_SIZE):
+        """Create a JSON Stream.
+
+        Args:
+            - file (file object): text file of the JSON document.
+            - read_size (integer): number of characters read at once.
+        """
+        self.file = file
+        self.read_size = read_size
+        self.buffer = ""
+        self.position = 0
+        # Number of characters of the file before the buffer.
+        self.offset = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Append the next characters of the file to the buffer, dropping the consumed ones.
+
+        Returns:
+            - filled (boolean): False at the end of the file.
+        """
+        chunk = self.file.read(self.read_size)
+        self.offset += self.position
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        self.eof = not chunk
+
+        return bool(chunk)
+
+    def peek(self):
+        """Skip the whitespaces and get the next character.
+
+        Returns:
+            - character (string): next character, or '' at the end of the document.
+        """
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in " \t\r\n"
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    def expect(self, characters):
+        """Consume the next character, which must be one of the given ones.
+
+        Args:
+            - characters (string): expected characters.
+
+        Returns:
+            - character (string): consumed character.
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(
+                f"expected one of {characters!r} at character {self.offset + self.position}, found {character or 'the end of the file'!r}"
+            )
+        self.position += 1
+
+        return character
+
+    def value(self):
+        """Decode the next value.
+
+        Returns:
+            - value: decoded value.
+
+        Raises:
+            - ValueError: the next value is not valid JSON.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.position)
+
+            except json.JSONDecodeError as exception:
+                if not self._fill():
+                    raise ValueError(
+                        f"{exception.msg} at character {self.offset + exception.pos}"
+                    ) from None
+                continue
+
+            # A number at the end of the buffer may continue in the next characters.
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+
+            self.position = end
+            return value
+
+    def keys(self):
+        """Walk the next object key by key: the value of each key must be read before the next key.
+
+        Yields:
+            - key (string): each key of the object.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+    def elements(self):
+        """Walk the next array element by element: each element must be read before the next one.
+
+        Yields:
+            - index (integer): index of each element of the array.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.expect(",]") == "]":
+                return
+
+
+###############################################################################
+#                              Inventory Streams                              #
+###############################################################################
+
+
+def read_inventory(path):
+    """Read the Server Profiles of an inventory file one at a time.
+
+    A file with a .jsonl or .ndjson extension holds a JSON object per line, read
+    by read_json_lines_inventory(). Any other file is the inventory_config JSON
+    document, streamed by read_json_inventory().
+
+    Args:
+        - path (string): path of the inventory file.
+
+    Yields:
+        - parameters (dictionary): Organization, Server Profile Template and San Connectivity Policy of the Server Profile.
+        - server_profile (dictionary): Server Profile with its 'server_profile_name' and 'reservations'.
+    """
+    try:
+        if path.lower().endswith(JSON_LINES_EXTENSIONS):
+            yield from read_json_lines_inventory(path)
+        else:
+            yield from read_json_inventory(path)
+
+    except ValueError as exception:
+        print(f"The inventory {path} is not valid: {exception}.\n")
+        sys.exit(1)
+
+
+def read_json_lines_inventory(path):
+    """Read the Server Profiles of a JSON lines inventory file one at a time.
+
+    Each line is either a Server Profile, a 'server_profile_range' expanded by
+    expand_server_profile_range(), or an object setting the parameters of the
+    following Server Profiles. A Server Profile or a range can also carry its own
+    parameters.
+
+    Args:
+        - path (string): path of the inventory file.
+
+    Yields:
+        - parameters (dictionary): Organization, Server Profile Template and San Connectivity Policy of the Server Profile.
+        - server_profile (dictionary): Server Profile with its 'server_profile_name' and 'reservations'.
+    """
+    parameters = {}
+
+    with open(path, "r", encoding="utf-8") as inventory_file:
+        for line_number, line in enumerate(inventory_file, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                entry = json.loads(line)
+
+            except json.JSONDecodeError as exception:
+                raise ValueError(f"line {line_number}: {exception}") from None
+
+            if "server_profile_range" in entry:
+                range_parameters = dict(
+                    parameters,
+                    **{
+                        parameter: entry[parameter]
+                        for parameter in GROUP_PARAMETERS
+                        if parameter in entry
+                    },
+                )
+                try:
+                    server_profiles = expand_server_profile_range(
+                        entry["server_profile_range"]
+                    )
+                except ValueError as exception:
+                    raise ValueError(f"line {line_number}: {exception}") from None
+
+                for server_profile in server_profiles:
+                    yield group_parameters(
+                        range_parameters, server_profile
+                    ), server_profile
+                continue
+
+            if "server_profile_name" not in entry:
+                parameters = dict(
+                    parameters,
+                    **{
+                        parameter: entry[parameter]
+                        for parameter in GROUP_PARAMETERS
+                        if parameter in entry
+                    },
+                )
+                continue
+
+            yield group_parameters(
+                dict(
+                    parameters,
+                    **{
+                        parameter: entry.pop(parameter)
+                        for parameter in GROUP_PARAMETERS
+                        if parameter in entry
+                    },
+                ),
+                entry,
+            ), entry
+
+
+def read_json_inventory(path):
+    """Read the Server Profiles of an inventory_config JSON file one at a time.
+
+    The Server Profiles are yielded as they are parsed when their parameters are
+    final: the global parameters all come before the global 'server_profiles', or
+    the three parameters of a group come before its 'server_profiles'. Otherwise,
+    the Server Profiles are held until the end of their group, or until the end of
+    the file when they inherit global parameters not read yet. The
+    'server_profile_range' of the inventory or of a group is expanded in the same
+    way, and only its generator is held.
+
+    Args:
+        - path (string): path of the inventory file.
+
+    Yields:
+        - parameters (dictionary): Organization, Server Profile Template and San Connectivity Policy of the Server Profile.
+        - server_profile (dictionary): Server Profile with its 'server_profile_name' and 'reservations'.
+    """
+    global_parameters = {}
+    # Server Profiles held until the end of the file, with the parameters of their group.
+    held_server_profiles = []
+
+    def complete(parameters):
+        return all(parameter in parameters for parameter in GROUP_PARAMETERS)
+
+    def read_server_profiles(stream):
+        for _ in stream.elements():
+            yield stream.value()
+
+    def checked(parameters, server_profiles):
+        checked_parameters = None
+        for server_profile in server_profiles:
+            if checked_parameters is None:
+                checked_parameters = group_parameters(parameters, server_profile)
+            yield checked_parameters, server_profile
+
+    with open(path, "r", encoding="utf-8") as inventory_file:
+        stream = JsonStream(inventory_file)
+
+        for key in stream.keys():
+            if key in GROUP_PARAMETERS:
+                global_parameters[key] = stream.value()
+
+            elif key == "server_profiles" and complete(global_parameters):
+                yield from checked(global_parameters, read_server_profiles(stream))
+
+            elif key == "server_profiles":
+                held_server_profiles.append(({}, list(read_server_profiles(stream))))
+
+            elif key == "server_profile_range" and complete(global_parameters):
+                yield from checked(
+                    global_parameters, expand_server_profile_range(stream.value())
+                )
+
+            elif key == "server_profile_range":
+                held_server_profiles.append(
+                    ({}, expand_server_profile_range(stream.value()))
+                )
+
+            elif key == "groups":
+                for _ in stream.elements():
+                    parameters = {}
+                    held = []
+                    for group_key in stream.keys():
+                        if group_key in GROUP_PARAMETERS:
+                            parameters[group_key] = stream.value()
+                        elif group_key == "server_profiles" and complete(parameters):
+                            yield from checked(parameters, read_server_profiles(stream))
+                        elif group_key == "server_profiles":
+                            held.append(list(read_server_profiles(stream)))
+                        elif group_key == "server_profile_range" and complete(
+                            parameters
+                        ):
+                            yield from checked(
+                                parameters,
+                                expand_server_profile_range(stream.value()),
+                            )
+                        elif group_key == "server_profile_range":
+                            held.append(expand_server_profile_range(stream.value()))
+                        else:
+                            stream.value()
+
+                    # The missing parameters of the group are final once the global ones are all read.
+                    if complete(parameters) or complete(global_parameters):
+                        resolved = dict(global_parameters, **parameters)
+                        for server_profiles in held:
+                            yield from checked(resolved, server_profiles)
+                    else:
+                        held_server_profiles.extend(
+                            (parameters, server_profiles) for server_profiles in held
+                        )
+
+            else:
+                stream.value()
+
+        if stream.peek():
+            raise ValueError("unexpected characters after the inventory")
+
+    # The Server Profiles read before the global parameters.
+    for parameters, server_profiles in held_server_profiles:
+        yield from checked(dict(global_parameters, **parameters), server_profiles)
+
+
+def iterate_inventory(inventory_config):
+    """Iterate over the Server Profiles of an inventory already loaded in memory.
+
+    Args:
+        - inventory_config (dictionary): content of the inventory_config JSON file.
+
+    Yields:
+        - parameters (dictionary): Organization, Server Profile Template and San Connectivity Policy of the Server Profile.
+        - server_profile (dictionary): Server Profile with its 'server_profile_name' and 'reservations'.
+    """
+    for group in [inventory_config] + (inventory_config.get("groups") or []):
+        if not group.get("server_profiles") and not group.get("server_profile_range"):
+            continue
+
+        parameters = group_parameters(
+            {
+                parameter: group.get(parameter, inventory_config.get(parameter))
+                for parameter in GROUP_PARAMETERS
+            }
+        )
+        for server_profile in group.get("server_profiles") or []:
+            yield parameters, server_profile
+
+        if group.get("server_profile_range"):
+            try:
+                server_profiles = expand_server_profile_range(
+                    group["server_profile_range"]
+                )
+            except ValueError as exception:
+                print(f"The inventory is not valid: {exception}.\n")
+                sys.exit(1)
+
+            for server_profile in server_profiles:
+                yield parameters, server_profile
+
+
+def group_parameters(parameters, server_profile=None):
+    """Check that the parameters of a Server Profile or of a group are all set.
+
+    Args:
+        - parameters (dictionary): Organization, Server Profile Template and San Connectivity Policy.
+        - server_profile (dictionary): Server Profile using the parameters, if any.
+
+    Returns:
+        - parameters (dictionary): the parameters, in the order of GROUP_PARAMETERS.
+    """
+    missing_parameters = [
+        parameter for parameter in GROUP_PARAMETERS if not parameters.get(parameter)
+    ]
+    if missing_parameters:
+        owner = (
+            f"Server Profile {server_profile['server_profile_name']}"
+            if server_profile
+            else "A group of the inventory"
+        )
+        print(f"{owner} has no {', '.join(missing_parameters)}.\n")
+        sys.exit(1)
+
+    return {parameter: parameters[parameter] for parameter in GROUP_PARAMETERS}
+
+
+###############################################################################
+#                           Server Profile Ranges                             #
+###############################################################################
+
+
+def expand_server_profile_range(server_profile_range):
+    """Check a range of Server Profiles and expand it lazily.
+
+    The Server Profile of index i (from 'first_index', 1 by default, to
+    'first_index' + 'count' - 1) is named after 'server_profile_name_pattern',
+    formatted with 'index', and the vHBA of each entry of 'reservations'
+    reserves 'first_wwpn' + (i - 'first_index') * 'wwpn_stride' ('wwpn_stride' is
+    1 by default) in its 'wwpn_pool'.
+
+    Args:
+        - server_profile_range (dictionary): range of Server Profiles, e.g. {"server_profile_name_pattern": "SP-{index:04d}",
+          "count": 1000, "reservations": [{"vhba_name": "vHBA-A", "first_wwpn": "20:00:00:25:B5:0A:00:01", "wwpn_pool": "WWPN-A"}]}.
+
+    Returns:
+        - server_profiles (generator of dictionaries): Server Profiles with their 'server_profile_name' and 'reservations'.
+
+    Raises:
+        - ValueError: the range is not valid.
+    """
+    if not isinstance(server_profile_range, dict):
+        raise ValueError("a server_profile_range must be an object")
+
+    name_pattern = server_profile_range.get("server_profile_name_pattern")
+    count = server_profile_range.get("count")
+    first_index = server_profile_range.get("first_index", 1)
+    reservations = server_profile_range.get("reservations") or []
+
+    if not isinstance(name_pattern, str) or "{index" not in name_pattern:
+        raise ValueError(
+            "the server_profile_name_pattern of a server_profile_range must contain {index}"
+        )
+    # The JSON booleans are Python integers, and are not accepted as numbers.
+    if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+        raise ValueError(
+            "the count of a server_profile_range must be a positive integer"
+        )
+    if (
+        isinstance(first_index, bool)
+        or not isinstance(first_index, int)
+        or first_index < 0
+    ):
+        raise ValueError(
+            "the first_index of a server_profile_range must be a non-negative integer"
+        )
+    try:
+        name_pattern.format(index=first_index)
+    except (AttributeError, KeyError, IndexError, TypeError, ValueError) as exception:
+        raise ValueError(
+            f"the server_profile_name_pattern {name_pattern!r} is not valid: {exception}"
+        ) from None
+
+    # First WWPN and stride of each vHBA, checked before the first Server Profile is expanded.
+    vhbas = []
+    for reservation in reservations:
+        if (
+            not isinstance(reservation, dict)
+            or not reservation.get("vhba_name")
+            or not reservation.get("wwpn_pool")
+        ):
+            raise ValueError(
+                "each reservation of a server_profile_range must have a vhba_name and a wwpn_pool"
+            )
+        first_wwpn = wwpn_index.parse_wwpn(reservation.get("first_wwpn"))
+        wwpn_stride = reservation.get("wwpn_stride", 1)
+        if (
+            isinstance(wwpn_stride, bool)
+            or not isinstance(wwpn_stride, int)
+            or wwpn_stride < 1
+        ):
+            raise ValueError(
+                f"the wwpn_stride of vHBA {reservation['vhba_name']} must be a positive integer"
+            )
+        if first_wwpn + (count - 1) * wwpn_stride > MAX_WWPN:
+            raise ValueError(
+                f"the WWPNs of vHBA {reservation['vhba_name']} go beyond {wwpn_index.format_wwpn(MAX_WWPN)}"
+            )
+        vhbas.append(
+            (
+                reservation["vhba_name"],
+                first_wwpn,
+                wwpn_stride,
+                reservation["wwpn_pool"],
+            )
+        )
+
+    def server_profiles():
+        for offset in range(count):
+            yield {
+                "server_profile_name": name_pattern.format(index=first_index + offset),
+                "reservations": [
+                    {
+                        "vhba_name": vhba_name,
+                        "wwpn_to_reserve": wwpn_index.format_wwpn(
+                            first_wwpn + offset * wwpn_stride
+                        ),
+                        "wwpn_pool": wwpn_pool,
+                    }
+                    for vhba_name, first_wwpn, wwpn_stride, wwpn_pool in vhbas
+                ],
+            }
+
+    return server_profiles()
+
+
+###############################################################################
+#                              Inventory Groups                               #
+###############################################################################
+
+
+def inventory_groups(server_profiles):
+    """Group Server Profiles sharing the same Organization, Server Profile Template and San Connectivity Policy.
+
+    The groups with the same parameters are merged, so that their lookups, clones
+    and policy updates are batched together.
+
+    Args:
+        - server_profiles (iterable of tuples): parameters and Server Profile, as yielded by read_inventory().
+
+    Returns:
+        - groups (list of dictionaries): groups in the format of a single-group inventory, in the order of the inventory.
+    """
+    groups = {}
+    for parameters, server_profile in server_profiles:
+        groups.setdefault(
+            tuple(parameters.values()), dict(parameters, server_profiles=[])
+        )["server_profiles"].append(server_profile)
+
+    return list(groups.values())
+
+
+def unique_server_profiles(server_profiles):
+    """Check that the Server Profiles of a stream have unique names.
+
+    The journal and the reports identify the Server Profiles by name, so a name
+    read twice stops the run.
+
+    Args:
+        - server_profiles (iterable of tuples): parameters and Server Profile, as yielded by read_inventory().
+
+    Yields:
+        - parameters (dictionary): Organization, Server Profile Template and San Connectivity Policy of the Server Profile.
+        - server_profile (dictionary): Server Profile with its 'server_profile_name' and 'reservations'.
+    """
+    server_profile_names = set()
+    for parameters, server_profile in server_profiles:
+        server_profile_name = server_profile["server_profile_name"]
+        if server_profile_name in server_profile_names:
+            print(
+                f"The Server Profile {server_profile_name} appears more than once in the inventory.\n"
+            )
+            sys.exit(1)
+        server_profile_names.add(server_profile_name)
+
+        yield parameters, server_profile
+
+
+def inventory_windows(server_profiles, size=DEFAULT_INVENTORY_WINDOW):
+    """Split a stream of Server Profiles into windows planned and provisioned one after the other.
+
+    Args:
+        - server_profiles (iterable of tuples): parameters and Server Profile, as yielded by read_inventory().
+        - size (integer): maximum number of Server Profiles per window.
+
+    Yields:
+        - groups (list of dictionaries): groups of the Server Profiles of each window, as returned by inventory_groups().
+    """
+    window = []
+    empty = True
+
+    for parameters, server_profile in unique_server_profiles(server_profiles):
+        window.append((parameters, server_profile))
+        if len(window) >= size:
+            yield inventory_groups(window)
+            window = []
+            empty = False
+
+    if window or empty:
+        yield inventory_groups(window)
+
+
+def read_ahead(iterable):
+    """Iterate while the next item is produced by a background thread.
+
+    Args:
+        - iterable (iterable): items, e.g. the windows of an inventory being parsed.
+
+    Yields:
+        - item: each item of the iterable.
+    """
+    iterator = iter(iterable)
+    end = object()
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        next_item = executor.submit(next, iterator, end)
+        while True:
+            item = next_item.result()
+            if item is end:
+                return
+
+            next_item = executor.submit(next, iterator, end)
+            yield item
+
+    finally:
+        # An iteration closed early does not wait for the item being produced.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
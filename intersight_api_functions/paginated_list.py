@@ -0,0 +1,94 @@
+"""Module providing the lazy iteration over the results of a paginated Intersight list query."""
+#!/usr/bin/env python3
+
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from intersight_api_functions import intersight_session, tracing
+
+
+# Number of objects read per page of a paginated list query.
+DEFAULT_PAGE_SIZE = 1000
+
+
+###############################################################################
+#                               Paginated List                                #
+###############################################################################
+
+
+def iterate(api_client, list_method, page_size=DEFAULT_PAGE_SIZE, **kwargs):
+    """Iterate lazily over the results of a list query, read page by page with $top and $skip.
+
+    The first page also asks for the total number of results with
+    '$inlinecount=allpages', so that the iteration stops without reading an empty
+    page. The next page is read by a background thread while the current page is
+    consumed: at most two pages are held in memory, whatever the number of
+    results. The results are ordered by Moid unless another order is given.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - list_method (callable): list endpoint of an API instance, e.g. api_instance.get_server_profile_list.
+        - page_size (integer): number of objects read per page.
+        - kwargs: other arguments of the list query, e.g. filter and select.
+
+    Yields:
+        - result (SDK model object, or dictionary with raw responses): each object returned by the list query.
+
+    Raises:
+        - intersight.ApiException: a page could not be read.
+    """
+    kwargs.setdefault("orderby", "Moid")
+
+    # The requests of each page are traced as an operation named after the list endpoint.
+    @tracing.traced
+    @functools.wraps(list_method)
+    def read_page(skip, inlinecount=None):
+        page_kwargs = dict(kwargs, top=page_size, skip=skip)
+        if inlinecount is not None:
+            page_kwargs["inlinecount"] = inlinecount
+
+        result = intersight_session.call_endpoint(
+            api_client, list_method, **page_kwargs
+        )
+        if isinstance(result, dict):
+            return result.get("Results") or [], result.get("Count")
+
+        return result.get("results") or [], result.get("count")
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        page, count = read_page(0, inlinecount="allpages")
+        read = 0
+
+        while page:
+            read += len(page)
+            has_next_page = (
+                read < count if count is not None else len(page) == page_size
+            )
+
+            # Prefetch the next page in the context of the consumer, to keep its tracing tags.
+            next_page = (
+                executor.submit(contextvars.copy_context().run, read_page, read)
+                if has_next_page
+                else None
+            )
+
+            yield from page
+
+            if next_page is None:
+                return
+
+            page, _ = next_page.result()
+
+    finally:
+        # An iteration closed early does not wait for a prefetched page.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
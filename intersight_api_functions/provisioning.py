@@ -0,0 +1,417 @@
+"""Module providing the pipeline provisioning the Server Profiles cloned from a Server Profile Template."""
+#!/usr/bin/env python3
+
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from intersight_api_functions import (
+    checkpoint_journal,
+    intersight_api_methods,
+    intersight_session,
+    tracing,
+)
+
+
+###############################################################################
+#                                 Workers                                     #
+###############################################################################
+
+
+def run_on_workers(function, items, workers):
+    """Call a function on each item, on a bounded pool of threads.
+
+    The first exception raised by a call (including the SystemExit raised by the
+    functions of intersight_api_methods) cancels the pending calls and is re-raised.
+
+    Args:
+        - function (callable): function called with each item.
+        - items (list): items to process.
+        - workers (integer): maximum number of concurrent calls.
+
+    Returns:
+        - results (list): results of the calls, in the order of the items.
+    """
+    if workers <= 1:
+        return [function(item) for item in items]
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(function, item) for item in items]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
+
+        return [future.result() for future in futures]
+
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+###############################################################################
+#                          Provisioning Pipeline                              #
+###############################################################################
+
+
+class ProvisioningPipeline:
+    """Steps provisioning the Server Profiles freshly cloned from a Server Profile Template.
+
+    Each Server Profile goes through the following steps: detach from the Server
+    Profile Template, detach from the San Connectivity Policy, create the WWPN
+    reservations, associate them, attach to the San Connectivity Policy and
+    attach back to the Server Profile Template. The steps are called by the
+    operations of an execution_plan.ExecutionPlan, in the order of their
+    dependencies.
+
+    The Server Profiles are independent except for the shared San Connectivity
+    Policy: its updates are either serialized with a lock, or coalesced into a
+    single update for the whole batch.
+    """
+
+    def __init__(
+        self,
+        api_client,
+        organization_moid,
+        san_connectivity_policy_moid,
+        server_profile_template_moid,
+        wwpn_pool_moids,
+        workers=1,
+        coalesce_policy_updates=False,
+        bulk_reservations=False,
+        bulk_profile_updates=False,
+        journal=None,
+    ):
+        """Create a Provisioning Pipeline.
+
+        Args:
+            - api_client (Intersight ApiClient object): ApiClient object shared by all the workers.
+            - organization_moid (string): moid of the Organization, or None until resolved by the lookups of an Execution Plan.
+            - san_connectivity_policy_moid (string): moid of the San Connectivity Policy, or None until resolved.
+            - server_profile_template_moid (string): moid of the Server Profile Template, or None until resolved.
+            - wwpn_pool_moids (dictionary): moid of each WWPN Pool, indexed by WWPN Pool name, filled in place when resolved.
+            - workers (integer): number of Server Profiles provisioned concurrently.
+            - coalesce_policy_updates (boolean): update the San Connectivity Policy once for all the Server Profiles.
+            - bulk_reservations (boolean): create the WWPN reservations of all the Server Profiles with 'bulk.Request' resources.
+            - bulk_profile_updates (boolean): update all the Server Profiles with 'bulk.Request' resources, and attach them to the Server Profile Template with one 'bulk.MoMerger' per chunk.
+            - journal (CheckpointJournal object): journal recording the completed steps, which are skipped.
+        """
+        self.api_client = api_client
+        self.organization_moid = organization_moid
+        self.san_connectivity_policy_moid = san_connectivity_policy_moid
+        self.server_profile_template_moid = server_profile_template_moid
+        self.wwpn_pool_moids = wwpn_pool_moids
+        self.workers = workers
+        self.coalesce_policy_updates = coalesce_policy_updates
+        self.bulk_reservations = bulk_reservations
+        self.bulk_profile_updates = bulk_profile_updates
+        self.journal = journal or checkpoint_journal.CheckpointJournal()
+        self.failed_server_profiles = {}
+        self._san_connectivity_policy_lock = threading.Lock()
+
+    @tracing.for_server_profile
+    def detach_from_template(self, server_profile_name, server_profile_moid):
+        """Detach a Server Profile from the Server Profile Template.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - server_profile_moid (string): moid of the Server Profile.
+        """
+        if self.journal.is_done(server_profile_name, "detached"):
+            return
+
+        intersight_api_methods.detach_server_profile_from_template(
+            api_client=self.api_client,
+            server_profile_moid=server_profile_moid,
+            server_profile_template_moid=self.server_profile_template_moid,
+        )
+        self.journal.record(server_profile_name, "detached")
+
+    @tracing.for_server_profile
+    def detach_policy(self, server_profile_name, server_profile_moid):
+        """Detach the San Connectivity Policy from a Server Profile.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - server_profile_moid (string): moid of the Server Profile.
+        """
+        if self.journal.is_done(server_profile_name, "policy_detached"):
+            return
+
+        with self._san_connectivity_policy_lock:
+            intersight_api_methods.detach_san_connectivity_policy_from_server_profile(
+                api_client=self.api_client,
+                server_profile_moid=server_profile_moid,
+                vnic_san_connectivity_policy_moid=self.san_connectivity_policy_moid,
+            )
+        self.journal.record(server_profile_name, "policy_detached")
+
+    @tracing.for_server_profile
+    def reserve_wwpn(self, server_profile_name, reservation):
+        """Create the WWPN reservation of a vHBA, unless it already holds a 'reservation_moid'.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - reservation (dictionnary): reservation of the vHBA, updated with its 'reservation_moid'.
+        """
+        if reservation.get("reservation_moid"):
+            return
+
+        resp_create_fcpool_reservation = (
+            intersight_api_methods.create_fcpool_reservation(
+                api_client=self.api_client,
+                organization_moid=self.organization_moid,
+                wwpn_pool_moid=self.wwpn_pool_moids[reservation["wwpn_pool"]],
+                wwpn_to_reserve=reservation["wwpn_to_reserve"],
+            )
+        )
+
+        reservation["reservation_moid"] = intersight_session.moid_of(
+            resp_create_fcpool_reservation
+        )
+        self.journal.record_reservation(server_profile_name, reservation)
+
+    @tracing.for_server_profile
+    def associate_reservations(
+        self, server_profile_name, server_profile_moid, reservations
+    ):
+        """Associate the reservations to a Server Profile.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - server_profile_moid (string): moid of the Server Profile.
+            - reservations (list of dictionnaries): reservations of the Server Profile, holding their 'reservation_moid'.
+        """
+        if self.journal.is_done(server_profile_name, "associated"):
+            return
+
+        intersight_api_methods.associate_fc_pool_reservations_to_server_profile(
+            api_client=self.api_client,
+            reservations=reservations,
+            server_profile_moid=server_profile_moid,
+        )
+        self.journal.record(server_profile_name, "associated")
+
+    @tracing.for_server_profile
+    def attach_policy(self, server_profile_name, server_profile_moid):
+        """Attach the San Connectivity Policy to a Server Profile.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - server_profile_moid (string): moid of the Server Profile.
+        """
+        if self.journal.is_done(server_profile_name, "policy_attached"):
+            return
+
+        with self._san_connectivity_policy_lock:
+            intersight_api_methods.attach_san_connectivity_policy_from_server_profile(
+                api_client=self.api_client,
+                server_profile_moid=server_profile_moid,
+                vnic_san_connectivity_policy_moid=self.san_connectivity_policy_moid,
+            )
+        self.journal.record(server_profile_name, "policy_attached")
+
+    @tracing.for_server_profile
+    def attach(self, server_profile_name, server_profile_moid):
+        """Attach a Server Profile back to the Server Profile Template.
+
+        Args:
+            - server_profile_name (string): name of the Server Profile.
+            - server_profile_moid (string): moid of the Server Profile.
+        """
+        if self.journal.is_done(server_profile_name, "attached"):
+            return
+
+        intersight_api_methods.attach_server_profile_to_server_profile_template(
+            api_client=self.api_client,
+            server_profile_moid=server_profile_moid,
+            server_profile_template_moid=self.server_profile_template_moid,
+        )
+        self.journal.record(server_profile_name, "attached")
+
+    def detach_policy_in_batch(self, jobs):
+        """Detach the San Connectivity Policy from all the Server Profiles with a single policy update.
+
+        Args:
+            - jobs (list of tuples): name, moid and reservations of each Server Profile.
+        """
+        jobs = [
+            job for job in jobs if not self.journal.is_done(job[0], "policy_detached")
+        ]
+        if not jobs:
+            return
+
+        intersight_api_methods.detach_san_connectivity_policy_from_server_profiles(
+            api_client=self.api_client,
+            vnic_san_connectivity_policy_moid=self.san_connectivity_policy_moid,
+            server_profile_moids=[job[1] for job in jobs],
+        )
+        for job in jobs:
+            self.journal.record(job[0], "policy_detached")
+
+    def attach_policy_in_batch(self, jobs):
+        """Attach the San Connectivity Policy to all the Server Profiles with a single policy update.
+
+        Args:
+            - jobs (list of tuples): name, moid and reservations of each Server Profile.
+        """
+        jobs = [
+            job for job in jobs if not self.journal.is_done(job[0], "policy_attached")
+        ]
+        if not jobs:
+            return
+
+        intersight_api_methods.attach_san_connectivity_policy_to_server_profiles(
+            api_client=self.api_client,
+            server_profile_moids=[job[1] for job in jobs],
+            vnic_san_connectivity_policy_moid=self.san_connectivity_policy_moid,
+        )
+        for job in jobs:
+            self.journal.record(job[0], "policy_attached")
+
+    def reserve_in_bulk(self, jobs):
+        """Create the WWPN reservations of all the Server Profiles with 'bulk.Request' resources.
+
+        Args:
+            - jobs (list of tuples): name, moid and reservations of each Server Profile.
+
+        Returns:
+            - jobs (list of tuples): jobs of the Server Profiles whose reservations were all created.
+        """
+        for server_profile_name, _, reservations in jobs:
+            self.journal.restore_reservations(server_profile_name, reservations)
+
+        reservations_to_create = [
+            reservation
+            for _, _, reservations in jobs
+            for reservation in reservations
+            if not reservation.get("reservation_moid")
+        ]
+        failed_reservations = intersight_api_methods.create_fcpool_reservations(
+            api_client=self.api_client,
+            organization_moid=self.organization_moid,
+            reservations=reservations_to_create,
+            wwpn_pool_moids=self.wwpn_pool_moids,
+        )
+        created_reservation_ids = {
+            id(reservation) for reservation in reservations_to_create
+        } - {id(reservation) for reservation, _ in failed_reservations}
+
+        remaining_jobs = []
+        for server_profile_name, server_profile_moid, reservations in jobs:
+            for reservation in reservations:
+                if id(reservation) in created_reservation_ids:
+                    self.journal.record_reservation(server_profile_name, reservation)
+
+            if all(reservation.get("reservation_moid") for reservation in reservations):
+                remaining_jobs.append(
+                    (server_profile_name, server_profile_moid, reservations)
+                )
+            else:
+                self.failed_server_profiles[
+                    server_profile_name
+                ] = "WWPN reservation failed"
+
+        return remaining_jobs
+
+    def _update_in_bulk(self, jobs, step, update):
+        """Run a step for all the Server Profiles with a single bulk function, and record it.
+
+        Args:
+            - jobs (list of tuples): name, moid and reservations of each Server Profile.
+            - step (string): name of the step in the journal.
+            - update (callable): bulk function called with the jobs whose step is not completed, returning the error message of each failed Server Profile indexed by moid.
+
+        Returns:
+            - jobs (list of tuples): jobs of the Server Profiles whose step is completed.
+        """
+        pending_jobs = [job for job in jobs if not self.journal.is_done(job[0], step)]
+        pending_server_profile_names = {job[0] for job in pending_jobs}
+        failed_server_profile_moids = update(pending_jobs) if pending_jobs else {}
+
+        remaining_jobs = []
+        for job in jobs:
+            if job[1] in failed_server_profile_moids:
+                self.failed_server_profiles[
+                    job[0]
+                ] = f"{step} failed: {failed_server_profile_moids[job[1]]}"
+                continue
+
+            if job[0] in pending_server_profile_names:
+                self.journal.record(job[0], step)
+            remaining_jobs.append(job)
+
+        return remaining_jobs
+
+    def detach_in_bulk(self, jobs):
+        """Detach all the Server Profiles from the Server Profile Template with 'bulk.Request' resources.
+
+        Args:
+            - jobs (list of tuples): name, moid and reservations of each Server Profile.
+
+        Returns:
+            - jobs (list of tuples): jobs of the Server Profiles detached.
+        """
+        return self._update_in_bulk(
+            jobs,
+            "detached",
+            lambda pending_jobs: intersight_api_methods.detach_server_profiles_from_template(
+                api_client=self.api_client,
+                server_profile_moids=[job[1] for job in pending_jobs],
+                server_profile_template_moid=self.server_profile_template_moid,
+            ),
+        )
+
+    def associate_in_bulk(self, jobs):
+        """Associate the reservations of all the Server Profiles with 'bulk.Request' resources.
+
+        Args:
+            - jobs (list of tuples): name, moid and reservations of each Server Profile, holding their 'reservation_moid'.
+
+        Returns:
+            - jobs (list of tuples): jobs of the Server Profiles whose reservations are associated.
+        """
+        return self._update_in_bulk(
+            jobs,
+            "associated",
+            lambda pending_jobs: intersight_api_methods.associate_fc_pool_reservations_to_server_profiles(
+                api_client=self.api_client,
+                reservations_by_server_profile_moid={
+                    job[1]: job[2] for job in pending_jobs
+                },
+            ),
+        )
+
+    def attach_in_bulk(self, jobs):
+        """Attach all the Server Profiles back to the Server Profile Template with 'bulk.MoMerger' and 'bulk.Request' resources.
+
+        Args:
+            - jobs (list of tuples): name, moid and reservations of each Server Profile.
+
+        Returns:
+            - jobs (list of tuples): jobs of the Server Profiles attached.
+        """
+        return self._update_in_bulk(
+            jobs,
+            "attached",
+            lambda pending_jobs: intersight_api_methods.attach_server_profiles_to_server_profile_template(
+                api_client=self.api_client,
+                server_profile_moids=[job[1] for job in pending_jobs],
+                server_profile_template_moid=self.server_profile_template_moid,
+            ),
+        )
+
+    def execute(self, plan):
+        """Run the operations of an Execution Plan on the worker pool, as soon as their dependencies are completed.
+
+        Args:
+            - plan (ExecutionPlan object): plan whose operations call the steps of the pipeline.
+        """
+        plan.execute(self.workers)
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,275 @@
+"""Module providing the reconciliation of the inventory with the existing Intersight objects."""
+#!/usr/bin/env python3
+
+import threading
+
+from intersight_api_functions import intersight_session
+
+
+###############################################################################
+#                                 Reconcile                                   #
+###############################################################################
+
+
+class ExistingObjects:
+    """Existing Server Profiles and WWPN reservations referenced by an inventory, read once for all its windows and groups.
+
+    The names, WWPNs and WWPN Pools of the Server Profiles of the inventory are
+    added first. The reservations of the requested WWPNs are kept while the
+    reservations of the WWPN Pools are streamed, by the WWPN pre-flight or by the
+    first reconciliation of their Organization. The Server Profiles of each
+    Organization are streamed once, keeping only the Server Profiles of the
+    inventory and the consumers of the kept reservations: the memory grows with
+    the inventory, not with the number of objects of the account.
+    """
+
+    def __init__(self):
+        """Create an empty index of the Existing Objects."""
+        self.server_profile_names = {}
+        self.wwpn_pool_names = {}
+        self.requested_wwpns = set()
+        self.fcpool_reservations_by_identity = {}
+        self.consumers_by_reservation_moid = {}
+        self.server_profiles_by_name = {}
+        self.read_wwpn_pool_moids = set()
+        self.read_organization_names = set()
+        self.planned_organization_names = set()
+        self._lock = threading.Lock()
+
+    def add_server_profile(self, organization_name, server_profile):
+        """Add a Server Profile of the inventory, whose existing objects are kept.
+
+        Args:
+            - organization_name (string): name of the Organization of the Server Profile.
+            - server_profile (dictionary): Server Profile of the inventory.
+        """
+        self.server_profile_names.setdefault(organization_name, set()).add(
+            server_profile["server_profile_name"]
+        )
+        for reservation in server_profile["reservations"]:
+            self.requested_wwpns.add(reservation["wwpn_to_reserve"].upper())
+            self.wwpn_pool_names.setdefault(organization_name, set()).add(
+                reservation["wwpn_pool"]
+            )
+
+    def add_inventory(self, server_profiles):
+        """Add all the Server Profiles of an inventory.
+
+        Args:
+            - server_profiles (iterable of tuples): parameters and Server Profile, as yielded by inventory.read_inventory().
+        """
+        for parameters, server_profile in server_profiles:
+            self.add_server_profile(parameters["organization"], server_profile)
+
+    def keep_fcpool_reservations(self, wwpn_pool_moids, existing_fcpool_reservations):
+        """Keep the reservations of the requested WWPNs while streaming the reservations of WWPN Pools.
+
+        Args:
+            - wwpn_pool_moids (list of strings): moids of the WWPN Pools whose reservations are streamed.
+            - existing_fcpool_reservations (iterable of Intersight FcpoolReservation objects or dictionaries): WWPN reservations of the WWPN Pools.
+
+        Yields:
+            - fcpool_reservation: each reservation of the stream.
+        """
+        for fcpool_reservation in existing_fcpool_reservations:
+            identity = intersight_session.attribute_of(fcpool_reservation, "Identity")
+            if identity.upper() in self.requested_wwpns:
+                self.fcpool_reservations_by_identity[identity.upper()] = (
+                    intersight_session.moid_of(fcpool_reservation),
+                    intersight_session.moid_of(
+                        intersight_session.attribute_of(fcpool_reservation, "Pool")
+                    ),
+                )
+            yield fcpool_reservation
+
+        self.read_wwpn_pool_moids.update(wwpn_pool_moids)
+
+    def is_read(self, organization_name):
+        """Tell whether the existing objects of an Organization are already read.
+
+        Args:
+            - organization_name (string): name of the Organization.
+
+        Returns:
+            - read (boolean): True once read_organization() completed for the Organization.
+        """
+        return organization_name in self.read_organization_names
+
+    def read_organization(
+        self,
+        organization_name,
+        wwpn_pool_moids,
+        read_fcpool_reservations,
+        read_server_profiles,
+    ):
+        """Read the existing objects of an Organization, unless they are already read.
+
+        The reservations of the WWPN Pools not streamed yet are read before the
+        Server Profiles, so that the consumers of all the requested reservations
+        are known.
+
+        Args:
+            - organization_name (string): name of the Organization.
+            - wwpn_pool_moids (callable): function without arguments returning the moids of the WWPN Pools of the inventory in the Organization.
+            - read_fcpool_reservations (callable): function iterating over the WWPN reservations of a list of WWPN Pool moids.
+            - read_server_profiles (callable): function without arguments iterating over the Server Profiles of the Organization.
+        """
+        with self._lock:
+            if self.is_read(organization_name):
+                return
+
+            unread_wwpn_pool_moids = sorted(
+                set(wwpn_pool_moids()) - self.read_wwpn_pool_moids
+            )
+            if unread_wwpn_pool_moids:
+                for _ in self.keep_fcpool_reservations(
+                    unread_wwpn_pool_moids,
+                    read_fcpool_reservations(unread_wwpn_pool_moids),
+                ):
+                    pass
+
+            requested_reservation_moids = {
+                reservation_moid
+                for reservation_moid, _ in self.fcpool_reservations_by_identity.values()
+            }
+            server_profile_names = self.server_profile_names.get(
+                organization_name, set()
+            )
+
+            # Keep the Server Profiles of the inventory, and the consumers of the requested reservations.
+            for existing_server_profile in read_server_profiles():
+                existing_server_profile_name = intersight_session.attribute_of(
+                    existing_server_profile, "Name"
+                )
+                for reference in (
+                    intersight_session.attribute_of(
+                        existing_server_profile, "ReservationReferences"
+                    )
+                    or []
+                ):
+                    reservation_moid = intersight_session.attribute_of(
+                        reference, "ReservationMoid"
+                    )
+                    if reservation_moid in requested_reservation_moids:
+                        self.consumers_by_reservation_moid[reservation_moid] = (
+                            existing_server_profile_name,
+                            intersight_session.attribute_of(reference, "ConsumerName"),
+                        )
+
+                if existing_server_profile_name in server_profile_names:
+                    src_template = intersight_session.attribute_of(
+                        existing_server_profile, "SrcTemplate"
+                    )
+                    self.server_profiles_by_name[existing_server_profile_name] = (
+                        intersight_session.moid_of(existing_server_profile),
+                        intersight_session.moid_of(src_template)
+                        if src_template
+                        else None,
+                    )
+
+            self.read_organization_names.add(organization_name)
+
+
+def plan_delta(
+    server_profiles,
+    existing_objects,
+    wwpn_pool_moids,
+    server_profile_template_moid,
+):
+    """Plan only the missing work, given the Server Profiles and WWPN reservations that already exist.
+
+    - A Server Profile that exists, is attached to the Server Profile Template and
+      references a correctly bound reservation for each of its vHBAs is complete
+      and skipped.
+    - A Server Profile that exists but is not complete keeps its moid and is not
+      cloned again.
+    - A reservation of the requested WWPN in the requested WWPN Pool is reused,
+      unless another Server Profile or vHBA already references it.
+
+    Args:
+        - server_profiles (list of dictionnaries): Server Profiles of the inventory. The reused reservations get their 'reservation_moid'.
+        - existing_objects (ExistingObjects object): existing objects of the Organization of the Server Profiles, already read.
+        - wwpn_pool_moids (dictionary): moid of each WWPN Pool, indexed by WWPN Pool name.
+        - server_profile_template_moid (string): moid of the Server Profile Template.
+
+    Returns:
+        - server_profiles_to_provision (list of dictionnaries): Server Profiles of the inventory that are not complete.
+        - existing_server_profile_moids (dictionary): moid of each Server Profile to provision that already exists, indexed by Server Profile name.
+        - complete_server_profile_names (list of strings): names of the complete Server Profiles.
+        - conflicts (list of strings): description of the WWPNs reserved for another Server Profile, vHBA or WWPN Pool.
+    """
+    fcpool_reservations_by_identity = existing_objects.fcpool_reservations_by_identity
+    consumers_by_reservation_moid = existing_objects.consumers_by_reservation_moid
+    existing_server_profiles_by_name = existing_objects.server_profiles_by_name
+
+    server_profiles_to_provision = []
+    existing_server_profile_moids = {}
+    complete_server_profile_names = []
+    conflicts = []
+
+    for server_profile in server_profiles:
+        server_profile_name = server_profile["server_profile_name"]
+        existing_server_profile = existing_server_profiles_by_name.get(
+            server_profile_name
+        )
+
+        bound_reservations = 0
+        for reservation in server_profile["reservations"]:
+            fcpool_reservation = fcpool_reservations_by_identity.get(
+                reservation["wwpn_to_reserve"].upper()
+            )
+            if fcpool_reservation is None:
+                continue
+
+            reservation_moid, wwpn_pool_moid = fcpool_reservation
+            if wwpn_pool_moid != wwpn_pool_moids[reservation["wwpn_pool"]]:
+                conflicts.append(
+                    f"WWPN {reservation['wwpn_to_reserve']} of {server_profile_name}/{reservation['vhba_name']} is reserved in another WWPN Pool"
+                )
+                continue
+
+            consumer = consumers_by_reservation_moid.get(reservation_moid)
+            if consumer is not None and consumer != (
+                server_profile_name,
+                reservation["vhba_name"],
+            ):
+                conflicts.append(
+                    f"WWPN {reservation['wwpn_to_reserve']} of {server_profile_name}/{reservation['vhba_name']} is already used by {consumer[0]}/{consumer[1]}"
+                )
+                continue
+
+            reservation["reservation_moid"] = reservation_moid
+            if consumer is not None:
+                bound_reservations += 1
+
+        if existing_server_profile is None:
+            server_profiles_to_provision.append(server_profile)
+            continue
+
+        existing_server_profile_moid, src_template_moid = existing_server_profile
+        if (
+            src_template_moid == server_profile_template_moid
+            and bound_reservations == len(server_profile["reservations"])
+        ):
+            complete_server_profile_names.append(server_profile_name)
+            continue
+
+        existing_server_profile_moids[
+            server_profile_name
+        ] = existing_server_profile_moid
+        server_profiles_to_provision.append(server_profile)
+
+    return (
+        server_profiles_to_provision,
+        existing_server_profile_moids,
+        complete_server_profile_names,
+        conflicts,
+    )
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,362 @@
+"""Module providing a governor rate limiting and retrying the requests sent to Intersight."""
+#!/usr/bin/env python3
+
+import email.utils
+import random
+import threading
+import time
+
+import intersight
+import urllib3
+
+
+# Default maximum rate of requests per second, adapted down on HTTP 429.
+DEFAULT_RATE_LIMIT = 20.0
+
+# Default number of retries of a request failing with a retryable status.
+DEFAULT_MAX_RETRIES = 5
+
+# HTTP statuses worth retrying: rate limited or transient server errors.
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# Methods whose request may have been processed by the server before failing, e.g. a 'bulk.MoCloner' creation.
+NON_IDEMPOTENT_METHODS = ("POST", "PATCH")
+
+# HTTP statuses returned before the request is processed, retryable for any method.
+UNPROCESSED_STATUSES = (429, 503)
+
+# Connection errors raised before the request is sent, retryable for any method.
+UNSENT_ERRORS = (
+    urllib3.exceptions.ConnectTimeoutError,
+    urllib3.exceptions.EmptyPoolError,
+    urllib3.exceptions.ClosedPoolError,
+)
+
+
+###############################################################################
+#                              Request Governor                               #
+###############################################################################
+
+
+class RequestGovernor:
+    """Governor shared by all the requests sent through an ApiClient.
+
+    - A token bucket limits the rate of requests. The rate is divided by two on
+      every HTTP 429 and recovers additively on every success, so that the
+      throughput settles just under the limit of the server.
+    - Requests failing with a retryable status (or a connection error) are retried
+      with an exponential backoff with full jitter, honoring 'Retry-After'. A POST
+      or a PATCH is only retried when the server did not process it (429, 503) or
+      when it was not sent: otherwise a retry could create a second clone or
+      reservation, so the failure is raised for the journal or the reconcile to
+      resolve.
+    - A circuit breaker opens after `failure_threshold` consecutive failed requests
+      and fails the requests fast for `reset_timeout` seconds. Then it lets a
+      single probe request through and keeps failing the others: the circuit
+      breaker closes when the probe gets a response, and opens again otherwise.
+    """
+
+    def __init__(
+        self,
+        rate_limit=DEFAULT_RATE_LIMIT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=0.5,
+        max_delay=30.0,
+        failure_threshold=10,
+        reset_timeout=30.0,
+    ):
+        """Create a Request Governor.
+
+        Args:
+            - rate_limit (float): maximum number of requests per second, or 0 for no limit.
+            - max_retries (integer): maximum number of retries of a request.
+            - base_delay (float): backoff in seconds before the first retry.
+            - max_delay (float): maximum backoff in seconds between two retries.
+            - failure_threshold (integer): number of consecutive failed requests opening the circuit breaker.
+            - reset_timeout (float): time in seconds during which the opened circuit breaker fails the requests.
+        """
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.counters = {
+            "requests": 0,
+            "successes": 0,
+            "client_errors": 0,
+            "retries": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "connection_errors": 0,
+            "failures": 0,
+            "circuit_breaker_opened": 0,
+            "circuit_breaker_rejected": 0,
+            "time_waiting_for_tokens": 0.0,
+            "time_backing_off": 0.0,
+        }
+
+        self._rate = rate_limit
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._consecutive_failures = 0
+        self._circuit_opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def install(self, api_client):
+        """Route all the requests of an ApiClient through the governor.
+
+        Requests are governed at the ApiClient.call_api level so that every retry is
+        signed again with a fresh HTTP signature.
+
+        Args:
+            - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+
+        Returns:
+            - api_client (Intersight ApiClient object): the same ApiClient object.
+        """
+        call_api = api_client.call_api
+
+        def governed_call_api(*args, **kwargs):
+            return self.call(call_api, *args, **kwargs)
+
+        api_client.call_api = governed_call_api
+
+        return api_client
+
+    def call(self, function, *args, **kwargs):
+        """Call a function sending a request, with rate limiting, retries and circuit breaking.
+
+        Args:
+            - function (callable): function sending the request.
+            - args, kwargs: arguments of the function.
+
+        Returns:
+            - the result of the function.
+        """
+        # ApiClient.call_api(resource_path, method, ...)
+        method = kwargs.get("method", args[1] if len(args) > 1 else None)
+        idempotent = str(method).upper() not in NON_IDEMPOTENT_METHODS
+
+        for attempt in range(self.max_retries + 1):
+            probe = self._check_circuit_breaker()
+            self._acquire_token()
+            self._count("requests")
+
+            try:
+                result = function(*args, **kwargs)
+
+            except intersight.ApiException as exception:
+                if exception.status not in RETRYABLE_STATUSES:
+                    self._count("client_errors")
+                    self._record_response()
+                    raise
+
+                self._count("throttled" if exception.status == 429 else "server_errors")
+                if probe:
+                    self._open_circuit_breaker()
+                if exception.status == 429:
+                    self._slow_down()
+                if attempt == self.max_retries or not (
+                    idempotent or exception.status in UNPROCESSED_STATUSES
+                ):
+                    self._record_failure()
+                    raise
+
+                self._back_off(attempt, self._retry_after(exception))
+
+            except urllib3.exceptions.HTTPError as exception:
+                self._count("connection_errors")
+                if probe:
+                    self._open_circuit_breaker()
+                if attempt == self.max_retries or not (
+                    idempotent or self._unsent(exception)
+                ):
+                    self._record_failure()
+                    raise
+
+                self._back_off(attempt)
+
+            except BaseException:
+                # Let another request probe the server.
+                if probe:
+                    self._open_circuit_breaker()
+                raise
+
+            else:
+                self._count("successes")
+                self._record_response()
+                return result
+
+    def summary(self):
+        """Get the counters of the governor.
+
+        Returns:
+            - counters (dictionary): counters of the governor and the current rate limit.
+        """
+        with self._lock:
+            return dict(self.counters, current_rate_limit=round(self._rate, 2))
+
+    def print_summary(self):
+        """Print the counters of the governor."""
+        print("\nIntersight API requests:")
+        for counter, value in self.summary().items():
+            if isinstance(value, float):
+                value = round(value, 2)
+            print(f"- {counter}: {value}")
+
+    def _count(self, counter, value=1):
+        """Increment a counter."""
+        with self._lock:
+            self.counters[counter] += value
+
+    def _acquire_token(self):
+        """Wait until the token bucket holds a token and take it."""
+        if not self.rate_limit:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    max(self._rate, 1.0),
+                    self._tokens + (now - self._last_refill) * self._rate,
+                )
+                self._last_refill = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+
+                wait = (1.0 - self._tokens) / self._rate
+                self.counters["time_waiting_for_tokens"] += wait
+
+            time.sleep(wait)
+
+    def _slow_down(self):
+        """Halve the rate limit after a HTTP 429."""
+        if not self.rate_limit:
+            return
+
+        with self._lock:
+            self._rate = max(self._rate / 2, 0.1)
+
+    def _back_off(self, attempt, retry_after=None):
+        """Sleep before retrying a request.
+
+        Args:
+            - attempt (integer): number of the failed attempt, starting at 0.
+            - retry_after (float): delay in seconds requested by the server, if any.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        self._count("retries")
+        self._count("time_backing_off", delay)
+        time.sleep(delay)
+
+    @staticmethod
+    def _unsent(exception):
+        """Whether a connection error was raised before the request was sent.
+
+        Args:
+            - exception (urllib3.exceptions.HTTPError): connection error of the request.
+
+        Returns:
+            - unsent (boolean): True if the server cannot have received the request.
+        """
+        if isinstance(exception, urllib3.exceptions.MaxRetryError):
+            exception = exception.reason
+
+        return isinstance(exception, UNSENT_ERRORS)
+
+    @staticmethod
+    def _retry_after(exception):
+        """Get the delay in seconds of the 'Retry-After' header of a failed request.
+
+        Args:
+            - exception (intersight.ApiException): exception of the failed request.
+
+        Returns:
+            - retry_after (float): delay in seconds, or None without a valid 'Retry-After' header.
+        """
+        retry_after = (exception.headers or {}).get("Retry-After")
+        if retry_after is None:
+            return None
+
+        try:
+            return max(float(retry_after), 0.0)
+
+        except ValueError:
+            pass
+
+        # Otherwise an HTTP date, which falls back to the backoff when malformed.
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+
+        except (TypeError, ValueError):
+            return None
+
+        return max(retry_at.timestamp() - time.time(), 0.0)
+
+    def _check_circuit_breaker(self):
+        """Fail fast while the circuit breaker is opened, except for a single probe request once it is half-open.
+
+        Returns:
+            - probe (boolean): the request is the probe of the half-open circuit breaker.
+        """
+        with self._lock:
+            if self._circuit_opened_at is None:
+                return False
+
+            if (
+                not self._probe_in_flight
+                and time.monotonic() - self._circuit_opened_at >= self.reset_timeout
+            ):
+                # Half-open: let this request probe the server, and fail the others.
+                self._probe_in_flight = True
+                return True
+
+            self.counters["circuit_breaker_rejected"] += 1
+
+        raise intersight.ApiException(
+            status=0, reason="Circuit breaker opened after consecutive failures"
+        )
+
+    def _open_circuit_breaker(self):
+        """Open the circuit breaker again after its probe request failed."""
+        with self._lock:
+            self._circuit_opened_at = time.monotonic()
+            self._probe_in_flight = False
+            self.counters["circuit_breaker_opened"] += 1
+
+    def _record_response(self):
+        """Close the failure streak and the circuit breaker, and recover the rate limit after a response."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._circuit_opened_at = None
+            self._probe_in_flight = False
+            if self.rate_limit and self._rate < self.rate_limit:
+                self._rate = min(self.rate_limit, self._rate + 0.1)
+
+    def _record_failure(self):
+        """Count a request failed after all its retries and open the circuit breaker if needed."""
+        with self._lock:
+            self.counters["failures"] += 1
+            self._consecutive_failures += 1
+            if (
+                self._consecutive_failures >= self.failure_threshold
+                and self._circuit_opened_at is None
+            ):
+                self._circuit_opened_at = time.monotonic()
+                self.counters["circuit_breaker_opened"] += 1
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
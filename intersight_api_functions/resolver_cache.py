@@ -0,0 +1,208 @@
+"""Module providing a cache for the resolution of Intersight object names to moids."""
+#!/usr/bin/env python3
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# Default lifetime in seconds of a cached name to moid resolution.
+DEFAULT_RESOLVER_CACHE_TTL = 3600
+
+# File extensions persisted in a SQLite database instead of a JSON file.
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+###############################################################################
+#                               Resolver Cache                                #
+###############################################################################
+
+
+class ResolverCache:
+    """Cache of name to moid resolutions keyed by (object type, name, organization).
+
+    Entries expire after `ttl` seconds. When a `path` is given, the cache is loaded
+    from and saved to a JSON file, or to a SQLite database if the path ends with
+    .db, .sqlite or .sqlite3, so that repeated runs start warm.
+    """
+
+    def __init__(self, ttl=DEFAULT_RESOLVER_CACHE_TTL, path=None, enabled=True):
+        """Create a Resolver Cache.
+
+        Args:
+            - ttl (integer): lifetime in seconds of a cached resolution.
+            - path (string): path of the file used to persist the cache, or None to keep it in memory.
+            - enabled (boolean): when False, every resolution goes to the Intersight API and nothing is stored.
+        """
+        self.ttl = ttl
+        self.path = path
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        if self.enabled and self.path and os.path.exists(self.path):
+            self._load()
+
+    @staticmethod
+    def _key(object_type, name, organization):
+        return (object_type, name, organization or "")
+
+    def get(self, object_type, name, organization=None):
+        """Get a cached moid.
+
+        Args:
+            - object_type (string): Intersight object type, e.g. 'fcpool.Pool'.
+            - name (string): name of the object.
+            - organization (string): name of the Organization of the object, if any.
+
+        Returns:
+            - moid (string): cached moid, or None if it is missing or expired.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(self._key(object_type, name, organization))
+            if entry is None:
+                return None
+
+            moid, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[self._key(object_type, name, organization)]
+                return None
+
+            return moid
+
+    def set(self, object_type, name, moid, organization=None):
+        """Store a moid in the cache.
+
+        Args:
+            - object_type (string): Intersight object type, e.g. 'fcpool.Pool'.
+            - name (string): name of the object.
+            - moid (string): moid of the object.
+            - organization (string): name of the Organization of the object, if any.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[self._key(object_type, name, organization)] = (
+                moid,
+                time.time() + self.ttl,
+            )
+
+    def resolve(self, object_type, name, lookup, organization=None):
+        """Get a moid from the cache, or from `lookup` on a cache miss.
+
+        Args:
+            - object_type (string): Intersight object type, e.g. 'fcpool.Pool'.
+            - name (string): name of the object.
+            - lookup (callable): function without arguments returning the moid from the Intersight API.
+            - organization (string): name of the Organization of the object, if any.
+
+        Returns:
+            - moid (string): moid of the object.
+        """
+        moid = self.get(object_type, name, organization)
+        if moid is not None:
+            self.hits += 1
+            return moid
+
+        self.misses += 1
+        moid = lookup()
+        self.set(object_type, name, moid, organization)
+
+        return moid
+
+    def resolve_many(self, object_type, names, lookup, organization=None):
+        """Get moids from the cache, and all the missing ones from a single call to `lookup`.
+
+        Args:
+            - object_type (string): Intersight object type, e.g. 'fcpool.Pool'.
+            - names (list of strings): names of the objects.
+            - lookup (callable): function called with the list of the names missing from the cache, returning their moids indexed by name.
+            - organization (string): name of the Organization of the objects, if any.
+
+        Returns:
+            - moids (dictionary): moid of each object, indexed by name.
+        """
+        moids = {name: self.get(object_type, name, organization) for name in names}
+        missing_names = [name for name, moid in moids.items() if moid is None]
+        self.hits += len(moids) - len(missing_names)
+        if not missing_names:
+            return moids
+
+        self.misses += len(missing_names)
+        for name, moid in lookup(missing_names).items():
+            self.set(object_type, name, moid, organization)
+            moids[name] = moid
+
+        return moids
+
+    def invalidate(self):
+        """Drop all the cached resolutions, in memory and on disk."""
+        with self._lock:
+            self._entries = {}
+
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self):
+        """Persist the non-expired cached resolutions to `path`, if any."""
+        if not self.enabled or not self.path:
+            return
+
+        now = time.time()
+        with self._lock:
+            entries = [
+                (object_type, name, organization, moid, expires_at)
+                for (object_type, name, organization), (
+                    moid,
+                    expires_at,
+                ) in self._entries.items()
+                if expires_at >= now
+            ]
+
+        if self.path.endswith(SQLITE_EXTENSIONS):
+            with contextlib.closing(
+                sqlite3.connect(self.path)
+            ) as connection, connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS resolutions (object_type TEXT, name TEXT, organization TEXT, moid TEXT, expires_at REAL, PRIMARY KEY (object_type, name, organization))"
+                )
+                connection.execute("DELETE FROM resolutions")
+                connection.executemany(
+                    "INSERT INTO resolutions VALUES (?, ?, ?, ?, ?)", entries
+                )
+        else:
+            with open(self.path, "w", encoding="utf-8") as json_file:
+                json.dump([list(entry) for entry in entries], json_file, indent=2)
+
+    def _load(self):
+        """Load the non-expired resolutions persisted in `path`."""
+        if self.path.endswith(SQLITE_EXTENSIONS):
+            with contextlib.closing(sqlite3.connect(self.path)) as connection:
+                entries = connection.execute(
+                    "SELECT object_type, name, organization, moid, expires_at FROM resolutions"
+                ).fetchall()
+        else:
+            with open(self.path, "r", encoding="utf-8") as json_file:
+                entries = json.load(json_file)
+
+        now = time.time()
+        for object_type, name, organization, moid, expires_at in entries:
+            if expires_at >= now:
+                self._entries[(object_type, name, organization)] = (moid, expires_at)
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,310 @@
+"""Module providing the rollback of the changes recorded in the Rollback Log of a run."""
+#!/usr/bin/env python3
+
+import time
+
+from intersight_api_functions import (
+    checkpoint_journal,
+    intersight_api_methods,
+    provisioning,
+)
+
+
+# Default number of 'bulk.Request' deleting resources in flight.
+DEFAULT_ROLLBACK_WORKERS = 8
+
+# URI of the resources deleted by a rollback, in the order of their deletion:
+# the Server Profiles reference the reservations.
+DELETION_ORDER = [
+    ("server.Profile", "/v1/server/Profiles"),
+    ("fcpool.Reservation", "/v1/fcpool/Reservations"),
+]
+
+
+###############################################################################
+#                                Rollback Plan                                #
+###############################################################################
+
+
+def plan_rollback(entries):
+    """Compute what to delete and restore from the entries of a Rollback Log.
+
+    The Server Profiles created by the run are deleted with their links, so only
+    the Server Profiles that existed before the run get their links restored.
+
+    Args:
+        - entries (list of dictionaries): entries of the Rollback Log of the run.
+
+    Returns:
+        - plan (dictionary): with the following keys:
+            - 'created' (dictionary): moids of the resources to delete, indexed by object type.
+            - 'detached_from_template' (dictionary): moids of the Server Profiles to attach back, indexed by Server Profile Template moid.
+            - 'policy_detached' (dictionary): moids of the Server Profiles to attach back, indexed by San Connectivity Policy moid.
+            - 'associated' (dictionary): reservations referenced before the run to associate back, indexed by Server Profile moid.
+    """
+    created = {}
+    server_profile_template_moid = None
+    detached_from_template = {}
+    policy_detached = {}
+    associated = {}
+
+    for entry in entries:
+        action = entry["action"]
+        if action == "run":
+            server_profile_template_moid = entry["server_profile_template_moid"]
+        elif action == "created":
+            created.setdefault(entry["object_type"], []).extend(entry["moids"])
+        elif action == "detached_from_template":
+            # The logs written before the inventory groups only record the template of the run.
+            detached_from_template.setdefault(
+                entry.get("server_profile_template_moid")
+                or server_profile_template_moid,
+                [],
+            ).extend(entry["server_profile_moids"])
+        elif action == "policy_detached":
+            policy_detached.setdefault(
+                entry["vnic_san_connectivity_policy_moid"], []
+            ).extend(entry["server_profile_moids"])
+        elif action == "associated":
+            # The first association of a Server Profile by the run is the one to undo.
+            # The logs written before the previous reservations were recorded lack them.
+            previous_reservations_by_server_profile_moid = entry.get(
+                "previous_reservations_by_server_profile_moid"
+            )
+            for server_profile_moid, reservations in entry[
+                "reservations_by_server_profile_moid"
+            ].items():
+                associated.setdefault(
+                    server_profile_moid,
+                    (
+                        reservations,
+                        None
+                        if previous_reservations_by_server_profile_moid is None
+                        else previous_reservations_by_server_profile_moid.get(
+                            server_profile_moid, []
+                        ),
+                    ),
+                )
+
+    created = {
+        object_type: list(dict.fromkeys(moids))
+        for object_type, moids in created.items()
+    }
+    created_server_profile_moids = set(created.get("server.Profile", []))
+    created_reservation_moids = set(created.get("fcpool.Reservation", []))
+
+    def existed_before_the_run(server_profile_moids):
+        return [
+            server_profile_moid
+            for server_profile_moid in dict.fromkeys(server_profile_moids)
+            if server_profile_moid not in created_server_profile_moids
+        ]
+
+    def reservation_keys(reservations):
+        return {
+            (reservation["vhba_name"], reservation["reservation_moid"])
+            for reservation in reservations
+        }
+
+    associated_back = {}
+    for server_profile_moid, associations in associated.items():
+        if server_profile_moid in created_server_profile_moids:
+            continue
+        reservations, previous_reservations = associations
+
+        # Without the previous reservations, keep the reservations the run did not create.
+        if previous_reservations is None:
+            if not any(
+                reservation["reservation_moid"] in created_reservation_moids
+                for reservation in reservations
+            ):
+                continue
+            previous_reservations = reservations
+        elif reservation_keys(previous_reservations) == reservation_keys(reservations):
+            continue
+
+        associated_back[server_profile_moid] = [
+            reservation
+            for reservation in previous_reservations
+            if reservation["reservation_moid"] not in created_reservation_moids
+        ]
+
+    return {
+        "created": created,
+        "detached_from_template": {
+            server_profile_template_moid: existed_before_the_run(server_profile_moids)
+            for server_profile_template_moid, server_profile_moids in detached_from_template.items()
+            if server_profile_template_moid
+            and existed_before_the_run(server_profile_moids)
+        },
+        "policy_detached": {
+            vnic_san_connectivity_policy_moid: existed_before_the_run(
+                server_profile_moids
+            )
+            for vnic_san_connectivity_policy_moid, server_profile_moids in policy_detached.items()
+            if existed_before_the_run(server_profile_moids)
+        },
+        "associated": associated_back,
+    }
+
+
+###############################################################################
+#                                  Rollback                                   #
+###############################################################################
+
+
+def delete_in_bulk(api_client, uri, moids, workers):
+    """Delete resources with 'bulk.Request' chunks sent in parallel.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - uri (string): URI of the resources, e.g. '/v1/server/Profiles'.
+        - moids (list of strings): moids of the resources to delete.
+        - workers (integer): maximum number of 'bulk.Request' in flight.
+
+    Returns:
+        - failed_moids (dictionary): error message of each resource that could not be deleted, indexed by moid.
+    """
+    chunk_size = intersight_api_methods.MAX_BULK_SUB_REQUESTS
+    chunks = [
+        moids[start : start + chunk_size] for start in range(0, len(moids), chunk_size)
+    ]
+
+    failed_moids = {}
+    for failed_chunk_moids in provisioning.run_on_workers(
+        lambda chunk: intersight_api_methods.delete_resources(
+            api_client=api_client, uri=uri, moids=chunk
+        ),
+        chunks,
+        workers,
+    ):
+        failed_moids.update(failed_chunk_moids)
+
+    return failed_moids
+
+
+def rollback_run(api_client, rollback_log, workers=DEFAULT_ROLLBACK_WORKERS):
+    """Undo the changes recorded in the Rollback Log of a run.
+
+    The Server Profiles that existed before the run get their reservations, their
+    San Connectivity Policy and their Server Profile Template back first. The
+    Server Profiles then the WWPN reservations created by the run are deleted with
+    'bulk.Request' resources of up to 100 deletions, sent in parallel. The steps
+    of the run are then cancelled in its Checkpoint Journal, if any.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - rollback_log (RollbackLog object): log of the run to roll back.
+        - workers (integer): maximum number of 'bulk.Request' in flight.
+
+    Returns:
+        - failures (dictionary): error message of each change that could not be rolled back, indexed by moid.
+    """
+    start = time.perf_counter()
+    plan = plan_rollback(rollback_log.entries)
+
+    print(f"\nRolling back run {rollback_log.run_id}:")
+
+    # The changes made by the rollback itself are not recorded.
+    installed_rollback_log = getattr(api_client, "rollback_log", None)
+    api_client.rollback_log = None
+    try:
+        failures = undo(api_client, plan, workers)
+
+    finally:
+        api_client.rollback_log = installed_rollback_log
+
+    rollback_log.record("rolled_back", failures=len(failures))
+
+    # A resumed run must not skip the steps of the objects deleted or restored here.
+    for entry in rollback_log.entries:
+        if entry["action"] == "journal" and checkpoint_journal.cancel_run(
+            entry["path"], rollback_log.run_id
+        ):
+            print(f"- Cancelled the steps of the run in journal {entry['path']}.")
+
+    # Only the changes that did not fail are reported as rolled back.
+    def rolled_back(moids_by_key):
+        return sum(
+            moid not in failures for moids in moids_by_key.values() for moid in moids
+        )
+
+    print(
+        f"- Rolled back {rolled_back(plan['created'])} created resources and {rolled_back(plan['detached_from_template'])} detached Server Profiles in {time.perf_counter() - start:.2f}s."
+    )
+    for moid, message in failures.items():
+        print(f"- Failed to roll back {moid}: {message}.")
+
+    return failures
+
+
+def undo(api_client, plan, workers):
+    """Restore the links of the Server Profiles that existed before the run, then delete the resources created by the run.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - plan (dictionary): plan computed by plan_rollback().
+        - workers (integer): maximum number of 'bulk.Request' in flight.
+
+    Returns:
+        - failures (dictionary): error message of each change that could not be rolled back, indexed by moid.
+    """
+    failures = {}
+
+    # Associate back the reservations made before the run.
+    if plan["associated"]:
+        failures.update(
+            intersight_api_methods.associate_fc_pool_reservations_to_server_profiles(
+                api_client=api_client,
+                reservations_by_server_profile_moid=plan["associated"],
+            )
+        )
+
+    # Attach back the San Connectivity Policy.
+    for vnic_san_connectivity_policy_moid, server_profile_moids in plan[
+        "policy_detached"
+    ].items():
+        try:
+            intersight_api_methods.attach_san_connectivity_policy_to_server_profiles(
+                api_client=api_client,
+                server_profile_moids=server_profile_moids,
+                vnic_san_connectivity_policy_moid=vnic_san_connectivity_policy_moid,
+            )
+
+        # The policy is updated once for all its Server Profiles, and exits on failure:
+        # the rest of the rollback goes on, and each of its Server Profiles is reported.
+        except SystemExit:
+            failures.update(
+                dict.fromkeys(
+                    server_profile_moids,
+                    f"San Connectivity Policy {vnic_san_connectivity_policy_moid} could not be attached back",
+                )
+            )
+
+    # Attach back the Server Profile Templates.
+    for server_profile_template_moid, server_profile_moids in plan[
+        "detached_from_template"
+    ].items():
+        failures.update(
+            intersight_api_methods.attach_server_profiles_to_server_profile_template(
+                api_client=api_client,
+                server_profile_moids=server_profile_moids,
+                server_profile_template_moid=server_profile_template_moid,
+            )
+        )
+
+    # Delete the resources created by the run.
+    for object_type, uri in DELETION_ORDER:
+        moids = plan["created"].get(object_type, [])
+        if moids:
+            failures.update(delete_in_bulk(api_client, uri, moids, workers))
+
+    return failures
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,177 @@
+"""Module providing a log of the objects created and the links changed by a run, to roll it back."""
+#!/usr/bin/env python3
+
+import json
+import os
+import secrets
+import threading
+import time
+
+
+# Default directory of the rollback logs, one JSON lines file per run.
+DEFAULT_ROLLBACK_DIRECTORY = ".rollback"
+
+
+###############################################################################
+#                                Rollback Log                                 #
+###############################################################################
+
+
+def new_run_id():
+    """Generate the id of a new run.
+
+    Returns:
+        - run_id (string): start time of the run and a random suffix, e.g. '20240131-120000-3fa2c1'.
+    """
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+class RollbackLog:
+    """Append-only log of everything a run changed in Intersight.
+
+    The functions of intersight_api_methods record the objects they create after
+    their creation, and the links they remove before removing them, so that the
+    log never misses a change even when the run exits on an error. Each entry is
+    appended to '<directory>/<run id>.jsonl' and flushed to disk. Without a
+    directory, the log only lives in memory.
+
+    The actions recorded are:
+    - 'run': moid of the Server Profile Template of the run.
+    - 'journal': path of the Checkpoint Journal of the run, whose steps the rollback cancels.
+    - 'created': type and moids of created resources.
+    - 'detached_from_template': moids of Server Profiles detached from their template.
+    - 'policy_detached': moids of a San Connectivity Policy and of the Server Profiles detached from it.
+    - 'associated': reservations associated to each Server Profile, and the
+      reservations referenced before by the Server Profiles that existed before the run, indexed by moid.
+    - 'rolled_back': number of changes that could not be rolled back.
+    """
+
+    def __init__(self, run_id=None, directory=DEFAULT_ROLLBACK_DIRECTORY):
+        """Create a Rollback Log, or reopen the log of a previous run.
+
+        Args:
+            - run_id (string): id of the run, or None for a new run.
+            - directory (string): directory of the rollback logs, or None to keep the log in memory.
+        """
+        self.run_id = run_id or new_run_id()
+        self.path = (
+            os.path.join(directory, f"{self.run_id}.jsonl") if directory else None
+        )
+        self.entries = []
+        self.created_moids = set()
+        self._lock = threading.Lock()
+        self._file = None
+
+        if self.path:
+            os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.path):
+                self._replay()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def load(cls, run_id, directory=DEFAULT_ROLLBACK_DIRECTORY):
+        """Reopen the log of a previous run.
+
+        Args:
+            - run_id (string): id of the run.
+            - directory (string): directory of the rollback logs.
+
+        Returns:
+            - rollback_log (RollbackLog object): log of the run, or None if the run has no log.
+        """
+        if not os.path.exists(os.path.join(directory, f"{run_id}.jsonl")):
+            return None
+
+        return cls(run_id=run_id, directory=directory)
+
+    def _replay(self):
+        """Load the entries of the log file."""
+        with open(self.path, "r", encoding="utf-8") as log_file:
+            for line in log_file:
+                try:
+                    entry = json.loads(line)
+
+                # A run killed while writing leaves a truncated last line.
+                except json.JSONDecodeError:
+                    continue
+
+                self.entries.append(entry)
+                if entry["action"] == "created":
+                    self.created_moids.update(entry["moids"])
+
+    def install(self, api_client):
+        """Record the changes made through an ApiClient.
+
+        Args:
+            - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+
+        Returns:
+            - api_client (Intersight ApiClient object): the same ApiClient object.
+        """
+        api_client.rollback_log = self
+
+        return api_client
+
+    def record(self, action, **data):
+        """Record a change.
+
+        Args:
+            - action (string): kind of change, e.g. 'created'.
+            - data: moids of the change.
+        """
+        entry = dict(data, time=time.time(), action=action)
+
+        with self._lock:
+            self.entries.append(entry)
+            if action == "created":
+                self.created_moids.update(entry["moids"])
+            if self._file is not None:
+                self._file.write(json.dumps(entry) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        """Close the log file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def record(api_client, action, **data):
+    """Record a change in the Rollback Log installed on an ApiClient, if any.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - action (string): kind of change, e.g. 'created'.
+        - data: moids of the change.
+    """
+    rollback_log = getattr(api_client, "rollback_log", None)
+    if rollback_log is not None:
+        rollback_log.record(action, **data)
+
+
+def existed_before_the_run(api_client, moids):
+    """Get the resources whose state before the run the Rollback Log installed on an ApiClient must record.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - moids (list of strings): moids of the resources about to change.
+
+    Returns:
+        - moids (list of strings): moids of the resources not created by the run, or none without a Rollback Log.
+    """
+    rollback_log = getattr(api_client, "rollback_log", None)
+    if rollback_log is None:
+        return []
+
+    with rollback_log._lock:
+        return [moid for moid in moids if moid not in rollback_log.created_moids]
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
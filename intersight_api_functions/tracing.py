@@ -0,0 +1,405 @@
+"""Module providing the instrumentation and the trace export of the Intersight API calls."""
+#!/usr/bin/env python3
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+import intersight
+import urllib3
+from prettytable import PrettyTable
+
+
+# Upper bounds in milliseconds of the buckets of the latency histograms.
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf")]
+
+# Name of the operation and of the Server Profile of the calls of the current thread.
+_operation = contextvars.ContextVar("operation", default=None)
+_server_profile = contextvars.ContextVar("server_profile", default=None)
+
+# Tracer recording the operations, set by Tracer.install().
+_active_tracer = None
+
+
+###############################################################################
+#                                 Decorators                                  #
+###############################################################################
+
+
+def traced(function):
+    """Record a function of intersight_api_methods as an operation, and tag its requests with its name.
+
+    Args:
+        - function (callable): function calling the Intersight API.
+
+    Returns:
+        - wrapper (callable): the traced function.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # The requests of nested operations are tagged with the outermost operation.
+        token = _operation.set(_operation.get() or function.__name__)
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return function(*args, **kwargs)
+
+        except BaseException:
+            status = "error"
+            raise
+
+        finally:
+            _operation.reset(token)
+            tracer = _active_tracer
+            if tracer is not None:
+                tracer.record(
+                    kind="operation",
+                    name=function.__name__,
+                    start=start,
+                    duration=time.perf_counter() - start,
+                    server_profile=_server_profile.get(),
+                    status=status,
+                )
+
+    return wrapper
+
+
+def for_server_profile(method):
+    """Tag the requests of a step of a pipeline with the name of its Server Profile.
+
+    Args:
+        - method (callable): step taking the name of the Server Profile as first argument.
+
+    Returns:
+        - wrapper (callable): the tagged step.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, server_profile_name, *args, **kwargs):
+        token = _server_profile.set(server_profile_name)
+        try:
+            return method(self, server_profile_name, *args, **kwargs)
+
+        finally:
+            _server_profile.reset(token)
+
+    return wrapper
+
+
+###############################################################################
+#                                  Helpers                                    #
+###############################################################################
+
+
+def percentile(values, fraction):
+    """Get a percentile of a list of values with the nearest-rank method.
+
+    Args:
+        - values (list of floats): values.
+        - fraction (float): percentile between 0 and 1.
+
+    Returns:
+        - value (float): percentile of the values, or 0 without values.
+    """
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+###############################################################################
+#                                   Tracer                                    #
+###############################################################################
+
+
+class Tracer:
+    """Tracer recording every operation of intersight_api_methods and every HTTP request.
+
+    - An 'operation' span is recorded for each call of a function decorated with
+      traced(), with its duration and whether it failed.
+    - A 'request' span is recorded for each HTTP request (each retry included),
+      with the operation and the Server Profile it was sent for, its method, path,
+      status, body sizes, signing time, network time and total latency.
+
+    The spans can be exported as JSON lines or in the Chrome trace format
+    (chrome://tracing, Perfetto), and summarized per operation with a latency
+    histogram.
+    """
+
+    def __init__(self):
+        """Create a Tracer."""
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._current = threading.local()
+
+    def install(self, api_client):
+        """Record the requests of an ApiClient and the operations of intersight_api_methods.
+
+        Install the tracer before the RequestGovernor so that each retry is recorded
+        as a request.
+
+        Args:
+            - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+
+        Returns:
+            - api_client (Intersight ApiClient object): the same ApiClient object.
+        """
+        global _active_tracer
+        _active_tracer = self
+
+        call_api = api_client.call_api
+        request = api_client.request
+        signing_info = api_client.configuration.signing_info
+
+        def traced_call_api(resource_path, method, *args, **kwargs):
+            span = {
+                "kind": "request",
+                "name": _operation.get() or "-",
+                "server_profile": _server_profile.get(),
+                "method": method,
+                "path": resource_path,
+                "status": None,
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "signing_time": 0.0,
+                "network_time": 0.0,
+            }
+            self._current.span = span
+            start = time.perf_counter()
+            try:
+                return call_api(resource_path, method, *args, **kwargs)
+
+            except intersight.ApiException as exception:
+                span["status"] = exception.status
+                raise
+
+            except urllib3.exceptions.HTTPError:
+                span["status"] = 0
+                raise
+
+            finally:
+                self._current.span = None
+                self.record(start=start, duration=time.perf_counter() - start, **span)
+
+        def traced_request(method, url, *args, **kwargs):
+            span = getattr(self._current, "span", None)
+            if span is not None and kwargs.get("body") is not None:
+                span["bytes_sent"] = len(json.dumps(kwargs["body"]))
+
+            start = time.perf_counter()
+            try:
+                response = request(method, url, *args, **kwargs)
+
+            finally:
+                if span is not None:
+                    span["network_time"] = time.perf_counter() - start
+
+            if span is not None:
+                span["status"] = response.status
+                if kwargs.get("_preload_content", True):
+                    span["bytes_received"] = len(response.data)
+                else:
+                    # Raw responses are read by the caller: do not consume their body.
+                    span["bytes_received"] = int(
+                        response.headers.get("Content-Length") or 0
+                    )
+
+            return response
+
+        api_client.call_api = traced_call_api
+        api_client.request = traced_request
+
+        if signing_info is not None:
+            get_http_signature_headers = signing_info.get_http_signature_headers
+
+            def traced_get_http_signature_headers(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return get_http_signature_headers(*args, **kwargs)
+
+                finally:
+                    span = getattr(self._current, "span", None)
+                    if span is not None:
+                        span["signing_time"] += time.perf_counter() - start
+
+            signing_info.get_http_signature_headers = traced_get_http_signature_headers
+
+        return api_client
+
+    def record(self, kind, name, start, duration, **attributes):
+        """Record a span.
+
+        Args:
+            - kind (string): 'operation' or 'request'.
+            - name (string): name of the operation.
+            - start (float): time.perf_counter() at the start of the span.
+            - duration (float): duration of the span in seconds.
+            - attributes: other attributes of the span.
+        """
+        span = dict(
+            attributes,
+            kind=kind,
+            name=name,
+            start=start - self._origin,
+            duration=duration,
+            thread=threading.get_ident(),
+        )
+        with self._lock:
+            self.spans.append(span)
+
+    def export(self, path, trace_format="jsonl"):
+        """Write the spans to a file.
+
+        Args:
+            - path (string): path of the trace file.
+            - trace_format (string): 'jsonl' for one JSON span per line, or 'chrome' for the Chrome trace format.
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        with open(path, "w", encoding="utf-8") as trace_file:
+            if trace_format == "chrome":
+                json.dump(
+                    {
+                        "traceEvents": [
+                            {
+                                "name": span["name"],
+                                "cat": span["kind"],
+                                "ph": "X",
+                                "ts": round(span["start"] * 1e6, 1),
+                                "dur": round(span["duration"] * 1e6, 1),
+                                "pid": os.getpid(),
+                                "tid": span["thread"],
+                                "args": {
+                                    key: value
+                                    for key, value in span.items()
+                                    if key not in ("name", "kind", "start", "duration")
+                                },
+                            }
+                            for span in spans
+                        ],
+                        "displayTimeUnit": "ms",
+                    },
+                    trace_file,
+                )
+            else:
+                for span in spans:
+                    trace_file.write(json.dumps(span) + "\n")
+
+        print(f"- Wrote {len(spans)} spans to {path}.")
+
+    def summary(self):
+        """Summarize the requests of each operation.
+
+        Returns:
+            - summary (dictionary): counters, latency percentiles in milliseconds and latency histogram of the requests, indexed by operation name.
+        """
+        with self._lock:
+            spans = [span for span in self.spans if span["kind"] == "request"]
+
+        requests_by_operation = {}
+        for span in spans:
+            requests_by_operation.setdefault(span["name"], []).append(span)
+
+        summary = {}
+        for operation, requests in sorted(requests_by_operation.items()):
+            latencies = [request["duration"] * 1000 for request in requests]
+            histogram = [0] * len(HISTOGRAM_BUCKETS)
+            for latency in latencies:
+                histogram[
+                    next(
+                        index
+                        for index, bound in enumerate(HISTOGRAM_BUCKETS)
+                        if latency <= bound
+                    )
+                ] += 1
+
+            summary[operation] = {
+                "requests": len(requests),
+                "errors": sum(
+                    1
+                    for request in requests
+                    if request["status"] is None or not 200 <= request["status"] < 300
+                ),
+                "total_time": sum(latencies) / 1000,
+                "p50": percentile(latencies, 0.50),
+                "p90": percentile(latencies, 0.90),
+                "p99": percentile(latencies, 0.99),
+                "max": max(latencies),
+                "signing_time": sum(request["signing_time"] for request in requests),
+                "network_time": sum(request["network_time"] for request in requests),
+                "bytes_sent": sum(request["bytes_sent"] for request in requests),
+                "bytes_received": sum(
+                    request["bytes_received"] for request in requests
+                ),
+                "histogram": histogram,
+            }
+
+        return summary
+
+    def print_summary(self):
+        """Print the summary of the requests of each operation, with their latency histogram."""
+        summary = self.summary()
+        if not summary:
+            return
+
+        table = PrettyTable(
+            [
+                "Operation",
+                "Requests",
+                "Errors",
+                "Total (s)",
+                "p50 (ms)",
+                "p90 (ms)",
+                "p99 (ms)",
+                "Max (ms)",
+                "Signing (s)",
+                "Network (s)",
+                "Sent (KB)",
+                "Received (KB)",
+            ]
+        )
+        histogram_table = PrettyTable(
+            ["Operation"]
+            + [
+                f"<= {bound} ms" if bound != float("inf") else "> 2500 ms"
+                for bound in HISTOGRAM_BUCKETS
+            ]
+        )
+        for operation, counters in summary.items():
+            table.add_row(
+                [
+                    operation,
+                    counters["requests"],
+                    counters["errors"],
+                    round(counters["total_time"], 2),
+                    round(counters["p50"], 1),
+                    round(counters["p90"], 1),
+                    round(counters["p99"], 1),
+                    round(counters["max"], 1),
+                    round(counters["signing_time"], 2),
+                    round(counters["network_time"], 2),
+                    round(counters["bytes_sent"] / 1024, 1),
+                    round(counters["bytes_received"] / 1024, 1),
+                ]
+            )
+            histogram_table.add_row([operation] + counters["histogram"])
+
+        print("\nIntersight API requests per operation:")
+        print(table)
+        print("\nLatency histogram of the requests per operation:")
+        print(histogram_table)
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,281 @@
+"""Module providing the 64-bit integer representation of WWPNs and the interval index of the ID blocks of WWPN Pools."""
+#!/usr/bin/env python3
+
+import bisect
+import re
+import sys
+from array import array
+
+from intersight_api_functions import intersight_session
+
+
+# WWPN as 8 colon separated hexadecimal bytes.
+WWPN_PATTERN = re.compile(r"[0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){7}")
+
+# Type code of the arrays of WWPNs: unsigned 64-bit integers.
+WWPN_TYPECODE = "Q"
+
+
+###############################################################################
+#                                   WWPNs                                     #
+###############################################################################
+
+
+def parse_wwpn(wwpn):
+    """Parse a WWPN into a 64-bit integer.
+
+    Args:
+        - wwpn (string): WWPN as 8 colon separated hexadecimal bytes.
+
+    Returns:
+        - value (integer): WWPN as an integer.
+
+    Raises:
+        - ValueError: the WWPN is not 8 colon separated hexadecimal bytes.
+    """
+    if not isinstance(wwpn, str) or not WWPN_PATTERN.fullmatch(wwpn):
+        raise ValueError(f"{wwpn!r} is not a WWPN")
+
+    return int(wwpn.replace(":", ""), 16)
+
+
+def format_wwpn(value):
+    """Format a 64-bit integer as a WWPN.
+
+    Args:
+        - value (integer): WWPN as an integer.
+
+    Returns:
+        - wwpn (string): WWPN as 8 colon separated hexadecimal bytes.
+    """
+    return value.to_bytes(8, "big").hex(":").upper()
+
+
+def parse_wwpns(wwpns):
+    """Parse WWPNs into a compact array of 64-bit integers.
+
+    The WWPNs are converted all at once: their separators are checked with a
+    single slice of the joined WWPNs, and their bytes are decoded into the array
+    without creating an integer per WWPN.
+
+    Args:
+        - wwpns (iterable of strings): WWPNs as 8 colon separated hexadecimal bytes.
+
+    Returns:
+        - values (array of unsigned 64-bit integers): WWPNs as integers, in the same order.
+
+    Raises:
+        - ValueError: a WWPN is not 8 colon separated hexadecimal bytes.
+    """
+    wwpns = list(wwpns)
+    values = array(WWPN_TYPECODE)
+    if not wwpns:
+        return values
+
+    # Every third character of 8 colon separated bytes, joined with colons, is a colon.
+    joined_wwpns = ":".join(wwpns)
+    data = None
+    if len(joined_wwpns) == 24 * len(wwpns) - 1 and joined_wwpns[2::3] == ":" * (
+        8 * len(wwpns) - 1
+    ):
+        # Bytes separated by whitespace decode into fewer bytes than WWPNs.
+        try:
+            data = bytes.fromhex(joined_wwpns.replace(":", ""))
+        except ValueError:
+            pass
+
+    if data is None or len(data) != 8 * len(wwpns):
+        # Report the first invalid WWPN.
+        for wwpn in wwpns:
+            parse_wwpn(wwpn)
+
+    values.frombytes(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+
+    return values
+
+
+###############################################################################
+#                              Pool Block Index                               #
+###############################################################################
+
+
+class PoolBlockIndex:
+    """Sorted interval index of the ID blocks of WWPN Pools.
+
+    The ID blocks, which may overlap between pools, are split into disjoint
+    segments, each covered by the same pools. The bounds of the segments are kept
+    in sorted arrays of 64-bit integers, so that the segment of a WWPN is found by
+    a binary search, and a batch of WWPNs is located with a single sort and a
+    linear sweep over the segments.
+    """
+
+    def __init__(self, blocks):
+        """Create a Pool Block Index.
+
+        Args:
+            - blocks (iterable of tuples): first WWPN as an integer, number of WWPNs and moid of the WWPN Pool of each ID block.
+        """
+        # Add and remove the pool of each block at its bounds, in order.
+        events = []
+        for first, size, wwpn_pool_moid in blocks:
+            if size > 0:
+                events.append((first, 1, wwpn_pool_moid))
+                events.append((first + size, -1, wwpn_pool_moid))
+        events.sort(key=lambda event: event[0])
+
+        self.starts = array(WWPN_TYPECODE)
+        self.ends = array(WWPN_TYPECODE)
+        self.wwpn_pool_moids = []
+
+        active = {}
+        for index, (position, change, wwpn_pool_moid) in enumerate(events):
+            active[wwpn_pool_moid] = active.get(wwpn_pool_moid, 0) + change
+            if not active[wwpn_pool_moid]:
+                del active[wwpn_pool_moid]
+
+            # The segment ends at the next bound, once all the events of this bound are applied.
+            if index + 1 < len(events) and events[index + 1][0] == position:
+                continue
+            if not active or index + 1 == len(events):
+                continue
+
+            covering_wwpn_pool_moids = tuple(sorted(active))
+            end = events[index + 1][0] - 1
+            if (
+                self.ends
+                and self.ends[-1] + 1 == position
+                and self.wwpn_pool_moids[-1] == covering_wwpn_pool_moids
+            ):
+                self.ends[-1] = end
+                continue
+
+            self.starts.append(position)
+            self.ends.append(end)
+            self.wwpn_pool_moids.append(covering_wwpn_pool_moids)
+
+    @classmethod
+    def from_wwpn_pools(cls, wwpn_pools):
+        """Create the index of the ID blocks of WWPN Pools read from Intersight.
+
+        Args:
+            - wwpn_pools (iterable of Intersight FcpoolPool objects or dictionaries): WWPN Pools with their Moid and IdBlocks.
+
+        Returns:
+            - index (PoolBlockIndex object): index of the ID blocks.
+        """
+
+        def blocks():
+            for wwpn_pool in wwpn_pools:
+                wwpn_pool_moid = intersight_session.moid_of(wwpn_pool)
+                for id_block in (
+                    intersight_session.attribute_of(wwpn_pool, "IdBlocks") or []
+                ):
+                    first = parse_wwpn(
+                        intersight_session.attribute_of(id_block, "From")
+                    )
+                    size = intersight_session.attribute_of(id_block, "Size")
+                    if not size:
+                        size = (
+                            parse_wwpn(intersight_session.attribute_of(id_block, "To"))
+                            - first
+                            + 1
+                        )
+                    yield first, size, wwpn_pool_moid
+
+        return cls(blocks())
+
+    def locate(self, values):
+        """Locate WWPNs in the segments of the index.
+
+        Args:
+            - values (array or list of integers): WWPNs as integers.
+
+        Returns:
+            - segments (array of integers): index of the segment containing each WWPN, or -1 outside all the ID blocks.
+        """
+        segments = array("l", [-1]) * len(values)
+        starts, ends = self.starts, self.ends
+        segment, segment_count = 0, len(starts)
+
+        # Sweep the segments and the sorted WWPNs together.
+        for position in sorted(range(len(values)), key=values.__getitem__):
+            value = values[position]
+            if segment < segment_count and ends[segment] < value:
+                segment = bisect.bisect_left(ends, value, segment)
+            if segment == segment_count:
+                break
+            if starts[segment] <= value:
+                segments[position] = segment
+
+        return segments
+
+    def exclusive_segments(self, wwpn_pool_moid):
+        """Get the segments covered by a WWPN Pool only.
+
+        Args:
+            - wwpn_pool_moid (string): moid of the WWPN Pool.
+
+        Returns:
+            - segments (list of tuples): first and last WWPN of each segment, as integers.
+        """
+        return [
+            (self.starts[segment], self.ends[segment])
+            for segment, covering_wwpn_pool_moids in enumerate(self.wwpn_pool_moids)
+            if covering_wwpn_pool_moids == (wwpn_pool_moid,)
+        ]
+
+    def check(self, values, wwpn_pool_moid):
+        """Check that WWPNs of a WWPN Pool are in its ID blocks, and only in its ID blocks.
+
+        The WWPNs are sorted once, and the number of WWPNs in each segment covered
+        by the WWPN Pool only is counted with two binary searches: the WWPNs are
+        only located one by one when some of them are elsewhere.
+
+        Args:
+            - values (array or list of integers): WWPNs as integers.
+            - wwpn_pool_moid (string): moid of the WWPN Pool of the WWPNs.
+
+        Returns:
+            - conflicts (list of tuples): position of each WWPN outside the ID blocks of the WWPN Pool or in the ID blocks
+              of other WWPN Pools, whether it is in the ID blocks of the WWPN Pool, and the moids of the other WWPN Pools.
+        """
+        sorted_values = sorted(values)
+        in_exclusive_segments = sum(
+            bisect.bisect_right(sorted_values, end)
+            - bisect.bisect_left(sorted_values, start)
+            for start, end in self.exclusive_segments(wwpn_pool_moid)
+        )
+        if in_exclusive_segments == len(values):
+            return []
+
+        conflicts = []
+        for position, segment in enumerate(self.locate(values)):
+            covering_wwpn_pool_moids = (
+                self.wwpn_pool_moids[segment] if segment >= 0 else ()
+            )
+            if covering_wwpn_pool_moids == (wwpn_pool_moid,):
+                continue
+
+            conflicts.append(
+                (
+                    position,
+                    wwpn_pool_moid in covering_wwpn_pool_moids,
+                    [
+                        covering_wwpn_pool_moid
+                        for covering_wwpn_pool_moid in covering_wwpn_pool_moids
+                        if covering_wwpn_pool_moid != wwpn_pool_moid
+                    ],
+                )
+            )
+
+        return conflicts
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
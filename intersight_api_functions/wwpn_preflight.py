@@ -0,0 +1,272 @@
+"""Module providing the pre-flight check of the WWPNs of an inventory against the WWPN Pools and their reservations and leases."""
+#!/usr/bin/env python3
+
+from intersight_api_functions import (
+    intersight_api_methods,
+    intersight_session,
+    wwpn_index,
+)
+
+
+###############################################################################
+#                              WWPN Pre-flight                                #
+###############################################################################
+
+
+class RequestedWwpns:
+    """Index of the WWPNs requested by an inventory, built in a single pass over it.
+
+    Each requested WWPN is kept in a hash set with its Organization, WWPN Pool,
+    Server Profile and vHBA, which reports the WWPNs requested twice: the memory
+    grows with the number of WWPNs of the inventory, a few hundred bytes each.
+    """
+
+    def __init__(self):
+        """Create an empty index."""
+        # Organization, WWPN Pool, Server Profile and vHBA of each requested WWPN.
+        self.requested_wwpns = {}
+        self.wwpn_pool_names = {}
+        # Requested WWPNs of each Organization and WWPN Pool.
+        self.wwpns_in_wwpn_pools = {}
+        self.conflicts = []
+
+    def add_server_profile(self, organization_name, server_profile):
+        """Index the WWPNs of a Server Profile of the inventory.
+
+        Args:
+            - organization_name (string): name of the Organization of the Server Profile.
+            - server_profile (dictionary): Server Profile of the inventory.
+        """
+        server_profile_name = server_profile["server_profile_name"]
+        for reservation in server_profile["reservations"]:
+            wwpn = reservation["wwpn_to_reserve"].upper()
+            requested_wwpn = self.requested_wwpns.get(wwpn)
+            if requested_wwpn is not None:
+                self.conflicts.append(
+                    f"WWPN {reservation['wwpn_to_reserve']} of {server_profile_name}/{reservation['vhba_name']} is also requested for {requested_wwpn[2]}/{requested_wwpn[3]}"
+                )
+                continue
+
+            self.requested_wwpns[wwpn] = (
+                organization_name,
+                reservation["wwpn_pool"],
+                server_profile_name,
+                reservation["vhba_name"],
+            )
+            self.wwpn_pool_names.setdefault(organization_name, set()).add(
+                reservation["wwpn_pool"]
+            )
+            self.wwpns_in_wwpn_pools.setdefault(
+                (organization_name, reservation["wwpn_pool"]), []
+            ).append(wwpn)
+
+    def add_inventory(self, server_profiles):
+        """Index the WWPNs of all the Server Profiles of an inventory.
+
+        Args:
+            - server_profiles (iterable of tuples): parameters and Server Profile, as yielded by inventory.read_inventory().
+        """
+        for parameters, server_profile in server_profiles:
+            self.add_server_profile(parameters["organization"], server_profile)
+
+
+def check_wwpns(
+    api_client,
+    inventory_wwpns,
+    cache,
+    journal=None,
+    reconcile_inventory=False,
+    existing_objects=None,
+):
+    """Check that the WWPNs of an inventory can be reserved, before the first write.
+
+    The requested WWPNs are indexed beforehand in a RequestedWwpns, in the pass
+    over the inventory that also counts its Server Profiles for the review. Then
+    the existing 'fcpool.Reservation' and 'fcpool.Lease' identities of the
+    referenced WWPN Pools are streamed with paginated queries selecting only the
+    identity, and each one is checked against the index: the check is linear in
+    the number of WWPNs, and the memory only grows with the inventory.
+
+    The ID blocks of the WWPN Pools of the account are read once into a
+    wwpn_index.PoolBlockIndex, and the requested WWPNs of each WWPN Pool, parsed
+    into an array of 64-bit integers, are checked in a batch: each one must be in
+    the ID blocks of its WWPN Pool, and in no ID block of another WWPN Pool.
+
+    A reservation recorded in the journal by a previous run of the same Server
+    Profile and vHBA is reused, and so is its lease. With reconcile, the
+    reservations and the leases of reservations of the requested WWPN Pools are
+    left to the delta, which reuses them or reports them. The reservations
+    streamed are kept in the existing objects of the reconciliation, if any, so
+    that they are not streamed again.
+
+    Args:
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server.
+        - inventory_wwpns (RequestedWwpns object): index of the WWPNs of the inventory.
+        - cache (ResolverCache object): cache of the name to moid resolutions.
+        - journal (CheckpointJournal object): journal of the completed steps of the previous runs, if any.
+        - reconcile_inventory (boolean): the run reconciles the inventory with the existing objects.
+        - existing_objects (reconcile.ExistingObjects object): index of the existing objects of the reconciliation, to which the reservations read are added, if any.
+
+    Returns:
+        - conflicts (list of strings): description of each WWPN that cannot be reserved.
+    """
+    conflicts = list(inventory_wwpns.conflicts)
+    requested_wwpns = inventory_wwpns.requested_wwpns
+    wwpn_pool_names = inventory_wwpns.wwpn_pool_names
+    wwpns_in_wwpn_pools = inventory_wwpns.wwpns_in_wwpn_pools
+
+    if not requested_wwpns:
+        return conflicts
+
+    # The WWPN Pools are looked up in their Organization, as when provisioning.
+    wwpn_pool_moids = {}
+    for organization_name, organization_wwpn_pool_names in wwpn_pool_names.items():
+        organization_moid = cache.resolve(
+            object_type="organization.Organization",
+            name=organization_name,
+            lookup=lambda: intersight_api_methods.get_organization_moid_from_organization_name(
+                api_client=api_client, organization_name=organization_name
+            ),
+        )
+        resolved_wwpn_pool_moids = cache.resolve_many(
+            object_type="fcpool.Pool",
+            names=sorted(organization_wwpn_pool_names),
+            lookup=lambda unresolved_wwpn_pool_names: intersight_api_methods.get_wwpn_pool_moids_from_wwpn_pool_names(
+                api_client=api_client,
+                wwpn_pool_names=unresolved_wwpn_pool_names,
+                organization_moid=organization_moid,
+            ),
+            organization=organization_name,
+        )
+        for wwpn_pool_name, wwpn_pool_moid in resolved_wwpn_pool_moids.items():
+            wwpn_pool_moids[(organization_name, wwpn_pool_name)] = wwpn_pool_moid
+
+    def conflict(wwpn, description):
+        _, _, server_profile_name, vhba_name = requested_wwpns[wwpn]
+        conflicts.append(
+            f"WWPN {wwpn} of {server_profile_name}/{vhba_name} {description}"
+        )
+
+    # Check the requested WWPNs of each WWPN Pool against the ID blocks of all the WWPN Pools.
+    wwpn_pools = list(
+        intersight_api_methods.get_wwpn_pools_id_blocks(api_client=api_client)
+    )
+    wwpn_pool_names_by_moid = {
+        intersight_session.moid_of(wwpn_pool): intersight_session.attribute_of(
+            wwpn_pool, "Name"
+        )
+        for wwpn_pool in wwpn_pools
+    }
+    pool_block_index = wwpn_index.PoolBlockIndex.from_wwpn_pools(wwpn_pools)
+
+    for (organization_name, wwpn_pool_name), wwpns in wwpns_in_wwpn_pools.items():
+        try:
+            values = wwpn_index.parse_wwpns(wwpns)
+        except ValueError:
+            valid_wwpns = []
+            for wwpn in wwpns:
+                try:
+                    wwpn_index.parse_wwpn(wwpn)
+                    valid_wwpns.append(wwpn)
+                except ValueError:
+                    conflict(wwpn, "is not a valid WWPN")
+            wwpns, values = valid_wwpns, wwpn_index.parse_wwpns(valid_wwpns)
+
+        block_conflicts = pool_block_index.check(
+            values, wwpn_pool_moids[(organization_name, wwpn_pool_name)]
+        )
+        for position, in_wwpn_pool, other_wwpn_pool_moids in block_conflicts:
+            if not in_wwpn_pool:
+                conflict(
+                    wwpns[position],
+                    f"is outside the ID blocks of WWPN Pool {wwpn_pool_name}",
+                )
+            if other_wwpn_pool_moids:
+                other_wwpn_pool_names = ", ".join(
+                    wwpn_pool_names_by_moid.get(moid, moid)
+                    for moid in other_wwpn_pool_moids
+                )
+                conflict(
+                    wwpns[position],
+                    f"is also in the ID blocks of WWPN Pool(s) {other_wwpn_pool_names}",
+                )
+
+    def is_reused(wwpn, reservation_moid, wwpn_pool_moid):
+        (
+            organization_name,
+            wwpn_pool_name,
+            server_profile_name,
+            vhba_name,
+        ) = requested_wwpns[wwpn]
+        if reservation_moid is None:
+            return False
+
+        data = (
+            journal.data(server_profile_name, f"reserved:{vhba_name}")
+            if journal is not None
+            else None
+        )
+        if data is not None and data["reservation_moid"] == reservation_moid:
+            return True
+
+        return (
+            reconcile_inventory
+            and wwpn_pool_moid == wwpn_pool_moids[(organization_name, wwpn_pool_name)]
+        )
+
+    referenced_wwpn_pool_moids = sorted(set(wwpn_pool_moids.values()))
+
+    existing_fcpool_reservations = (
+        intersight_api_methods.get_fcpool_reservations_in_wwpn_pools(
+            api_client=api_client, wwpn_pool_moids=referenced_wwpn_pool_moids
+        )
+    )
+    if existing_objects is not None:
+        existing_fcpool_reservations = existing_objects.keep_fcpool_reservations(
+            referenced_wwpn_pool_moids, existing_fcpool_reservations
+        )
+    for fcpool_reservation in existing_fcpool_reservations:
+        identity = intersight_session.attribute_of(fcpool_reservation, "Identity")
+        if identity.upper() not in requested_wwpns:
+            continue
+
+        if not is_reused(
+            identity.upper(),
+            intersight_session.moid_of(fcpool_reservation),
+            intersight_session.moid_of(
+                intersight_session.attribute_of(fcpool_reservation, "Pool")
+            ),
+        ):
+            conflict(identity.upper(), "is already reserved")
+
+    existing_fcpool_leases = intersight_api_methods.get_fcpool_leases_in_wwpn_pools(
+        api_client=api_client, wwpn_pool_moids=referenced_wwpn_pool_moids
+    )
+    for fcpool_lease in existing_fcpool_leases:
+        identity = intersight_session.attribute_of(fcpool_lease, "WwnId")
+        if not identity or identity.upper() not in requested_wwpns:
+            continue
+
+        reservation = intersight_session.attribute_of(fcpool_lease, "Reservation")
+        if not is_reused(
+            identity.upper(),
+            intersight_session.moid_of(reservation) if reservation else None,
+            intersight_session.moid_of(
+                intersight_session.attribute_of(fcpool_lease, "Pool")
+            ),
+        ):
+            conflict(identity.upper(), "is already leased")
+
+    print(
+        f"- Checked {len(requested_wwpns)} WWPNs against the ID blocks of the WWPN Pools and the existing reservations and leases: {len(conflicts)} conflicts."
+    )
+
+    return conflicts
+
+
+##############################################################################
+#                                   Main                                     #
+##############################################################################
+
+if __name__ == "__main__":
+    pass
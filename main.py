@@ -1,14 +1,30 @@
 """Main module to create Server Profiles from Template with pre-reserved identifiers."""
 #!/usr/bin/env python3
 
-import json
+import argparse
+import atexit
+import contextlib
 import os
+import sys
 
 from dotenv import load_dotenv
 from intersight_api_functions import (
+    async_provisioning,
+    checkpoint_journal,
+    completion_tracker,
+    execution_plan,
     helper_functions,
     intersight_api_methods,
     intersight_authentication,
+    inventory,
+    provisioning,
+    reconcile,
+    request_governor,
+    resolver_cache,
+    rollback,
+    rollback_log,
+    tracing,
+    wwpn_preflight,
 )
 
 
@@ -22,130 +38,535 @@ load_dotenv()
 # Intersight
 INTERSIGHT_KEY_ID = os.getenv("INTERSIGHT_KEY_ID")
 INTERSIGHT_SECRET_KEY_PATH = os.getenv("INTERSIGHT_SECRET_KEY_PATH")
+INTERSIGHT_HOST = os.getenv("INTERSIGHT_HOST", "https://intersight.com")
 
 # Config gile
 JSON_FILE = "inventory_config.json"
 
 
 ###############################################################################
-#                                   Main                                      #
+#                                 Arguments                                   #
 ###############################################################################
 
 
-if __name__ == "__main__":
-    helper_functions.print_server_profiles_before_creation(JSON_FILE)
+def parse_arguments(argv=None):
+    """Parse the command line arguments.
 
-    # Create an API Client to Authenticate against Intersight using API Keys.
-    api_client = intersight_authentication.authenticate_to_intersight(
-        intersight_key_id=INTERSIGHT_KEY_ID,
-        intersight_secret_key_path=INTERSIGHT_SECRET_KEY_PATH,
+    Args:
+        - argv (list of strings): arguments to parse, or None to parse sys.argv.
+
+    Returns:
+        - args (argparse Namespace): parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Create Server Profiles from Template with pre-reserved WWPN identifiers."
+    )
+    parser.add_argument(
+        "--inventory",
+        metavar="PATH",
+        default=JSON_FILE,
+        help="Inventory of the Server Profiles: inventory_config JSON file, or JSON lines file with a .jsonl/.ndjson extension (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--inventory-window",
+        type=int,
+        default=inventory.DEFAULT_INVENTORY_WINDOW,
+        help="Number of Server Profiles of the inventory planned and provisioned together, the next ones being read meanwhile (default: %(default)s).",
+    )
+    parser.add_argument(
+        "-y",
+        "--yes",
+        action="store_true",
+        help="Only print the parameters of the Server Profiles and provision them without asking for validation.",
+    )
+    parser.add_argument(
+        "--plan-file",
+        metavar="PATH",
+        help="Write the execution plan of each window of the inventory to PATH as JSON lines, also with --dry-run.",
+    )
+    parser.add_argument(
+        "--clone-chunk-size",
+        type=int,
+        default=intersight_api_methods.DEFAULT_CLONE_CHUNK_SIZE,
+        help="Number of Server Profiles cloned per 'bulk.MoCloner' request (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--coalesce-policy-updates",
+        action="store_true",
+        help="Detach and attach the San Connectivity Policy with a single policy update for all the Server Profiles.",
+    )
+    parser.add_argument(
+        "--bulk-reservations",
+        action="store_true",
+        help="Create the WWPN reservations of all the Server Profiles with 'bulk.Request' resources of up to 100 reservations.",
+    )
+    parser.add_argument(
+        "--bulk-profile-updates",
+        action="store_true",
+        help="Detach, associate the reservations of and attach back all the Server Profiles with 'bulk.Request' and 'bulk.MoMerger' resources of up to 100 Server Profiles.",
+    )
+    parser.add_argument(
+        "--raw-responses",
+        action="store_true",
+        help="Read the responses of the hot-path calls as raw JSON instead of deserializing them into SDK models (uses orjson when installed).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of operations of the execution plan run concurrently with a shared ApiClient (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "asyncio"],
+        default="threads",
+        help="Provisioning engine: thread pool of --workers, or asyncio tasks bounded by --max-in-flight (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=async_provisioning.DEFAULT_MAX_IN_FLIGHT,
+        help="Maximum number of Intersight API operations in flight with the asyncio engine (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=request_governor.DEFAULT_RATE_LIMIT,
+        help="Maximum number of Intersight API requests per second, halved on HTTP 429 and recovered on success, 0 for no limit (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=request_governor.DEFAULT_MAX_RETRIES,
+        help="Maximum number of retries of a request failing with HTTP 429 or 5xx (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=completion_tracker.DEFAULT_POLL_INTERVAL,
+        help="Delay in seconds between two polls of the asynchronous 'bulk.MoCloner' and 'bulk.MoMerger' results, doubled while nothing completes (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--max-poll-interval",
+        type=float,
+        default=completion_tracker.DEFAULT_MAX_POLL_INTERVAL,
+        help="Maximum delay in seconds between two polls of the asynchronous results (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--completion-timeout",
+        type=float,
+        default=completion_tracker.DEFAULT_TIMEOUT,
+        help="Time in seconds after which an asynchronous 'bulk.MoCloner' or 'bulk.MoMerger' is considered failed (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="Only provision the delta: skip the complete Server Profiles and reuse the existing Server Profiles and WWPN reservations.",
+    )
+    parser.add_argument(
+        "--skip-wwpn-check",
+        action="store_true",
+        help="Do not check the WWPNs of the inventory against the existing WWPN reservations and leases before the first write.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the plan of the run (operations, minimum number of API calls and critical path) without calling the Intersight API.",
     )
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        help="Append-only journal of the completed steps. When it exists, the completed steps are skipped so that an interrupted run resumes.",
+    )
+    parser.add_argument(
+        "--resolver-cache",
+        metavar="PATH",
+        help="JSON file (or SQLite database with a .db/.sqlite/.sqlite3 extension) persisting the name to moid resolutions between runs.",
+    )
+    parser.add_argument(
+        "--resolver-cache-ttl",
+        type=int,
+        default=resolver_cache.DEFAULT_RESOLVER_CACHE_TTL,
+        help="Lifetime in seconds of a cached name to moid resolution (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--no-resolver-cache",
+        action="store_true",
+        help="Bypass the resolver cache and resolve every name with the Intersight API.",
+    )
+    parser.add_argument(
+        "--invalidate-resolver-cache",
+        action="store_true",
+        help="Drop the persisted name to moid resolutions before the run.",
+    )
+    parser.add_argument(
+        "--rollback",
+        metavar="RUN_ID",
+        help="Roll back a previous run instead of provisioning: delete the Server Profiles and WWPN reservations it created and restore the links it removed.",
+    )
+    parser.add_argument(
+        "--rollback-on-failure",
+        action="store_true",
+        help="Roll back the run when it fails or when a Server Profile could not be provisioned.",
+    )
+    parser.add_argument(
+        "--rollback-dir",
+        metavar="PATH",
+        default=rollback_log.DEFAULT_ROLLBACK_DIRECTORY,
+        help="Directory of the rollback logs, one per run id (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--rollback-workers",
+        type=int,
+        default=rollback.DEFAULT_ROLLBACK_WORKERS,
+        help="Number of 'bulk.Request' deleting resources in flight during a rollback (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Record every Intersight API operation and request, write them to PATH and print a latency histogram per operation.",
+    )
+    parser.add_argument(
+        "--trace-format",
+        choices=["jsonl", "chrome"],
+        default="jsonl",
+        help="Format of the --trace file: JSON lines, or Chrome trace for chrome://tracing and Perfetto (default: %(default)s).",
+    )
+
+    return parser.parse_args(argv)
+
 
-    # Extract data from inventory_config JSON file.
-    with open(JSON_FILE, "r", encoding="utf-8") as json_file:
-        inventory_config = json.load(json_file)
+###############################################################################
+#                                Provisioning                                 #
+###############################################################################
+
+
+def create_pipeline(args, api_client, journal):
+    """Create the pipeline running the steps of a group of Server Profiles, with the engine of the arguments.
 
-    # Set parameters.
-    organization_name = inventory_config["organization"]
-    san_connectivity_policy_name = inventory_config["san_connectivity_policy"]
-    server_profile_template_name = inventory_config["server_profile_template"]
+    The moids of the pipeline are resolved by the lookups of the execution plan.
 
-    # Get Organization moid from Organization Name.
-    organization_moid = (
-        intersight_api_methods.get_organization_moid_from_organization_name(
-            api_client=api_client, organization_name=organization_name
+    Args:
+        - args (argparse Namespace): parsed command line arguments.
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server, or None for a dry run.
+        - journal (CheckpointJournal object): journal recording the completed steps.
+
+    Returns:
+        - pipeline (ProvisioningPipeline or AsyncProvisioningEngine object): pipeline of the group.
+    """
+    if args.engine == "asyncio":
+        return async_provisioning.AsyncProvisioningEngine(
+            api_client=api_client,
+            organization_moid=None,
+            san_connectivity_policy_moid=None,
+            server_profile_template_moid=None,
+            wwpn_pool_moids={},
+            max_in_flight=args.max_in_flight,
+            coalesce_policy_updates=args.coalesce_policy_updates,
+            bulk_reservations=args.bulk_reservations,
+            bulk_profile_updates=args.bulk_profile_updates,
+            journal=journal,
         )
-    )
 
-    # Get San Connectivity Policy moid from San Connectivity Policy Name.
-    san_connectivity_policy_moid = intersight_api_methods.get_san_connectivity_policy_moid_from_san_connectivity_policy_name(
-        api_client=api_client, san_connectivity_policy_name=san_connectivity_policy_name
+    return provisioning.ProvisioningPipeline(
+        api_client=api_client,
+        organization_moid=None,
+        san_connectivity_policy_moid=None,
+        server_profile_template_moid=None,
+        wwpn_pool_moids={},
+        workers=args.workers,
+        coalesce_policy_updates=args.coalesce_policy_updates,
+        bulk_reservations=args.bulk_reservations,
+        bulk_profile_updates=args.bulk_profile_updates,
+        journal=journal,
     )
 
-    # Get Server Profile Template moid from Server Profile Template Name.
-    server_profile_template_moid = intersight_api_methods.get_server_profile_template_moid_from_server_profile_template_name(
-        api_client=api_client, server_profile_template_name=server_profile_template_name
-    )
 
-    # Loop over the Server Profiles.
-    for server_profile in inventory_config["server_profiles"]:
-        server_profile_name = server_profile["server_profile_name"]
-        server_profile_reservations = server_profile["reservations"]
+def index_inventory(args, server_profiles):
+    """Read an inventory once to count its Server Profiles for the review, and index them for the pre-flight check and the reconciliation.
 
-        # Create a Server Profile from a Server Profile Template and Get moid of the new Server Profile.
-        resp_create_server_profile_from_template = (
-            intersight_api_methods.create_server_profile_from_template(
-                api_client=api_client,
-                organization_moid=organization_moid,
-                server_profile_name=server_profile_name,
-                server_profile_template_moid=server_profile_template_moid,
+    Args:
+        - args (argparse Namespace): parsed command line arguments.
+        - server_profiles (iterable of tuples): parameters and Server Profile, as yielded by inventory.read_inventory().
+
+    Returns:
+        - server_profile_counts (dictionary): number of Server Profiles, indexed by Organization, Server Profile Template and San Connectivity Policy.
+        - existing_objects (reconcile.ExistingObjects object): index of the existing objects of the reconciliation, with the Server Profiles of the inventory, or None without --reconcile.
+        - requested_wwpns (wwpn_preflight.RequestedWwpns object): index of the WWPNs of the inventory, or None with --skip-wwpn-check.
+    """
+    server_profile_counts = {}
+    existing_objects = reconcile.ExistingObjects() if args.reconcile else None
+    requested_wwpns = None if args.skip_wwpn_check else wwpn_preflight.RequestedWwpns()
+
+    for parameters, server_profile in inventory.unique_server_profiles(server_profiles):
+        group = tuple(parameters.values())
+        server_profile_counts[group] = server_profile_counts.get(group, 0) + 1
+        if existing_objects is not None:
+            existing_objects.add_server_profile(
+                parameters["organization"], server_profile
             )
-        )
+        if requested_wwpns is not None:
+            requested_wwpns.add_server_profile(
+                parameters["organization"], server_profile
+            )
+
+    return server_profile_counts, existing_objects, requested_wwpns
 
-        new_server_profile_from_template_moid = (
-            resp_create_server_profile_from_template.responses[0].body.moid
+
+def provision_inventory(args, api_client, read_server_profiles, inventory_index=None):
+    """Create and provision the Server Profiles of an inventory, or only print the plan of the run with --dry-run.
+
+    The Server Profiles are planned and provisioned by windows of
+    --inventory-window Server Profiles, in the order of the inventory: the next
+    window is read while the plan of the current one is executed. Before the
+    first write, the WWPNs of the whole inventory are checked against the
+    existing reservations and leases.
+
+    Args:
+        - args (argparse Namespace): parsed command line arguments.
+        - api_client (Intersight ApiClient object): ApiClient object used to communicate with the Intersight server, or None for a dry run.
+        - read_server_profiles (callable): function without arguments iterating over the parameters and Server Profile of each Server Profile of the inventory, as inventory.read_inventory().
+        - inventory_index (tuple): index of the inventory returned by index_inventory() for the review, or None to index it here.
+
+    Returns:
+        - failed_server_profiles (dictionary): reason of each Server Profile that could not be provisioned, indexed by Server Profile name.
+    """
+    # Create the cache of the name to moid resolutions.
+    cache = resolver_cache.ResolverCache(
+        ttl=args.resolver_cache_ttl,
+        path=args.resolver_cache,
+        enabled=not args.no_resolver_cache,
+    )
+    if args.invalidate_resolver_cache:
+        cache.invalidate()
+
+    # Replay the journal of the completed steps of the previous runs, if any.
+    # A dry run only reads it.
+    journal = checkpoint_journal.CheckpointJournal(
+        path=args.journal
+        if args.journal and (not args.dry_run or os.path.exists(args.journal))
+        else None
+    )
+
+    # The existing objects referenced by the inventory are read once for all its windows.
+    # A dry run does not read the existing objects, nor checks the WWPNs.
+    if args.dry_run:
+        existing_objects = reconcile.ExistingObjects() if args.reconcile else None
+        requested_wwpns = None
+    else:
+        _, existing_objects, requested_wwpns = inventory_index or index_inventory(
+            args, read_server_profiles()
         )
 
-        # Detach Server Profile from Server Profile Template.
-        resp_detach_server_profile = (
-            intersight_api_methods.detach_server_profile_from_template(
-                api_client=api_client,
-                server_profile_moid=new_server_profile_from_template_moid,
-            )
+    # Stop before the first write if a WWPN of the inventory cannot be reserved.
+    if requested_wwpns is not None:
+        conflicts = wwpn_preflight.check_wwpns(
+            api_client=api_client,
+            inventory_wwpns=requested_wwpns,
+            cache=cache,
+            journal=journal,
+            reconcile_inventory=args.reconcile,
+            existing_objects=existing_objects,
         )
+        if conflicts:
+            print("\nThe following WWPNs cannot be reserved:")
+            for conflict in conflicts:
+                print(f"- {conflict}.")
+            journal.close()
+            sys.exit(1)
 
-        # Detach San Connectivity Policy from Server Profile.
-        resp_detach_san_connectivity_policy_from_server_profile = (
-            intersight_api_methods.detach_san_connectivity_policy_from_server_profile(
-                api_client=api_client,
-                server_profile_moid=new_server_profile_from_template_moid,
-                vnic_san_connectivity_policy_moid=san_connectivity_policy_moid,
-            )
+    # Record everything the run creates or detaches in Intersight, to roll it back.
+    if not args.dry_run:
+        run_rollback_log = rollback_log.RollbackLog(directory=args.rollback_dir)
+        run_rollback_log.install(api_client)
+
+        # The steps completed by the run are cancelled in the journal by its rollback.
+        journal.run_id = run_rollback_log.run_id
+        if journal.path:
+            run_rollback_log.record("journal", path=os.path.abspath(journal.path))
+        print(
+            f"- Run {run_rollback_log.run_id}, rolled back with: --rollback {run_rollback_log.run_id}."
         )
 
-        # Create WWPN reservations in WWPN Pools.
-        for reservation in server_profile_reservations:
-            # Get WWPN Pool moid from WWPN Pool Name.
-            wwpn_pool_moid = (
-                intersight_api_methods.get_wwpn_pool_moid_from_wwpn_pool_name(
-                    api_client=api_client, wwpn_pool_name=reservation["wwpn_pool"]
+    failed_server_profiles = {}
+    provisioned_count = 0
+    windows = inventory.read_ahead(
+        inventory.inventory_windows(read_server_profiles(), size=args.inventory_window)
+    )
+    with (
+        open(args.plan_file, "w", encoding="utf-8")
+        if args.plan_file
+        else contextlib.nullcontext()
+    ) as plan_file:
+        for window_index, groups in enumerate(windows):
+            window_count = sum(len(group["server_profiles"]) for group in groups)
+            if window_index or window_count == args.inventory_window:
+                print(
+                    f"- Server Profiles {provisioned_count + 1} to {provisioned_count + window_count} of the inventory."
                 )
+            provisioned_count += window_count
+
+            # One pipeline per group of Server Profiles sharing the same Organization, Server
+            # Profile Template and San Connectivity Policy, all planned in a single plan.
+            plan, planners = execution_plan.plan_inventory(
+                groups=groups,
+                pipelines=[create_pipeline(args, api_client, journal) for _ in groups],
+                cache=cache,
+                clone_chunk_size=args.clone_chunk_size,
+                reconcile_inventory=args.reconcile,
+                existing_objects=existing_objects,
             )
+            if len(groups) > 1:
+                print(
+                    f"- {len(groups)} groups of Server Profiles, batched per Server Profile Template and San Connectivity Policy."
+                )
+
+            # Write the plan before running it, with the Server Profiles it provisions.
+            if plan_file is not None:
+                plan.export(plan_file, window=window_index, groups=groups)
+                plan_file.flush()
 
-            resp_create_fcpool_reservation = (
-                intersight_api_methods.create_fcpool_reservation(
-                    api_client=api_client,
-                    organization_moid=organization_moid,
-                    wwpn_pool_moid=wwpn_pool_moid,
-                    wwpn_to_reserve=reservation["wwpn_to_reserve"],
+            if args.dry_run:
+                plan.print_plan(
+                    workers=args.max_in_flight
+                    if args.engine == "asyncio"
+                    else args.workers
                 )
+                continue
+
+            # Run each operation as soon as its dependencies are completed.
+            plan.print_summary()
+            planners[0].pipeline.execute(plan)
+
+            failed_server_profiles.update(
+                (server_profile_name, reason)
+                for planner in planners
+                for server_profile_name, reason in planner.failed_server_profiles.items()
             )
 
-            reservation["reservation_moid"] = resp_create_fcpool_reservation["moid"]
+    if args.plan_file:
+        print(f"- Wrote the execution plan to {args.plan_file}.")
 
-        # Associate FC Pool Reservations to Server Profile.
-        resp_associate_fc_pool_reservations_to_server_profile = (
-            intersight_api_methods.associate_fc_pool_reservations_to_server_profile(
-                api_client=api_client,
-                reservations=server_profile_reservations,
-                server_profile_moid=new_server_profile_from_template_moid,
+    if args.dry_run:
+        if args.reconcile:
+            print(
+                "- With --reconcile, the steps of the Server Profiles found complete are skipped at run time."
             )
+        journal.close()
+        return {}
+
+    # Persist the name to moid resolutions for the next runs.
+    cache.save()
+    journal.close()
+
+    return failed_server_profiles
+
+
+###############################################################################
+#                                   Main                                      #
+###############################################################################
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    # Print the plan of the run without authenticating nor calling the Intersight API.
+    if args.dry_run:
+        provision_inventory(
+            args=args,
+            api_client=None,
+            read_server_profiles=lambda: inventory.read_inventory(args.inventory),
         )
+        sys.exit(0)
+
+    # Create an API Client to Authenticate against Intersight using API Keys, whose
+    # pool holds a connection for each worker and each of their helper threads.
+    max_connections = args.max_in_flight if args.engine == "asyncio" else args.workers
+    if args.rollback or args.rollback_on_failure:
+        max_connections = max(max_connections, args.rollback_workers)
+    api_client = intersight_authentication.authenticate_to_intersight(
+        intersight_key_id=INTERSIGHT_KEY_ID,
+        intersight_secret_key_path=INTERSIGHT_SECRET_KEY_PATH,
+        intersight_host=INTERSIGHT_HOST,
+        max_connections=max_connections,
+        raw_responses=args.raw_responses,
+    )
+
+    # Record every request, retries included, and export them at the end of the run.
+    if args.trace:
+        tracer = tracing.Tracer()
+        tracer.install(api_client)
+        atexit.register(tracer.print_summary)
+        atexit.register(tracer.export, path=args.trace, trace_format=args.trace_format)
+
+    # Rate limit and retry all the requests, and print the counters at the end of the run.
+    governor = request_governor.RequestGovernor(
+        rate_limit=args.rate_limit, max_retries=args.max_retries
+    )
+    governor.install(api_client)
+    atexit.register(governor.print_summary)
 
-        # Attach San Connectivity Policy to Server Profile.
-        resp_attach_san_connectivity_policy_from_server_profile = (
-            intersight_api_methods.attach_san_connectivity_policy_from_server_profile(
+    # Poll the asynchronous bulk operations of all the workers together.
+    tracker = completion_tracker.CompletionTracker(
+        poll_interval=args.poll_interval,
+        max_poll_interval=args.max_poll_interval,
+        timeout=args.completion_timeout,
+    )
+    tracker.install(api_client)
+    atexit.register(tracker.print_summary)
+
+    # Roll back a previous run instead of provisioning.
+    if args.rollback:
+        previous_rollback_log = rollback_log.RollbackLog.load(
+            run_id=args.rollback, directory=args.rollback_dir
+        )
+        if previous_rollback_log is None:
+            print(f"No rollback log for run {args.rollback} in {args.rollback_dir}.\n")
+            sys.exit(1)
+
+        rollback_failures = rollback.rollback_run(
+            api_client=api_client,
+            rollback_log=previous_rollback_log,
+            workers=args.rollback_workers,
+        )
+        previous_rollback_log.close()
+        sys.exit(1 if rollback_failures else 0)
+
+    # Count the Server Profiles of the review, and index them for the pre-flight check
+    # and the reconciliation, in a single pass over the inventory.
+    inventory_index = index_inventory(args, inventory.read_inventory(args.inventory))
+    helper_functions.print_server_profiles_before_creation(
+        args.inventory, assume_yes=args.yes, server_profile_counts=inventory_index[0]
+    )
+
+    try:
+        # Stream the Server Profiles of the inventory file into the provisioning.
+        failed_server_profiles = provision_inventory(
+            args=args,
+            api_client=api_client,
+            read_server_profiles=lambda: inventory.read_inventory(args.inventory),
+            inventory_index=inventory_index,
+        )
+
+    except SystemExit:
+        # The functions of intersight_api_methods exit on the first API error.
+        if args.rollback_on_failure and getattr(api_client, "rollback_log", None):
+            rollback.rollback_run(
                 api_client=api_client,
-                server_profile_moid=new_server_profile_from_template_moid,
-                vnic_san_connectivity_policy_moid=san_connectivity_policy_moid,
+                rollback_log=api_client.rollback_log,
+                workers=args.rollback_workers,
             )
-        )
+        raise
 
-        # Attach Server Profile to Server Profile Template.
-        resp_attach_server_profile_to_server_profile_template = (
-            intersight_api_methods.attach_server_profile_to_server_profile_template(
+    # Report the Server Profiles that could not be provisioned.
+    if failed_server_profiles:
+        print("\nThe following Server Profiles could not be provisioned:")
+        for server_profile_name, reason in failed_server_profiles.items():
+            print(f"- {server_profile_name}: {reason}.")
+        if args.rollback_on_failure:
+            rollback.rollback_run(
                 api_client=api_client,
-                server_profile_moid=new_server_profile_from_template_moid,
-                server_profile_template_moid=server_profile_template_moid,
+                rollback_log=api_client.rollback_log,
+                workers=args.rollback_workers,
             )
-        )
+        sys.exit(1)